@@ -1,12 +1,273 @@
-from flask import Flask, render_template, request, jsonify
-from model import LeetCodeBot
+from flask import Flask, Response, render_template, request, jsonify, stream_with_context
+from model import LeetCodeBot, generation_params
+from model_registry import registry
+from driver_pool import pool_from_env
+from catalog import ProblemCatalog
+from solution_cache import SolutionCache
+from journal import RunJournal
+from jobs import JobQueue, QueueFull
+from validation import PreSubmitValidator
+from scheduler import BotScheduler
+from events import format_sse, problem_summary
+from metrics import metrics
+from rate_limit import rate_from_env
+from prompt_compiler import compiler_from_env
+from lazy import import_times, is_imported, lazy_import
+import atexit
 import threading
 import os
+import time
 import traceback
 
 app = Flask(__name__)
+started_at = time.time()
 bot = None
 bot_thread = None
+driver_pool = pool_from_env()
+atexit.register(driver_pool.shutdown)
+# One scheduler paces every navigation, submission and API call the process makes
+rate_limiter = rate_from_env()
+catalog = ProblemCatalog(
+    path=os.environ.get('CATALOG_PATH', 'problems.db'),
+    ttl=float(os.environ.get('CATALOG_TTL_HOURS', 24)) * 3600
+)
+catalog.fetcher.rate = rate_limiter
+
+solution_cache = SolutionCache(
+    path=os.environ.get('SOLUTION_CACHE_PATH', 'solutions.db'),
+    max_entries=int(os.environ.get('SOLUTION_CACHE_SIZE', 5000)),
+    rejected_policy=os.environ.get('SOLUTION_CACHE_REJECTED', 'regenerate')
+)
+
+# Every run and attempt is journaled so a stopped or crashed run can be resumed
+journal = RunJournal(
+    path=os.environ.get('JOURNAL_PATH', 'journal.jsonl'),
+    sync_every=int(os.environ.get('JOURNAL_SYNC_EVERY', 20)),
+    sync_interval=float(os.environ.get('JOURNAL_SYNC_INTERVAL', 1.0))
+)
+atexit.register(journal.close)
+
+# Shared by every bot so retries and other workers hit the same tokenization cache
+prompt_compiler = compiler_from_env()
+
+validator = None
+if os.environ.get('VALIDATE_EXAMPLES', '1') == '1':
+    validator = PreSubmitValidator(
+        workers=int(os.environ.get('VALIDATION_WORKERS', 2)),
+        timeout=float(os.environ.get('VALIDATION_TIMEOUT', 5)),
+        memory_mb=int(os.environ.get('VALIDATION_MEMORY_MB', 256))
+    )
+
+# Optionally load the generator at boot so the first run doesn't wait for it
+if os.environ.get('WARM_MODEL', '0') == '1':
+    registry.warm(background=True)
+
+# Optionally pre-launch the pooled Chrome sessions as well
+if os.environ.get('WARM_DRIVERS', '0') == '1':
+    driver_pool.warm(background=True)
+
+# Heavy dependencies are imported on first use; WARM_UP=1 does it in the background at boot
+WARM_IMPORTS = ['bs4', 'selenium.webdriver', 'transformers']
+warmup = {'enabled': os.environ.get('WARM_UP', '0') == '1', 'started_at': None, 'finished_at': None}
+
+def warm_up():
+    warmup['started_at'] = time.time()
+    for name in WARM_IMPORTS:
+        try:
+            lazy_import(name)
+        except ImportError as e:
+            print(f"Error importing {name}: {str(e)}")
+    # The model and the first browser session load in parallel
+    threads = [registry.warm(background=True), driver_pool.warm(background=True)]
+    for thread in threads:
+        if thread:
+            thread.join()
+    warmup['finished_at'] = time.time()
+
+if warmup['enabled']:
+    threading.Thread(target=warm_up, name="boot-warmup", daemon=True).start()
+
+MAX_WORKERS = int(os.environ.get('MAX_WORKERS', 4))
+# Candidates are sampled in one call, so each one costs memory as well as generation time
+MAX_BEST_OF = int(os.environ.get('MAX_BEST_OF', 8))
+VERDICT_TIMEOUT = float(os.environ.get('VERDICT_TIMEOUT', 30))
+
+# Entries without their own params are keyed like a run with the default settings, since the
+# cache only hits on the same model, backend, best-of and prompt settings
+if os.environ.get('SOLUTION_CACHE_WARM'):
+    try:
+        default_best_of = max(1, min(int(os.environ.get('BEST_OF_N', 1)), MAX_BEST_OF))
+        solution_cache.warm_from_file(
+            os.environ['SOLUTION_CACHE_WARM'],
+            params=generation_params(default_best_of, prompt_compiler)
+        )
+    except Exception as e:
+        print(f"Error warming solution cache: {str(e)}")
+
+def create_bot(claims=None, batcher=None, events=None):
+    new_bot = LeetCodeBot(
+        driver_pool=driver_pool,
+        wait_timeouts={'verdict': VERDICT_TIMEOUT},
+        catalog=catalog,
+        fetcher=catalog.fetcher,
+        solution_cache=solution_cache,
+        validator=validator,
+        claims=claims,
+        batcher=batcher,
+        events=events,
+        rate=rate_limiter,
+        tabs=int(os.environ.get('SESSION_TABS', 0)),
+        prompts=prompt_compiler
+    )
+    new_bot.max_batch_size = int(os.environ.get('GEN_MAX_BATCH_SIZE', 4))
+    new_bot.max_batch_wait = float(os.environ.get('GEN_MAX_BATCH_WAIT', 0.5))
+    return new_bot
+
+def parse_flag(value, name):
+    # JSON booleans, 0/1, or the strings an env var or a form would carry
+    if isinstance(value, bool):
+        return value
+    if value in (0, 1):
+        return bool(value)
+    if isinstance(value, str) and value.strip().lower() in ('1', 'true', 'yes', 'on'):
+        return True
+    if isinstance(value, str) and value.strip().lower() in ('0', 'false', 'no', 'off', ''):
+        return False
+    raise ValueError(f'{name} must be true or false')
+
+def parse_run_options(data):
+    # Shared by /start-bot and /jobs; raises ValueError with a message for the client
+    try:
+        problem_count = int(data.get('problemCount', 1))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid problem count')
+    if problem_count < 1 or problem_count > 10:
+        raise ValueError('Problem count must be between 1 and 10')
+
+    difficulty = data.get('difficulty')
+    if difficulty and (not isinstance(difficulty, str) or difficulty.upper() not in ('EASY', 'MEDIUM', 'HARD')):
+        raise ValueError('Difficulty must be Easy, Medium or Hard')
+
+    try:
+        workers = int(data.get('workers', 1))
+    except (TypeError, ValueError):
+        raise ValueError('Invalid worker count')
+    if workers < 1 or workers > MAX_WORKERS:
+        raise ValueError(f'Workers must be between 1 and {MAX_WORKERS}')
+
+    try:
+        best_of = int(data.get('bestOf', os.environ.get('BEST_OF_N', 1)))
+    except (TypeError, ValueError):
+        best_of = 1
+    best_of = max(1, min(best_of, MAX_BEST_OF))
+    if workers > 1:
+        # Workers share a batcher that decodes one sample per prompt; best-of-N is single-worker only
+        best_of = 1
+
+    pipelined = data.get('pipelined')
+    if pipelined is None:
+        pipelined = os.environ.get('PIPELINED', '0')
+    pipelined = parse_flag(pipelined, 'Pipelined')
+
+    return {
+        'problem_count': problem_count,
+        'difficulty': difficulty,
+        'workers': workers,
+        'pipelined': pipelined,
+        'best_of': best_of
+    }
+
+def build_bot(options, resumes=None, skip=()):
+    # Clean up old bot instance
+    if bot:
+        try:
+            bot.stop()
+        except:
+            pass
+
+    # With several workers a scheduler drives one bot per browser
+    problem_count = options['problem_count']
+    workers = options['workers']
+    if workers > 1:
+        driver_pool.ensure_capacity(workers)
+        new_bot = BotScheduler(min(workers, problem_count), create_bot)
+    else:
+        new_bot = create_bot()
+
+    new_bot.set_problem_count(problem_count)
+    new_bot.set_difficulty(options['difficulty'])
+    new_bot.set_pipelined(options['pipelined'])
+    new_bot.set_best_of(options['best_of'])
+    for slug in skip:
+        # Covers both the catalog and the scraping fallback
+        new_bot.claims.claim(slug)
+        catalog.mark_attempted(slug)
+    run_id = journal.begin(
+        problem_count, options['difficulty'], workers, options['pipelined'], options['best_of'],
+        resumes=resumes
+    )
+    new_bot.set_journal(journal, run_id)
+    return new_bot, run_id
+
+def launch_bot(options, resumes=None, skip=()):
+    global bot, bot_thread
+
+    with start_lock:
+        if (bot and bot.running) or jobs.current:
+            return jsonify({'error': 'Bot is already running'}), 409
+
+        try:
+            bot, run_id = build_bot(options, resumes=resumes, skip=skip)
+        except Exception as e:
+            return jsonify({'error': f'Failed to initialize bot: {str(e)}'}), 500
+        bot.running = True
+
+    # Start bot in a separate thread
+    try:
+        bot_thread = threading.Thread(target=bot.start_solving)
+        bot_thread.daemon = True
+        bot_thread.start()
+    except Exception as e:
+        bot.running = False
+        return jsonify({'error': f'Failed to start bot thread: {str(e)}'}), 500
+
+    return jsonify({
+        'message': 'Bot started successfully',
+        'problemCount': options['problem_count'],
+        'workers': options['workers'],
+        'run': run_id
+    }), 202
+
+def run_job(job):
+    # Runs on the job queue's thread, so the job's bot solves there rather than on a thread of its own
+    global bot, bot_thread
+    while True:
+        with start_lock:
+            if not (bot and bot.running):
+                if job.cancel_requested_at:
+                    return
+                job_bot, run_id = build_bot(job.options)
+                bot = job_bot
+                bot_thread = threading.current_thread()
+                job_bot.running = True
+                break
+            running = bot_thread
+        # A run started through /start-bot got in first; queued jobs wait for it
+        if running:
+            running.join(timeout=1)
+        else:
+            time.sleep(0.1)
+    job.attach(job_bot, run_id)
+    job_bot.start_solving()
+
+# Only one run drives the browsers at a time; the lock covers the check and the bot swap
+start_lock = threading.Lock()
+jobs = JobQueue(
+    run_job,
+    max_depth=int(os.environ.get('JOB_QUEUE_DEPTH', 20)),
+    history=int(os.environ.get('JOB_HISTORY', 100)),
+    is_busy=lambda: bool(bot and bot.running)
+)
 
 @app.route('/')
 def index():
@@ -20,53 +281,110 @@ def start_bot():
             return jsonify({'error': 'No data provided'}), 400
         
         try:
-            problem_count = int(data.get('problemCount', 1))
-            if problem_count < 1 or problem_count > 10:
-                return jsonify({'error': 'Problem count must be between 1 and 10'}), 400
-        except ValueError:
-            return jsonify({'error': 'Invalid problem count'}), 400
+            options = parse_run_options(data)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        return launch_bot(options)
+
+    except Exception as e:
+        error_msg = f"Error starting bot: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/resume-bot', methods=['POST'])
+def resume_bot():
+    # Picks up the remaining count of the last run that was stopped or crashed
+    try:
+        run = journal.interrupted_run()
+        if not run:
+            return jsonify({'message': 'Nothing to resume'}), 200
+
+        workers = min(run['workers'] or 1, MAX_WORKERS)
+        options = {
+            'problem_count': run['remaining'],
+            'difficulty': run['difficulty'],
+            'workers': workers,
+            'pipelined': run['pipelined'],
+            'best_of': run['best_of']
+        }
+        response = launch_bot(
+            options,
+            resumes=run['run'],
+            skip=journal.attempted_slugs()
+        )
+        if response[1] == 202:
+            return jsonify({**response[0].get_json(), 'resumed': run}), 202
+        return response
+
+    except Exception as e:
+        error_msg = f"Error resuming bot: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    try:
+        data = request.get_json()
+        if not data:
+            return jsonify({'error': 'No data provided'}), 400
 
-        global bot, bot_thread
-        
-        # Stop existing bot if running
-        if bot and bot.running:
-            return jsonify({'error': 'Bot is already running'}), 409
-        
-        # Clean up old bot instance
-        if bot:
-            try:
-                bot.stop()
-            except:
-                pass
-        
-        # Create new bot instance
         try:
-            bot = LeetCodeBot()
-        except Exception as e:
-            return jsonify({'error': f'Failed to initialize bot: {str(e)}'}), 500
+            options = parse_run_options(data)
+            priority = int(data.get('priority', 0))
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
 
-        bot.set_problem_count(problem_count)
-        bot.running = True
-        
-        # Start bot in a separate thread
         try:
-            bot_thread = threading.Thread(target=bot.start_solving)
-            bot_thread.daemon = True
-            bot_thread.start()
-        except Exception as e:
-            bot.running = False
-            return jsonify({'error': f'Failed to start bot thread: {str(e)}'}), 500
-        
-        return jsonify({
-            'message': 'Bot started successfully',
-            'problemCount': problem_count
-        }), 202
+            job = jobs.submit(options, priority=priority)
+        except QueueFull as e:
+            # Roughly one run's worth of time before a slot is likely to free up
+            return jsonify({'error': str(e), 'queue': jobs.stats()}), 429, {'Retry-After': '60'}
+
+        return jsonify({'job': job.id, **jobs.describe(job)}), 202
 
     except Exception as e:
-        error_msg = f"Error starting bot: {str(e)}\n{traceback.format_exc()}"
+        error_msg = f"Error submitting job: {str(e)}\n{traceback.format_exc()}"
         print(error_msg)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/jobs')
+def list_jobs():
+    return jsonify({'jobs': jobs.list(), 'queue': jobs.stats()})
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job'}), 404
+    return jsonify(jobs.describe(job))
+
+@app.route('/jobs/<job_id>/results')
+def job_results(job_id):
+    job = jobs.get(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job'}), 404
+    bot_for_job = job.bot
+    solved = bot_for_job.get_solved_problems() if bot_for_job else job.solved_problems
+    return jsonify({
+        **jobs.describe(job),
+        'solved_problems': [problem_summary(p) for p in solved],
+        'attempts': journal.attempts(job.run_id) if job.run_id else []
+    })
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    job = jobs.cancel(job_id)
+    if not job:
+        return jsonify({'error': 'Unknown job'}), 404
+    # The run winds down cooperatively; wait briefly so the reply usually shows the final state
+    jobs.wait(job, timeout=1)
+    return jsonify(jobs.describe(job)), 200
+
+@app.route('/journal')
+def journal_status():
+    return jsonify({'journal': journal.stats(), 'resumable': journal.interrupted_run()})
+
 @app.route('/bot-status')
 def bot_status():
     try:
@@ -89,7 +407,23 @@ def bot_status():
             'is_loading': status_info.get('is_loading', False),
             'current_problem': current_problem,
             'solved_problems': solved_problems,
-            'total_solved': len(solved_problems)
+            'total_solved': status_info.get('solved_total', len(solved_problems)),
+            'waits': status_info.get('waits', {}),
+            'pipeline': status_info.get('pipeline'),
+            'batches': status_info.get('batches', []),
+            'generation': status_info.get('generation', []),
+            'cache': status_info.get('cache'),
+            'validation': status_info.get('validation'),
+            'yield': status_info.get('yield'),
+            'prompts': status_info.get('prompts'),
+            'session': status_info.get('session'),
+            'workers': status_info.get('workers'),
+            'aggregate': status_info.get('aggregate'),
+            'model': registry.stats(),
+            'drivers': driver_pool.stats(),
+            'rate': rate_limiter.stats(),
+            'jobs': jobs.stats(),
+            'catalog': catalog.stats()
         })
 
     except Exception as e:
@@ -97,6 +431,52 @@ def bot_status():
         print(error_msg)
         return jsonify({'error': str(e)}), 500
 
+def snapshot(current):
+    return {
+        'status': current.status,
+        'is_running': current.running,
+        'current_problem': problem_summary(current.get_current_problem()),
+        'solved_problems': [problem_summary(p) for p in current.get_solved_problems()]
+    }
+
+@app.route('/bot-events')
+def bot_events():
+    # Pushes only what changed; the cursor lets a reconnecting client resume without history
+    current = bot
+    cursor = request.headers.get('Last-Event-ID') or request.args.get('cursor')
+
+    def stream():
+        yield "retry: 2000\n\n"
+        if not current:
+            yield format_sse('snapshot', {
+                'status': 'Not initialized',
+                'is_running': False,
+                'current_problem': None,
+                'solved_problems': []
+            })
+            return
+
+        log = current.events
+        seq = log.parse_cursor(cursor)
+        if seq is None:
+            seq = log.seq
+            yield format_sse('snapshot', snapshot(current), log.cursor(seq))
+
+        while bot is current:
+            events = log.wait(seq, timeout=15)
+            if not events:
+                # Keeps proxies from closing an idle connection
+                yield ": keepalive\n\n"
+                continue
+            for event_seq, event_type, data in events:
+                seq = event_seq
+                yield format_sse(event_type, data, log.cursor(seq))
+
+    return Response(stream_with_context(stream()), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
 @app.route('/stop-bot', methods=['POST'])
 def stop_bot():
     try:
@@ -109,9 +489,17 @@ def stop_bot():
             return jsonify({'message': 'Bot is already stopped'}), 200
         
         try:
+            job = jobs.current
+            if job and job.bot is bot:
+                # A queued job's run ends through the queue so the job is marked cancelled
+                jobs.cancel(job.id)
+                jobs.wait(job, timeout=5)
+            else:
+                bot.cancel()
+                if bot_thread:
+                    bot_thread.join(timeout=5)
+            # Anything still winding down loses its browser here
             bot.stop()
-            if bot_thread:
-                bot_thread.join(timeout=5)
         except Exception as e:
             return jsonify({'error': f'Error stopping bot: {str(e)}'}), 500
         finally:
@@ -125,6 +513,69 @@ def stop_bot():
         print(error_msg)
         return jsonify({'error': str(e)}), 500
 
+@app.route('/metrics')
+def prometheus_metrics():
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+def component_status():
+    model = registry.stats()
+    drivers = driver_pool.stats()
+    return {
+        'imports': {name: is_imported(name) for name in WARM_IMPORTS},
+        'model': {'ready': model['loaded'], 'loading': model['loading'], 'error': model['error']},
+        'browser': {'ready': drivers['open'] > 0, 'idle': drivers['idle'], 'open': drivers['open']},
+        'catalog': {'ready': catalog.stats()['problems'] > 0},
+        'validator': {'ready': validator is not None}
+    }
+
+@app.route('/healthz')
+def healthz():
+    # The process is up and serving; says nothing about whether a run would start quickly
+    return jsonify({
+        'status': 'ok',
+        'uptime': round(time.time() - started_at, 1),
+        'components': component_status(),
+        'import_times': import_times(),
+        'warmup': warmup
+    })
+
+@app.route('/readyz')
+def readyz():
+    # Ready once a run can start without waiting for the model or a browser
+    components = component_status()
+    ready = components['model']['ready'] and components['browser']['ready']
+    return jsonify({'ready': ready, 'components': components}), 200 if ready else 503
+
+@app.route('/model-status')
+def model_status():
+    return jsonify(registry.stats())
+
+@app.route('/warm-model', methods=['POST'])
+def warm_model():
+    if registry.is_loaded():
+        return jsonify({'message': 'Model already loaded', 'model': registry.stats()}), 200
+    registry.warm(background=True)
+    return jsonify({'message': 'Model warm-up started'}), 202
+
+@app.route('/unload-model', methods=['POST'])
+def unload_model():
+    try:
+        if bot and bot.running:
+            return jsonify({'error': 'Cannot unload model while bot is running'}), 409
+
+        if bot:
+            bot.generator = None
+
+        if not registry.unload():
+            return jsonify({'message': 'Model is not loaded'}), 200
+
+        return jsonify({'message': 'Model unloaded', 'model': registry.stats()})
+
+    except Exception as e:
+        error_msg = f"Error unloading model: {str(e)}\n{traceback.format_exc()}"
+        print(error_msg)
+        return jsonify({'error': str(e)}), 500
+
 @app.errorhandler(404)
 def not_found(e):
     return jsonify({'error': 'Not found'}), 404
@@ -0,0 +1,116 @@
+from lazy import lazy_import
+import os
+
+
+class GeneratorBackend:
+    # A backend turns a model id into a text-generation pipeline; generation.py only relies on
+    # the pipeline call, .tokenizer and .model.generate, so every backend plugs in unchanged
+    name = None
+
+    def __init__(self, threads=None):
+        self.threads = threads
+
+    def load(self, model_name):
+        raise NotImplementedError
+
+    def describe(self):
+        return {'backend': self.name, 'threads': self.threads}
+
+
+class PipelineBackend(GeneratorBackend):
+    # The original float32 transformers pipeline
+    name = 'pipeline'
+
+    def load(self, model_name):
+        transformers = lazy_import('transformers')
+        if self.threads:
+            lazy_import('torch').set_num_threads(self.threads)
+        return transformers.pipeline("text-generation", model=model_name)
+
+
+class QuantizedBackend(GeneratorBackend):
+    # Linear layers dynamically quantized to int8: weights stored as int8, activations
+    # quantized on the fly, so no calibration data is needed
+    name = 'int8'
+
+    def load(self, model_name):
+        torch = lazy_import('torch')
+        transformers = lazy_import('transformers')
+        if self.threads:
+            torch.set_num_threads(self.threads)
+        tokenizer = transformers.AutoTokenizer.from_pretrained(model_name)
+        model = transformers.AutoModelForCausalLM.from_pretrained(model_name, torch_dtype=torch.float32)
+        model.eval()
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return transformers.pipeline("text-generation", model=model, tokenizer=tokenizer)
+
+
+class OnnxBackend(GeneratorBackend):
+    # Exported once to ONNX and run with ONNX Runtime on the CPU execution provider
+    name = 'onnx'
+
+    def __init__(self, threads=None, export_dir=None):
+        super().__init__(threads)
+        self.export_dir = export_dir
+
+    def export_path(self, model_name):
+        root = self.export_dir or 'onnx_models'
+        return os.path.join(root, model_name.replace('/', '__'))
+
+    def load(self, model_name):
+        try:
+            onnxruntime = lazy_import('onnxruntime')
+            ORTModelForCausalLM = lazy_import('optimum.onnxruntime').ORTModelForCausalLM
+            ort_pipeline = lazy_import('optimum.pipelines').pipeline
+        except ImportError as e:
+            raise Exception(f"The onnx backend needs optimum[onnxruntime] installed ({str(e)})")
+
+        options = onnxruntime.SessionOptions()
+        if self.threads:
+            options.intra_op_num_threads = self.threads
+            options.inter_op_num_threads = 1
+        options.graph_optimization_level = onnxruntime.GraphOptimizationLevel.ORT_ENABLE_ALL
+
+        path = self.export_path(model_name)
+        exported = os.path.exists(os.path.join(path, 'config.json'))
+        # Export is slow, so the ONNX graph is saved and reused on later loads
+        model = ORTModelForCausalLM.from_pretrained(
+            path if exported else model_name,
+            export=not exported,
+            provider='CPUExecutionProvider',
+            session_options=options
+        )
+        tokenizer = lazy_import('transformers').AutoTokenizer.from_pretrained(path if exported else model_name)
+        if not exported:
+            model.save_pretrained(path)
+            tokenizer.save_pretrained(path)
+        return ort_pipeline("text-generation", model=model, tokenizer=tokenizer, accelerator="ort")
+
+    def describe(self):
+        info = super().describe()
+        info['export_dir'] = self.export_dir
+        return info
+
+
+BACKENDS = {
+    PipelineBackend.name: PipelineBackend,
+    QuantizedBackend.name: QuantizedBackend,
+    OnnxBackend.name: OnnxBackend
+}
+
+
+def create_backend(name, threads=None, **options):
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown generator backend {name!r}, expected one of {', '.join(BACKENDS)}")
+    if name == OnnxBackend.name:
+        return OnnxBackend(threads=threads, export_dir=options.get('export_dir'))
+    return BACKENDS[name](threads=threads)
+
+
+def backend_from_env():
+    threads = os.environ.get('GENERATOR_THREADS')
+    return create_backend(
+        os.environ.get('GENERATOR_BACKEND', PipelineBackend.name),
+        threads=int(threads) if threads else None,
+        export_dir=os.environ.get('ONNX_EXPORT_DIR')
+    )
@@ -0,0 +1,107 @@
+# Micro-benchmark for description extraction on saved problem pages:
+#
+#     python -m benchmark.extract_bench snapshots/*.html --repeat 50
+#
+# Without snapshot paths it builds synthetic pages: a fake problem page buried in a large,
+# deeply nested app shell, roughly the shape of a real LeetCode problem page.
+from benchmark.fake_site import ACCEPTED_HTML, PROBLEM_PAGE, make_problem
+from bs4 import BeautifulSoup
+from extractor import PARSER, extract_description
+import argparse
+import json
+import time
+
+
+def legacy_extract(page_source):
+    # The previous fallback: build the whole tree, then five separate searches
+    soup = BeautifulSoup(page_source, 'html.parser')
+    possible_containers = [
+        soup.find('div', {'data-track-load': 'description_content'}),
+        soup.find('div', {'class': lambda x: x and 'description' in x.lower()}),
+        soup.find('div', {'role': 'tabpanel'}),
+        soup.find('div', {'data-cy': 'question-title'}),
+        soup.find('div', {'class': '_1l1MA'})
+    ]
+    for container in possible_containers:
+        if container and container.get_text().strip():
+            return container.get_text().strip()
+    return None
+
+
+def synthetic_page(index, depth=12, siblings=400):
+    problem = make_problem(index)
+    page = PROBLEM_PAGE.format(
+        title=problem['title'],
+        content=problem['content'],
+        starter=json.dumps(problem['starter_code']),
+        verdict=json.dumps(ACCEPTED_HTML),
+        editor_delay=0,
+        language_delay=0,
+        judge_delay=0
+    )
+    shell = ''.join(
+        f'<div class="flex item-{i}"><span class="text-sm">Item {i}</span><a href="/x/{i}">link</a></div>'
+        for i in range(siblings)
+    )
+    head, body = page.split('<body>', 1)
+    opening = ''.join(f'<div class="layer-{d}">' for d in range(depth))
+    closing = '</div>' * depth
+    return f"{head}<body><nav>{shell}</nav>{opening}{body.replace('</body></html>', '')}{closing}<footer>{shell}</footer></body></html>"
+
+
+def time_call(func, page, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(page)
+        samples.append(time.perf_counter() - start)
+    samples.sort()
+    return {
+        'mean_ms': round(sum(samples) / len(samples) * 1000, 3),
+        'p50_ms': round(samples[len(samples) // 2] * 1000, 3),
+        'min_ms': round(samples[0] * 1000, 3)
+    }
+
+
+def run(args):
+    pages = {}
+    for path in args.snapshots:
+        with open(path, encoding='utf-8') as f:
+            pages[path] = f.read()
+    if not pages:
+        pages = {f"synthetic-{i}": synthetic_page(i) for i in range(1, 4)}
+
+    results = {}
+    for name, page in pages.items():
+        parts = extract_description(page)
+        results[name] = {
+            'bytes': len(page),
+            'legacy': time_call(legacy_extract, page, args.repeat),
+            'extractor': time_call(extract_description, page, args.repeat),
+            'found': bool(parts),
+            'examples': len(parts['examples']) if parts else 0,
+            'constraints': len(parts['constraints']) if parts else 0
+        }
+        results[name]['speedup'] = round(
+            results[name]['legacy']['mean_ms'] / results[name]['extractor']['mean_ms'], 2
+        ) if results[name]['extractor']['mean_ms'] else None
+
+    return {'parser': PARSER, 'repeat': args.repeat, 'pages': results}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare description extraction strategies on page snapshots")
+    parser.add_argument('snapshots', nargs='*', help="saved page_source HTML files")
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--output', default=None)
+    args = parser.parse_args(argv)
+
+    text = json.dumps(run(args), indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,353 @@
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse
+import html
+import json
+import os
+import threading
+import time
+import zlib
+
+# Trimmed responses from the real problem-list and GraphQL APIs, with their extra fields kept
+RECORDINGS = os.path.join(os.path.dirname(__file__), 'recordings', 'leetcode_api.json')
+
+DIFFICULTIES = ['Easy', 'Medium', 'Hard']
+LEVELS = {'Easy': 1, 'Medium': 2, 'Hard': 3}
+
+PROBLEMSET_PAGE = """<!DOCTYPE html>
+<html><head><title>Problems</title></head>
+<body>
+<div role="table" id="problems"></div>
+<script>
+// Rows are rendered after load, like the real client-side problem table
+setTimeout(() => {{
+    const table = document.getElementById('problems');
+    table.innerHTML = {rows};
+}}, {render_delay});
+</script>
+</body></html>
+"""
+
+PROBLEM_PAGE = """<!DOCTYPE html>
+<html><head><title>{title}</title>
+<link rel="preload" href="/static/editor-font.woff2" as="font" type="font/woff2" crossorigin>
+</head>
+<body>
+<img src="/static/banner.png" alt="">
+<div data-cy="question-title">{title}</div>
+<div data-track-load="description_content">{content}</div>
+<button data-cy="lang-select">C++</button>
+<div id="editor"></div>
+<button data-cy="submit-code-btn">Submit</button>
+<div id="result"></div>
+<script>
+let starter = {starter};
+let verdict = {verdict};
+// Stand-in for the Monaco editor, attached once the page has "hydrated"; like the real one,
+// each problem gets its own model and the previous problem's model is left in getModels()
+setTimeout(() => {{
+    const models = [];
+    let model = null;
+    const createModel = (slug, language) => {{
+        model = {{
+            value: '', language: language, version: 1,
+            uri: 'file:///problems/' + slug + '/solution.py',
+            getValue() {{ return this.value; }},
+            setValue(value) {{ this.value = value; this.version += 1; }},
+            getVersionId() {{ return this.version; }},
+            getLanguageId() {{ return this.language; }}
+        }};
+        models.push(model);
+        return model;
+    }};
+    createModel(location.pathname.split('/')[2], 'cpp');
+    window.monaco = {{editor: {{
+        getModels: () => models.slice(),
+        getEditors: () => [{{getModel: () => model}}]
+    }}}};
+    const lang = document.querySelector('[data-cy="lang-select"]');
+    const usePython = () => {{
+        model.language = 'python';
+        model.setValue(starter);
+        lang.textContent = 'Python3';
+    }};
+    // Like the real editor, a language saved in localStorage is used straight away
+    if (localStorage.getItem('global_lang') === JSON.stringify('python3')) {{
+        usePython();
+    }}
+    lang.addEventListener('click', () => {{
+        setTimeout(usePython, {language_delay});
+    }});
+    // Minimal Next.js-style router: swaps the problem in place and keeps the editor loaded
+    window.next = {{router: {{
+        push(path) {{
+            const slug = path.split('/')[2];
+            return fetch('/_next/data/' + slug + '.json').then(r => r.ok ? r.json() : null).then(data => {{
+                if (!data) return false;
+                document.title = data.title;
+                document.querySelector('[data-cy="question-title"]').textContent = data.title;
+                document.querySelector('[data-track-load="description_content"]').innerHTML = data.content;
+                document.getElementById('result').innerHTML = '';
+                starter = data.starter;
+                verdict = data.verdict;
+                const language = model.language;
+                createModel(slug, language).setValue(language === 'python' ? starter : '');
+                history.pushState({{}}, '', path);
+                return true;
+            }});
+        }}
+    }}}};
+}}, {editor_delay});
+
+document.querySelector('[data-cy="submit-code-btn"]').addEventListener('click', (event) => {{
+    const button = event.target;
+    const result = document.getElementById('result');
+    button.disabled = true;
+    result.innerHTML = '';
+    setTimeout(() => {{
+        result.innerHTML = verdict;
+        button.disabled = false;
+    }}, {judge_delay});
+}});
+</script>
+</body></html>
+"""
+
+ACCEPTED_HTML = '<div class="text-success" data-e2e-locator="submission-result">Accepted</div>'
+REJECTED_HTML = '<div class="result text-error" data-e2e-locator="submission-result">Wrong Answer</div>'
+
+
+def make_problem(index):
+    slug = f"benchmark-problem-{index}"
+    values = [(index * 7 + k * 3) % 19 - 9 for k in range(3 + index % 4)]
+    return {
+        'id': index,
+        'slug': slug,
+        'title': f"Benchmark Problem {index}",
+        'difficulty': DIFFICULTIES[index % len(DIFFICULTIES)],
+        'content': (
+            f"<p>Given an integer array <code>nums</code>, return the sum of its elements.</p>"
+            f"<p><strong>Example 1:</strong></p>"
+            f"<pre><strong>Input:</strong> nums = {json.dumps(values)}\n"
+            f"<strong>Output:</strong> {sum(values)}</pre>"
+            f"<p><strong>Constraints:</strong></p>"
+            f"<ul><li><code>1 &lt;= nums.length &lt;= 10<sup>4</sup></code></li></ul>"
+        ),
+        'starter_code': "class Solution:\n    def sumArray(self, nums: List[int]) -> int:\n        "
+    }
+
+
+class FakeLeetCode:
+    # Local stand-in for the pages and APIs the bot uses, with configurable latencies
+    def __init__(self, problems=50, page_delay=0.05, render_delay=0.1, editor_delay=0.2,
+                 language_delay=0.05, judge_delay=0.5, accept_rate=0.8, asset_kb=64, host='127.0.0.1', port=0,
+                 recordings=None):
+        self.problems = [make_problem(i) for i in range(1, problems + 1)]
+        self.by_slug = {p['slug']: p for p in self.problems}
+        self.page_delay = page_delay
+        self.render_delay = render_delay
+        self.editor_delay = editor_delay
+        self.language_delay = language_delay
+        self.judge_delay = judge_delay
+        self.accept_rate = accept_rate
+        # Images and fonts the bot never needs, so lean mode has something to block
+        self.asset = b'\0' * (asset_kb * 1024)
+        self.requests = {}
+        self.lock = threading.Lock()
+        # With recordings the APIs answer with the recorded payloads instead of generated ones
+        self.recorded = None
+        if recordings:
+            with open(recordings) as f:
+                self.recorded = json.load(f)
+        # Status codes to answer with before serving normally, per request kind
+        self.failures = {}
+        self.server = ThreadingHTTPServer((host, port), self.handler_class())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def accepts(self, slug):
+        # Deterministic per problem so runs are comparable
+        return zlib.crc32(slug.encode('utf-8')) % 100 < self.accept_rate * 100
+
+    def count(self, kind):
+        with self.lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+
+    def fail_next(self, kind, statuses, retry_after=None):
+        # e.g. fail_next('graphql', [503, 503]) answers the next two GraphQL requests with 503
+        with self.lock:
+            self.failures.setdefault(kind, deque()).extend((status, retry_after) for status in statuses)
+
+    def next_failure(self, kind):
+        with self.lock:
+            pending = self.failures.get(kind)
+            return pending.popleft() if pending else None
+
+    def problemset_page(self):
+        rows = ''.join(
+            f'<div role="row"><a href="/problems/{p["slug"]}/">{html.escape(p["title"])}</a>'
+            f'<span class="text-difficulty-{p["difficulty"].lower()}">{p["difficulty"]}</span></div>'
+            for p in self.problems
+        )
+        return PROBLEMSET_PAGE.format(rows=json.dumps(rows), render_delay=int(self.render_delay * 1000))
+
+    def verdict(self, problem):
+        return ACCEPTED_HTML if self.accepts(problem['slug']) else REJECTED_HTML
+
+    def problem_page(self, problem):
+        verdict = self.verdict(problem)
+        return PROBLEM_PAGE.format(
+            title=html.escape(problem['title']),
+            content=problem['content'],
+            starter=json.dumps(problem['starter_code']),
+            verdict=json.dumps(verdict),
+            editor_delay=int(self.editor_delay * 1000),
+            language_delay=int(self.language_delay * 1000),
+            judge_delay=int(self.judge_delay * 1000)
+        )
+
+    def route_data(self, problem):
+        # What a client-side route change fetches instead of a whole page
+        return {
+            'title': problem['title'],
+            'content': problem['content'],
+            'starter': problem['starter_code'],
+            'verdict': self.verdict(problem)
+        }
+
+    def problem_list(self):
+        if self.recorded:
+            return self.recorded['problem_list']
+        return {
+            'num_total': len(self.problems),
+            'stat_status_pairs': [
+                {
+                    'stat': {
+                        'question_id': p['id'],
+                        'question__title': p['title'],
+                        'question__title_slug': p['slug']
+                    },
+                    'difficulty': {'level': LEVELS[p['difficulty']]},
+                    'paid_only': False
+                }
+                for p in self.problems
+            ]
+        }
+
+    def question(self, slug):
+        if self.recorded:
+            return self.recorded['questions'].get(slug) or {'data': {'question': None}}
+        problem = self.by_slug.get(slug)
+        if not problem:
+            return {'data': {'question': None}}
+        return {'data': {'question': {
+            'questionId': str(problem['id']),
+            'title': problem['title'],
+            'titleSlug': slug,
+            'content': problem['content'],
+            'difficulty': problem['difficulty'],
+            'isPaidOnly': False,
+            'exampleTestcases': '',
+            'codeSnippets': [{'lang': 'Python3', 'langSlug': 'python3', 'code': problem['starter_code']}]
+        }}}
+
+    def handler_class(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def setup(self):
+                # One per TCP connection, so keep-alive reuse shows up in the counts
+                site.count('connection')
+                super().setup()
+
+            def send_body(self, body, content_type, status=200, headers=None):
+                data = body if isinstance(body, bytes) else body.encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def send_json(self, payload, status=200):
+                self.send_body(json.dumps(payload), 'application/json', status)
+
+            def send_failure(self, kind):
+                failure = site.next_failure(kind)
+                if not failure:
+                    return False
+                status, retry_after = failure
+                headers = {'Retry-After': str(retry_after)} if retry_after is not None else None
+                self.send_body(json.dumps({'error': status}), 'application/json', status, headers)
+                return True
+
+            def do_GET(self):
+                path = urlparse(self.path).path
+                if path.rstrip('/') == '/problemset/all':
+                    site.count('problemset')
+                    time.sleep(site.page_delay)
+                    return self.send_body(site.problemset_page(), 'text/html')
+                if path == '/api/problems/all/':
+                    site.count('problem_list')
+                    if self.send_failure('problem_list'):
+                        return
+                    return self.send_json(site.problem_list())
+                if path.startswith('/_next/data/'):
+                    problem = site.by_slug.get(path.rsplit('/', 1)[-1][:-len('.json')])
+                    if problem:
+                        site.count('route')
+                        time.sleep(site.page_delay)
+                        return self.send_json(site.route_data(problem))
+                if path.startswith('/static/'):
+                    site.count('asset')
+                    content_type = 'font/woff2' if path.endswith('.woff2') else 'image/png'
+                    return self.send_body(site.asset, content_type)
+                if path.startswith('/problems/'):
+                    slug = path.split('/')[2]
+                    problem = site.by_slug.get(slug)
+                    if problem:
+                        site.count('problem')
+                        time.sleep(site.page_delay)
+                        return self.send_body(site.problem_page(problem), 'text/html')
+                self.send_body('Not found', 'text/plain', 404)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length)
+                if urlparse(self.path).path == '/graphql/':
+                    site.count('graphql')
+                    if self.send_failure('graphql'):
+                        return
+                    try:
+                        slug = json.loads(body)['variables']['titleSlug']
+                    except (ValueError, KeyError, TypeError):
+                        return self.send_json({'errors': ['bad request']}, 400)
+                    return self.send_json(site.question(slug))
+                self.send_body('Not found', 'text/plain', 404)
+
+        return Handler
+
+    def start(self):
+        self.thread = threading.Thread(target=self.server.serve_forever, name="fake-leetcode")
+        self.thread.daemon = True
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.requests)
@@ -0,0 +1,105 @@
+# Compares generator backends on the same prompts with greedy decoding:
+#
+#     python -m benchmark.parity --backends pipeline,int8,onnx --threads 4 --output parity.json
+#
+# The first backend is the reference; the others report how often their solution matches it
+# exactly, a similarity ratio, and their load time, latency and memory.
+from backends import create_backend
+from generation import build_prompt, extract_solution, generate_streaming
+from model_registry import DEFAULT_MODEL
+from utils import get_rss_bytes, to_mb
+import argparse
+import difflib
+import gc
+import json
+import time
+
+PROBLEMS = [
+    ("Two Sum", "Given an array of integers nums and an integer target, return indices of the two numbers such that they add up to target."),
+    ("Valid Parentheses", "Given a string s containing just the characters '(', ')', '{', '}', '[' and ']', determine if the input string is valid."),
+    ("Maximum Subarray", "Given an integer array nums, find the subarray with the largest sum, and return its sum."),
+    ("Climbing Stairs", "You are climbing a staircase. It takes n steps to reach the top. Each time you can either climb 1 or 2 steps. In how many distinct ways can you climb to the top?"),
+    ("Reverse String", "Write a function that reverses a string. The input string is given as an array of characters s."),
+    ("Single Number", "Given a non-empty array of integers nums, every element appears twice except for one. Find that single one.")
+]
+
+
+def run_backend(name, model_name, problems, threads=None, export_dir=None):
+    backend = create_backend(name, threads=threads, export_dir=export_dir)
+    gc.collect()
+    rss_before = get_rss_bytes()
+    start = time.perf_counter()
+    generator = backend.load(model_name)
+    load_time = time.perf_counter() - start
+    rss_after = get_rss_bytes()
+
+    # One untimed call so lazy initialisation doesn't land on the first prompt
+    generate_streaming(generator, build_prompt(*problems[0]), do_sample=False, max_new_tokens=8)
+
+    outputs = []
+    for title, description in problems:
+        text, stats = generate_streaming(generator, build_prompt(title, description), do_sample=False)
+        outputs.append({'title': title, 'solution': extract_solution(text), 'stats': stats})
+
+    del generator
+    gc.collect()
+    seconds = [o['stats']['seconds'] for o in outputs]
+    tokens = sum(o['stats']['new_tokens'] for o in outputs)
+    return {
+        **backend.describe(),
+        'load_seconds': round(load_time, 2),
+        'model_rss_mb': to_mb(rss_after - rss_before) if rss_before and rss_after else None,
+        'mean_seconds': round(sum(seconds) / len(seconds), 3),
+        'mean_ttft': round(sum(o['stats']['ttft'] or 0 for o in outputs) / len(outputs), 3),
+        'tokens_per_sec': round(tokens / sum(seconds), 1) if sum(seconds) > 0 else None,
+        'outputs': outputs
+    }
+
+
+def compare(reference, candidate):
+    pairs = list(zip(reference['outputs'], candidate['outputs']))
+    ratios = [difflib.SequenceMatcher(None, a['solution'], b['solution']).ratio() for a, b in pairs]
+    return {
+        'exact_match': round(sum(1 for a, b in pairs if a['solution'] == b['solution']) / len(pairs), 3),
+        'mean_similarity': round(sum(ratios) / len(ratios), 3),
+        'min_similarity': round(min(ratios), 3),
+        'speedup': round(reference['mean_seconds'] / candidate['mean_seconds'], 2) if candidate['mean_seconds'] else None
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check generator backends against each other")
+    parser.add_argument('--backends', default='pipeline,int8', help="comma-separated; the first is the reference")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    parser.add_argument('--threads', type=int, default=None)
+    parser.add_argument('--prompts', type=int, default=len(PROBLEMS))
+    parser.add_argument('--export-dir', default=None)
+    parser.add_argument('--output', default=None)
+    parser.add_argument('--show-outputs', action='store_true')
+    args = parser.parse_args(argv)
+
+    problems = PROBLEMS[:args.prompts]
+    results = {}
+    for name in [b.strip() for b in args.backends.split(',') if b.strip()]:
+        print(f"Running {name} backend...")
+        results[name] = run_backend(name, args.model, problems, threads=args.threads, export_dir=args.export_dir)
+
+    names = list(results)
+    report = {'model': args.model, 'prompts': len(problems), 'reference': names[0], 'backends': {}}
+    for name in names:
+        entry = {k: v for k, v in results[name].items() if k != 'outputs'}
+        if name != names[0]:
+            entry['parity'] = compare(results[names[0]], results[name])
+        if args.show_outputs:
+            entry['outputs'] = results[name]['outputs']
+        report['backends'][name] = entry
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
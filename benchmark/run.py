@@ -0,0 +1,254 @@
+# Drives real Chrome sessions through the bot against a local fake LeetCode site, with a
+# stub generator in place of CodeGen, and prints a JSON report:
+#
+#     python -m benchmark.run --iterations 20 --workers 2 --pipelined --output before.json
+from benchmark.fake_site import FakeLeetCode
+from benchmark.stub_generator import StubGenerator
+from catalog import ProblemCatalog
+from driver_pool import DriverPool
+from lean import LeanProfile
+from fetcher import LeetCodeFetcher
+from metrics import TraceLog, metrics
+from model import LeetCodeBot
+from prompt_compiler import PromptCompiler
+from rate_limit import DEFAULT_LIMITS, RateScheduler, parse_limits
+from scheduler import BotScheduler
+from solution_cache import SolutionCache
+from utils import get_process_tree_rss_bytes, to_mb
+from validation import PreSubmitValidator
+import argparse
+import json
+import os
+import platform
+import tempfile
+import threading
+import time
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values):
+    return {
+        'count': len(values),
+        'mean': round(sum(values) / len(values), 4) if values else None,
+        'p50': round(percentile(values, 0.5), 4) if values else None,
+        'p90': round(percentile(values, 0.9), 4) if values else None,
+        'p99': round(percentile(values, 0.99), 4) if values else None,
+        'max': round(max(values), 4) if values else None
+    }
+
+
+class RssSampler:
+    # The bot's memory lives mostly in Chrome and chromedriver, so sample the whole process tree
+    def __init__(self, interval=0.25):
+        self.interval = interval
+        self.peak = 0
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="rss-sampler")
+        self.thread.daemon = True
+
+    def sample(self):
+        try:
+            self.peak = max(self.peak, get_process_tree_rss_bytes(os.getpid()) or 0)
+        except Exception as e:
+            print(f"Error sampling RSS: {str(e)}")
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def start(self):
+        self.sample()
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.stopped.set()
+        self.thread.join()
+        self.sample()
+        return self.peak
+
+
+def read_traces(path):
+    if not os.path.exists(path):
+        return []
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def build_report(args, traces, elapsed, peak_rss, site, generator, bot):
+    phases = {}
+    outcomes = {}
+    page_ready = {}
+    for trace in traces:
+        outcomes[trace.get('outcome')] = outcomes.get(trace.get('outcome'), 0) + 1
+        if 'page_ready' in trace:
+            page_ready.setdefault(trace.get('navigation_mode'), []).append(trace['page_ready'])
+        for phase, seconds in trace.get('phases', {}).items():
+            phases.setdefault(phase, []).append(seconds)
+
+    solved = bot.get_status()['solved_total']
+    report = {
+        'label': args.label,
+        'config': {
+            'iterations': args.iterations,
+            'workers': args.workers,
+            'pipelined': args.pipelined,
+            'catalog': not args.no_catalog,
+            'validate': args.validate,
+            'lean': args.lean,
+            'tabs': args.tabs,
+            'raw_prompts': args.raw_prompts,
+            'site_problems': args.problems,
+            'page_delay': args.page_delay,
+            'editor_delay': args.editor_delay,
+            'judge_delay': args.judge_delay,
+            'token_delay': args.token_delay,
+            'accept_rate': args.accept_rate,
+            'rate_limits': args.rate_limits
+        },
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform()
+        },
+        'wall_seconds': round(elapsed, 3),
+        'attempts': len(traces),
+        'solved': solved,
+        'outcomes': outcomes,
+        'iterations_per_minute': round(len(traces) / elapsed * 60, 2) if elapsed > 0 else None,
+        'solved_per_minute': round(solved / elapsed * 60, 2) if elapsed > 0 else None,
+        'iteration_seconds': summarize([t['total_seconds'] for t in traces if 'total_seconds' in t]),
+        'phases': {phase: summarize(values) for phase, values in sorted(phases.items())},
+        # Navigation through language selection, overall and by how each page was reached
+        'page_ready': summarize([seconds for values in page_ready.values() for seconds in values]),
+        'page_ready_by_mode': {mode: summarize(values) for mode, values in sorted(page_ready.items())},
+        'peak_rss_mb': to_mb(peak_rss),
+        'site_requests': site.stats(),
+        'generator': generator.stats()
+    }
+    if isinstance(bot, LeetCodeBot):
+        report['waits'] = bot.waits.summary()
+    return report
+
+
+def run(args):
+    site = FakeLeetCode(
+        problems=args.problems,
+        page_delay=args.page_delay,
+        editor_delay=args.editor_delay,
+        judge_delay=args.judge_delay,
+        accept_rate=args.accept_rate
+    ).start()
+    workdir = tempfile.mkdtemp(prefix="leetcode-bench-")
+    trace_path = os.path.join(workdir, 'traces.jsonl')
+    metrics.trace_log = TraceLog(trace_path)
+
+    # The fake site never throttles, so actions are unlimited unless --rate-limits says otherwise
+    limits = {action: (60000, 1000) for action in DEFAULT_LIMITS}
+    limits.update(parse_limits(args.rate_limits))
+    rate = RateScheduler(limits=limits)
+    fetcher = LeetCodeFetcher(base_url=site.url, rate=rate)
+    catalog = None if args.no_catalog else ProblemCatalog(
+        path=os.path.join(workdir, 'problems.db'), fetcher=fetcher
+    )
+    solution_cache = SolutionCache(path=os.path.join(workdir, 'solutions.db'))
+    validator = PreSubmitValidator() if args.validate else None
+    generator = StubGenerator(token_delay=args.token_delay)
+    prompts = PromptCompiler(compact=not args.raw_prompts)
+    driver_pool = DriverPool(size=args.workers, lean=LeanProfile() if args.lean else None, base_url=site.url)
+
+    def create_bot(claims=None, batcher=None, events=None):
+        new_bot = LeetCodeBot(
+            driver_pool=driver_pool,
+            catalog=catalog,
+            fetcher=fetcher,
+            solution_cache=solution_cache,
+            validator=validator,
+            claims=claims,
+            batcher=batcher,
+            events=events,
+            generator=generator,
+            rate=rate,
+            tabs=args.tabs,
+            prompts=prompts
+        )
+        return new_bot
+
+    if args.warm:
+        driver_pool.warm(background=False)
+
+    if args.workers > 1:
+        bot = BotScheduler(args.workers, create_bot, generator=generator)
+    else:
+        bot = create_bot()
+    bot.set_problem_count(args.iterations)
+    bot.set_pipelined(args.pipelined)
+    if isinstance(bot, LeetCodeBot):
+        # Leased before the clock starts, as it was when bots launched Chrome on construction
+        bot.prepare()
+
+    sampler = RssSampler().start()
+    start = time.perf_counter()
+    try:
+        bot.running = True
+        bot.start_solving()
+    finally:
+        elapsed = time.perf_counter() - start
+        peak_rss = sampler.stop()
+        bot.stop()
+        driver_pool.shutdown()
+        site.stop()
+        if validator:
+            validator.shutdown()
+
+    report = build_report(args, read_traces(trace_path), elapsed, peak_rss, site, generator, bot)
+    report['rate'] = rate.stats()
+    report['prompts'] = prompts.stats()
+    if driver_pool.lean:
+        report['lean'] = driver_pool.lean.stats()
+    return report
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end benchmark against a fake LeetCode site")
+    parser.add_argument('--iterations', type=int, default=10, help="problems to solve")
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--pipelined', action='store_true')
+    parser.add_argument('--no-catalog', action='store_true', help="scrape the problemset page instead")
+    parser.add_argument('--validate', action='store_true', help="run the pre-submit example check")
+    parser.add_argument('--lean', action='store_true', help="block images, fonts, media and trackers")
+    parser.add_argument('--raw-prompts', action='store_true', help="skip prompt compaction")
+    parser.add_argument('--tabs', type=int, default=0, help="tab session: 1 routes in-app, 2+ also preloads")
+    parser.add_argument('--warm', action='store_true', help="launch Chrome before the clock starts")
+    parser.add_argument('--problems', type=int, default=50, help="size of the fake problemset")
+    parser.add_argument('--page-delay', type=float, default=0.05)
+    parser.add_argument('--editor-delay', type=float, default=0.2)
+    parser.add_argument('--judge-delay', type=float, default=0.5)
+    parser.add_argument('--token-delay', type=float, default=0.002)
+    parser.add_argument('--accept-rate', type=float, default=0.8)
+    parser.add_argument('--rate-limits', default=None, help="e.g. navigation=20:2,submission=12:1 (per minute:burst)")
+    parser.add_argument('--label', default=None, help="name stored in the report")
+    parser.add_argument('--output', default=None, help="also write the JSON report here")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    report = run(args)
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+
+
+if __name__ == '__main__':
+    main()
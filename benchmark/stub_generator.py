@@ -0,0 +1,183 @@
+from generation import header_indent
+import queue
+import re
+import time
+
+# Solves every fake problem (sum of an integer array) and passes local validation
+SOLUTION_BODY = "(nums):\n{indent}    total = 0\n{indent}    for value in nums:\n{indent}        total += value\n{indent}    return total\n"
+# For prompts that already end on the starter's full signature
+METHOD_BODY = "{indent}    total = 0\n{indent}    for value in nums:\n{indent}        total += value\n{indent}    return total\n"
+# Like a real model, the stub keeps going past the function; the stopping criteria cut it off
+TRAILER = "\nif __name__ == '__main__':\n    print(Solution().sumArray([1, 2, 3]))\n"
+
+
+class TokenIds(list):
+    # Just enough of a tensor for generation and the stopping criteria: the shape, [:, start:]
+    # slicing and row comparison. It keeps the prompt text so the stub model can answer it
+    text = ''
+
+    @property
+    def shape(self):
+        return (len(self), len(self[0]) if self else 0)
+
+    def __getitem__(self, key):
+        if isinstance(key, tuple):
+            rows, columns = key
+            return TokenIds(TokenRow(row[columns]) for row in list.__getitem__(self, rows))
+        return list.__getitem__(self, key)
+
+
+class TokenRow(list):
+    __hash__ = None
+
+    def __eq__(self, other):
+        # Element-wise, like a tensor row
+        return Flags(value == other for value in self)
+
+
+class Flags(list):
+    def any(self):
+        return any(self)
+
+
+class StubTokenizer:
+    eos_token = '<|endoftext|>'
+    eos_token_id = 0
+    # Generated chunks get ids from here on, apart from the prompt's positional ones
+    first_chunk_id = 1000000
+
+    def __init__(self):
+        self.pad_token = None
+        self.padding_side = 'right'
+        self.chunks = {}
+        self.ids = {}
+
+    def encode(self, text):
+        return list(range(1, len(re.findall(r'\S+', text)) + 1))
+
+    def __call__(self, text, return_tensors=None, **kwargs):
+        ids = self.encode(text)
+        if not return_tensors:
+            return {'input_ids': ids}
+        tensor = TokenIds([TokenRow(ids)])
+        tensor.text = text
+        return {'input_ids': tensor}
+
+    def chunk_id(self, chunk):
+        if chunk not in self.ids:
+            self.ids[chunk] = self.first_chunk_id + len(self.ids)
+            self.chunks[self.ids[chunk]] = chunk
+        return self.ids[chunk]
+
+    def batch_decode(self, rows, skip_special_tokens=True):
+        return [''.join(self.chunks.get(i, '') for i in row) for row in rows]
+
+
+class StubStreamer:
+    # Stands in for transformers.TextIteratorStreamer: chunks reach the consuming thread
+    # through a queue until the end of the stream
+    def __init__(self, tokenizer, skip_prompt=True, **kwargs):
+        self.queue = queue.Queue()
+
+    def on_finalized_text(self, text, stream_end=False):
+        if text:
+            self.queue.put(text)
+        if stream_end:
+            self.queue.put(None)
+
+    def end(self):
+        self.on_finalized_text('', stream_end=True)
+
+    def __iter__(self):
+        while True:
+            chunk = self.queue.get()
+            if chunk is None:
+                return
+            yield chunk
+
+
+class StubTransformers:
+    # The parts of transformers that generation uses beside the model, so the benchmark never imports it
+    TextIteratorStreamer = StubStreamer
+    StoppingCriteriaList = list
+
+
+def chunks_of(continuation):
+    # One "token" per word with its leading whitespace, then any trailing whitespace
+    chunks = re.findall(r'\s*\S+', continuation)
+    tail = continuation[len(continuation.rstrip()):]
+    return chunks + [tail] if tail else chunks
+
+
+class StubModel:
+    def __init__(self, generator):
+        self.generator = generator
+
+    def generate(self, input_ids=None, streamer=None, stopping_criteria=None, max_new_tokens=256, **kwargs):
+        continuation = self.generator.continuation(getattr(input_ids, 'text', None))
+        chunks = chunks_of(continuation)[:max_new_tokens]
+        self.generator.decode([TokenRow(input_ids[0])], [chunks], stopping_criteria, streamer)
+        if streamer:
+            streamer.end()
+
+
+class StubGenerator:
+    # Deterministic stand-in for the transformers pipeline: the same solution for every prompt
+    # after a fixed per-token delay, so runs measure the browser and scheduling, not the model
+
+    def __init__(self, token_delay=0.002, first_token_delay=0.02, indent=12):
+        self.token_delay = token_delay
+        self.first_token_delay = first_token_delay
+        self.indent = indent
+        self.tokenizer = StubTokenizer()
+        self.model = StubModel(self)
+        self.transformers = StubTransformers
+        self.calls = 0
+        self.prompts = 0
+
+    def continuation(self, prompt=None):
+        self.calls += 1
+        self.prompts += 1
+        return self.body(prompt)
+
+    def body(self, prompt):
+        if prompt and prompt.endswith(':\n'):
+            return METHOD_BODY.format(indent=' ' * header_indent(prompt)) + TRAILER
+        return SOLUTION_BODY.format(indent=' ' * self.indent) + TRAILER
+
+    def decode(self, rows, chunks, stopping_criteria=None, streamer=None):
+        # One step per token for every row at once, calling the stopping criteria after each
+        # like the real decoding loop; finished rows are padded with end-of-text
+        time.sleep(self.first_token_delay)
+        ids = TokenIds(rows)
+        emitted = [[] for _ in rows]
+        for step in range(max((len(row) for row in chunks), default=0)):
+            time.sleep(self.token_delay)
+            for row, row_chunks in enumerate(chunks):
+                if step < len(row_chunks):
+                    ids[row].append(self.tokenizer.chunk_id(row_chunks[step]))
+                    emitted[row].append(row_chunks[step])
+                    if streamer:
+                        streamer.on_finalized_text(row_chunks[step])
+                else:
+                    ids[row].append(self.tokenizer.eos_token_id)
+            if any(criterion(ids, None) for criterion in stopping_criteria or []):
+                break
+        return [''.join(row) for row in emitted]
+
+    def __call__(self, prompts, batch_size=None, stopping_criteria=None, max_new_tokens=256, **kwargs):
+        if isinstance(prompts, str):
+            prompts = [prompts]
+        encoded = [self.tokenizer.encode(prompt) for prompt in prompts]
+        # Left-padded like the real batch, so every row's continuation starts at the same column
+        width = max(len(ids) for ids in encoded)
+        rows = [TokenRow([self.tokenizer.eos_token_id] * (width - len(ids)) + ids) for ids in encoded]
+        chunks = [chunks_of(self.body(prompt))[:max_new_tokens] for prompt in prompts]
+        # One forward pass per token for the whole batch
+        continuations = self.decode(rows, chunks, stopping_criteria)
+        self.calls += 1
+        self.prompts += len(prompts)
+        return [[{'generated_text': prompt + continuation}] for prompt, continuation in zip(prompts, continuations)]
+
+    def stats(self):
+        return {'calls': self.calls, 'prompts': self.prompts}
@@ -0,0 +1,220 @@
+from fetcher import get_fetcher
+import random
+import sqlite3
+import threading
+import time
+
+
+class ProblemCatalog:
+    def __init__(self, path="problems.db", ttl=24 * 3600, loader=None, fetcher=None):
+        self.path = path
+        self.ttl = ttl
+        self.fetcher = fetcher or get_fetcher()
+        self.loader = loader or self.fetcher.fetch_problem_list
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS problems (
+                slug TEXT PRIMARY KEY,
+                title TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                paid_only INTEGER NOT NULL DEFAULT 0,
+                last_seen REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS attempts (
+                slug TEXT PRIMARY KEY,
+                attempted_at REAL NOT NULL
+            );
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        """)
+        self.conn.commit()
+        # difficulty -> list of selectable slugs, plus each slug's position for O(1) removal
+        self.pools = {}
+        self.positions = {}
+        self.problems = {}
+        self._build_index()
+
+    def _build_index(self):
+        with self.lock:
+            self.pools = {}
+            self.positions = {}
+            self.problems = {}
+            attempted = {row[0] for row in self.conn.execute("SELECT slug FROM attempts")}
+            rows = self.conn.execute("SELECT slug, title, difficulty, paid_only FROM problems")
+            for slug, title, difficulty, paid_only in rows:
+                self.problems[slug] = {'slug': slug, 'title': title, 'difficulty': difficulty, 'paid_only': bool(paid_only)}
+                if not paid_only and slug not in attempted:
+                    self._add(slug, difficulty)
+
+    def _add(self, slug, difficulty):
+        if slug in self.positions:
+            return
+        pool = self.pools.setdefault(difficulty, [])
+        self.positions[slug] = (difficulty, len(pool))
+        pool.append(slug)
+
+    def _remove(self, slug):
+        entry = self.positions.pop(slug, None)
+        if entry is None:
+            return
+        difficulty, index = entry
+        pool = self.pools[difficulty]
+        last = pool.pop()
+        if last != slug:
+            pool[index] = last
+            self.positions[last] = (difficulty, index)
+
+    def last_refresh(self):
+        with self.lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'last_refresh'").fetchone()
+        return float(row[0]) if row else 0.0
+
+    def is_stale(self):
+        return not self.problems or time.time() - self.last_refresh() > self.ttl
+
+    def refresh(self, problems=None):
+        if problems is None:
+            problems = self.loader()
+        now = time.time()
+        with self.lock:
+            self.conn.executemany("""
+                INSERT INTO problems (slug, title, difficulty, paid_only, last_seen)
+                VALUES (:slug, :title, :difficulty, :paid_only, :last_seen)
+                ON CONFLICT(slug) DO UPDATE SET
+                    title = excluded.title,
+                    difficulty = excluded.difficulty,
+                    paid_only = excluded.paid_only,
+                    last_seen = excluded.last_seen
+            """, [
+                {
+                    'slug': p['slug'],
+                    'title': p['title'],
+                    'difficulty': p.get('difficulty') or 'MEDIUM',
+                    'paid_only': int(bool(p.get('paid_only'))),
+                    'last_seen': now
+                }
+                for p in problems
+            ])
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('last_refresh', ?)", (str(now),)
+            )
+            self.conn.commit()
+            self._build_index()
+        print(f"✅ Problem catalog refreshed ({len(problems)} problems, {len(self.positions)} available)")
+        return len(problems)
+
+    def refresh_if_stale(self):
+        if not self.is_stale():
+            return False
+        try:
+            self.refresh()
+            return True
+        except Exception as e:
+            print(f"Error refreshing problem catalog: {str(e)}")
+            return False
+
+    def add_problems(self, problems):
+        # Merge rows seen elsewhere (e.g. a scraped page) without marking a full refresh
+        now = time.time()
+        with self.lock:
+            for p in problems:
+                self.conn.execute("""
+                    INSERT INTO problems (slug, title, difficulty, paid_only, last_seen)
+                    VALUES (?, ?, ?, 0, ?)
+                    ON CONFLICT(slug) DO UPDATE SET last_seen = excluded.last_seen
+                """, (p['slug'], p['title'], p.get('difficulty') or 'MEDIUM', now))
+            self.conn.commit()
+            self._build_index()
+
+    def pick(self, difficulty=None, claim=True):
+        with self.lock:
+            if difficulty:
+                pool = self.pools.get(difficulty.upper(), [])
+                if not pool:
+                    return None
+            else:
+                # Weight each difficulty by its size so every problem is equally likely
+                total = sum(len(pool) for pool in self.pools.values())
+                if not total:
+                    return None
+                target = random.randrange(total)
+                for pool in self.pools.values():
+                    if target < len(pool):
+                        break
+                    target -= len(pool)
+
+            slug = random.choice(pool)
+            if claim:
+                self.mark_attempted(slug)
+            return self.to_problem(slug)
+
+    def mark_attempted(self, slug):
+        with self.lock:
+            self._remove(slug)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO attempts (slug, attempted_at) VALUES (?, ?)", (slug, time.time())
+            )
+            self.conn.commit()
+
+    def release(self, slug):
+        # Undo a claim for a problem that was picked but never actually attempted
+        with self.lock:
+            self.conn.execute("DELETE FROM attempts WHERE slug = ?", (slug,))
+            self.conn.commit()
+            info = self.problems.get(slug)
+            if info and not info['paid_only']:
+                self._add(slug, info['difficulty'])
+
+    def reset_attempts(self):
+        with self.lock:
+            self.conn.execute("DELETE FROM attempts")
+            self.conn.commit()
+            self._build_index()
+
+    def to_problem(self, slug):
+        info = self.problems[slug]
+        return {
+            'title': info['title'],
+            'url': self.fetcher.problem_url(slug),
+            'difficulty': info['difficulty'],
+            'slug': slug
+        }
+
+    def stats(self):
+        with self.lock:
+            return {
+                'problems': len(self.problems),
+                'available': {difficulty: len(pool) for difficulty, pool in self.pools.items()},
+                'last_refresh': self.last_refresh() or None
+            }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+
+class ProblemClaims:
+    # Shared between concurrent workers so no two of them take the same problem
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.slugs = set()
+
+    def claim(self, slug):
+        with self.lock:
+            if slug in self.slugs:
+                return False
+            self.slugs.add(slug)
+            return True
+
+    def release(self, slug):
+        with self.lock:
+            self.slugs.discard(slug)
+
+    def __contains__(self, slug):
+        with self.lock:
+            return slug in self.slugs
@@ -0,0 +1,310 @@
+from fetcher import DEFAULT_BASE_URL
+from lazy import lazy_import
+from lean import lean_from_env
+from urllib.parse import urlparse
+from utils import get_process_tree_rss_bytes, to_mb
+import os
+import threading
+import time
+
+_chromedriver_lock = threading.Lock()
+_chromedriver_ready = False
+
+
+def ensure_chromedriver():
+    # The install/version check hits the network and disk, so do it once per process
+    global _chromedriver_ready
+    if _chromedriver_ready:
+        return
+    with _chromedriver_lock:
+        if not _chromedriver_ready:
+            lazy_import('chromedriver_autoinstaller').install()
+            _chromedriver_ready = True
+
+
+def build_chrome_options(lean=None):
+    chrome_options = lazy_import('selenium.webdriver.chrome.options').Options()
+    chrome_options.add_argument("--no-sandbox")
+    chrome_options.add_argument("--disable-dev-shm-usage")
+    chrome_options.add_argument("--disable-gpu")
+    chrome_options.add_argument("--window-size=1920,1080")
+    chrome_options.add_argument("--start-maximized")
+    chrome_options.add_argument("--headless=new")
+    chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+    chrome_options.add_argument("--disable-extensions")
+    # A tab loading the next problem in the background shouldn't have its timers throttled
+    chrome_options.add_argument("--disable-background-timer-throttling")
+    chrome_options.add_argument("--disable-renderer-backgrounding")
+    chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+    chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+    if lean:
+        lean.configure_options(chrome_options)
+    return chrome_options
+
+
+def create_driver(lean=None):
+    ensure_chromedriver()
+    driver = lazy_import('selenium.webdriver').Chrome(options=build_chrome_options(lean))
+    driver.set_page_load_timeout(30)
+    # Explicit waits poll page-readiness conditions; an implicit wait would stall each poll
+    driver.implicitly_wait(0)
+    driver.set_window_size(1920, 1080)
+    if lean:
+        lean.apply(driver)
+    return driver
+
+
+def get_driver_memory_bytes(driver):
+    try:
+        pid = driver.service.process.pid
+    except Exception:
+        return None
+    return get_process_tree_rss_bytes(pid)
+
+
+def url_origin(url):
+    parsed = urlparse(url or '')
+    if parsed.scheme not in ('http', 'https') or not parsed.netloc:
+        return None
+    return f"{parsed.scheme}://{parsed.netloc}"
+
+
+class DriverPool:
+    def __init__(self, size=1, max_uses=25, max_memory_mb=1024, lease_timeout=120, lean=None, base_url=None):
+        self.size = max(1, size)
+        self.lean = lean
+        # Storage is cleared per origin: this one plus whatever the session's tabs were on
+        self.base_url = (base_url or os.environ.get('LEETCODE_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.max_uses = max_uses
+        self.max_memory_mb = max_memory_mb
+        self.lease_timeout = lease_timeout
+        self.condition = threading.Condition()
+        self.idle = []
+        self.sessions = {}
+        self.closed = False
+        self.created = 0
+        self.recycled = 0
+        self.reused = 0
+
+    def _reserve(self):
+        # Called with the condition held; claims a slot before launching outside the lock
+        placeholder = object()
+        self.sessions[id(placeholder)] = {'driver': None, 'uses': 0}
+        return placeholder
+
+    def _launch(self, placeholder):
+        start = time.perf_counter()
+        try:
+            driver = create_driver(lean=self.lean)
+        except Exception:
+            with self.condition:
+                self.sessions.pop(id(placeholder), None)
+                self.condition.notify_all()
+            raise
+
+        with self.condition:
+            self.sessions.pop(id(placeholder), None)
+            self.sessions[id(driver)] = {
+                'driver': driver,
+                'uses': 0,
+                'created_at': time.time(),
+                'startup_time': time.perf_counter() - start
+            }
+            self.created += 1
+        print(f"✅ WebDriver started successfully ({self.created} launched, pool size {self.size})")
+        return driver
+
+    def warm(self, background=True):
+        def fill():
+            while True:
+                with self.condition:
+                    if self.closed or len(self.sessions) >= self.size:
+                        return
+                    placeholder = self._reserve()
+                try:
+                    driver = self._launch(placeholder)
+                except Exception as e:
+                    print(f"Error pre-launching WebDriver: {str(e)}")
+                    return
+                with self.condition:
+                    self.idle.append(driver)
+                    self.condition.notify()
+
+        if not background:
+            fill()
+            return None
+        thread = threading.Thread(target=fill, name="driver-pool-warmup")
+        thread.daemon = True
+        thread.start()
+        return thread
+
+    def ensure_capacity(self, size):
+        # Concurrent workers each need their own session
+        with self.condition:
+            if size > self.size:
+                self.size = size
+                self.condition.notify_all()
+
+    def lease(self, timeout=None):
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            driver = None
+            placeholder = None
+            with self.condition:
+                while not self.closed and not self.idle and len(self.sessions) >= self.size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise Exception("Timed out waiting for a free WebDriver session")
+                    self.condition.wait(remaining)
+                if self.closed:
+                    raise Exception("Driver pool is closed")
+
+                if self.idle:
+                    driver = self.idle.pop()
+                else:
+                    placeholder = self._reserve()
+
+            if placeholder is not None:
+                return self._launch(placeholder)
+
+            if self.health_check(driver):
+                self.reused += 1
+                return driver
+
+            print("⚠️ Discarding unhealthy WebDriver session")
+            self._discard(driver)
+
+    def release(self, driver):
+        if driver is None:
+            return
+        with self.condition:
+            meta = self.sessions.get(id(driver))
+            if meta is not None:
+                meta['uses'] += 1
+                uses = meta['uses']
+        if meta is None:
+            self._quit(driver)
+            return
+
+        reason = self._recycle_reason(driver, uses)
+        if reason is None and not self.reset(driver):
+            reason = "reset failed"
+
+        if reason:
+            print(f"♻️ Recycling WebDriver session: {reason}")
+            self.recycled += 1
+            self._discard(driver)
+            return
+
+        with self.condition:
+            if self.closed:
+                self.sessions.pop(id(driver), None)
+                self._quit(driver)
+                return
+            self.idle.append(driver)
+            self.condition.notify()
+
+    def _recycle_reason(self, driver, uses):
+        if self.max_uses and uses >= self.max_uses:
+            return f"reached {uses} uses"
+        if self.max_memory_mb:
+            memory = to_mb(get_driver_memory_bytes(driver))
+            if memory is not None and memory > self.max_memory_mb:
+                return f"using {memory} MB"
+        return None
+
+    def reset(self, driver):
+        try:
+            # Close every tab but the first one, noting the origins they were on
+            origins = {self.base_url}
+            handles = driver.window_handles
+            for handle in handles[1:]:
+                driver.switch_to.window(handle)
+                origins.add(url_origin(driver.current_url))
+                driver.close()
+            driver.switch_to.window(handles[0])
+            origins.add(url_origin(driver.current_url))
+
+            try:
+                driver.execute_script("window.localStorage.clear(); window.sessionStorage.clear();")
+            except Exception:
+                pass
+            driver.delete_all_cookies()
+            try:
+                # Every domain's cookies, not just the current page's
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception as e:
+                print(f"Error clearing browser cookies: {str(e)}")
+            for origin in sorted(o for o in origins if o):
+                try:
+                    driver.execute_cdp_cmd("Storage.clearDataForOrigin", {
+                        'origin': origin,
+                        'storageTypes': 'local_storage,session_storage,indexeddb,cache_storage,service_workers'
+                    })
+                except Exception as e:
+                    print(f"Error clearing storage for {origin}: {str(e)}")
+            driver.get("about:blank")
+            if self.lean:
+                # Drop the old run's network log so the next page is counted on its own
+                self.lean.network_events(driver)
+            return True
+        except Exception as e:
+            print(f"Error resetting WebDriver session: {str(e)}")
+            return False
+
+    def health_check(self, driver):
+        try:
+            return driver.execute_script("return 1;") == 1 and bool(driver.window_handles)
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        with self.condition:
+            self.sessions.pop(id(driver), None)
+            if driver in self.idle:
+                self.idle.remove(driver)
+            self.condition.notify_all()
+        self._quit(driver)
+
+    def _quit(self, driver):
+        try:
+            driver.quit()
+        except:
+            pass
+
+    def shutdown(self):
+        with self.condition:
+            self.closed = True
+            drivers = list(self.idle)
+            self.idle = []
+            for driver in drivers:
+                self.sessions.pop(id(driver), None)
+            self.condition.notify_all()
+        for driver in drivers:
+            self._quit(driver)
+
+    def stats(self):
+        with self.condition:
+            sessions = [meta for meta in self.sessions.values() if meta['driver'] is not None]
+            return {
+                'size': self.size,
+                'open': len(sessions),
+                'idle': len(self.idle),
+                'leased': len(sessions) - len(self.idle),
+                'created': self.created,
+                'reused': self.reused,
+                'recycled': self.recycled,
+                'uses': [meta['uses'] for meta in sessions],
+                'lean': self.lean.stats() if self.lean else None
+            }
+
+
+def pool_from_env():
+    return DriverPool(
+        size=int(os.environ.get('DRIVER_POOL_SIZE', 1)),
+        max_uses=int(os.environ.get('DRIVER_MAX_USES', 25)),
+        max_memory_mb=int(os.environ.get('DRIVER_MAX_MEMORY_MB', 1024)),
+        lean=lean_from_env()
+    )
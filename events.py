@@ -0,0 +1,62 @@
+from collections import deque
+import json
+import threading
+import uuid
+
+SUMMARY_FIELDS = ('title', 'url', 'difficulty', 'slug', 'solution', 'runtime_ms', 'memory_mb')
+
+
+def problem_summary(problem):
+    # Scraped descriptions and starter code stay server-side
+    if not problem:
+        return None
+    return {key: problem[key] for key in SUMMARY_FIELDS if key in problem}
+
+
+class EventLog:
+    def __init__(self, max_events=1000):
+        self.run_id = uuid.uuid4().hex[:12]
+        self.condition = threading.Condition()
+        self.events = deque(maxlen=max_events)
+        self.seq = 0
+
+    def emit(self, event_type, data):
+        with self.condition:
+            self.seq += 1
+            self.events.append((self.seq, event_type, data))
+            self.condition.notify_all()
+            return self.seq
+
+    def cursor(self, seq=None):
+        return f"{self.run_id}:{self.seq if seq is None else seq}"
+
+    def parse_cursor(self, cursor):
+        # Cursors from another run (or garbage) mean the client needs a fresh snapshot
+        try:
+            run_id, seq = cursor.split(':', 1)
+            seq = int(seq)
+        except (AttributeError, ValueError):
+            return None
+        if run_id != self.run_id or seq > self.seq:
+            return None
+        if self.events and seq < self.events[0][0] - 1:
+            return None
+        return seq
+
+    def since(self, seq):
+        with self.condition:
+            return [event for event in self.events if event[0] > seq]
+
+    def wait(self, seq, timeout=15):
+        with self.condition:
+            self.condition.wait_for(lambda: self.seq > seq, timeout=timeout)
+        return self.since(seq)
+
+
+def format_sse(event_type, data, event_id=None):
+    lines = []
+    if event_id:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event_type}")
+    lines.append(f"data: {json.dumps(data)}")
+    return "\n".join(lines) + "\n\n"
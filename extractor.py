@@ -0,0 +1,150 @@
+from lazy import lazy_import
+import importlib.util
+import re
+
+# Checked without importing it; bs4 and lxml are only loaded when a page is actually parsed
+PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
+
+# Containers that hold the problem statement, most specific first
+DESCRIPTION_CONTAINERS = [
+    ('data-track-load', 'description_content'),
+    ('class', 'description'),
+    ('role', 'tabpanel'),
+    ('data-cy', 'question-title'),
+    ('class', '_1l1MA')
+]
+
+EXAMPLE_HEADER = re.compile(r'^\s*Example\s*\d*\s*:\s*$', re.IGNORECASE)
+CONSTRAINTS_HEADER = re.compile(r'^\s*Constraints\s*:\s*$', re.IGNORECASE)
+FOLLOW_UP_HEADER = re.compile(r'^\s*Follow[- ]?up\s*:?', re.IGNORECASE)
+BLOCK_TAGS = ['p', 'pre', 'li', 'ul', 'ol', 'div', 'h1', 'h2', 'h3', 'h4', 'blockquote']
+FIELD_PATTERN = re.compile(r'(Input|Output|Explanation)\s*:\s*', re.IGNORECASE)
+
+# Returns only the description subtree's HTML: one querySelector per candidate, then a single
+# XPath lookup for an "Example" heading instead of measuring textContent of every div
+DESCRIPTION_HTML = """
+    const selectors = arguments[0];
+    for (const selector of selectors) {
+        const element = document.querySelector(selector);
+        if (element && element.textContent.trim()) {
+            return element.innerHTML;
+        }
+    }
+    const heading = document.evaluate(
+        "//*[self::strong or self::b or self::p][starts-with(normalize-space(.), 'Example')]",
+        document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null
+    ).singleNodeValue;
+    const container = heading && heading.closest('div');
+    return container ? container.innerHTML : null;
+"""
+
+
+def css_selectors():
+    selectors = []
+    for attr, value in DESCRIPTION_CONTAINERS:
+        if attr == 'class':
+            selectors.append(f'div[class*="{value}"]')
+        else:
+            selectors.append(f'div[{attr}="{value}"]')
+    return selectors
+
+
+def class_names(value):
+    if isinstance(value, (list, tuple)):
+        return ' '.join(value)
+    return value or ''
+
+
+def matches_container(attrs, attr, value):
+    if attr == 'class':
+        return value.lower() in class_names(attrs.get('class')).lower()
+    return attrs.get(attr) == value
+
+
+def is_description_container(name, attrs):
+    # Called by the parser for every top-level start tag; everything else is never built
+    if name != 'div' or not attrs:
+        return False
+    return any(matches_container(attrs, attr, value) for attr, value in DESCRIPTION_CONTAINERS)
+
+
+def find_container(html):
+    # Parse only the candidate containers' subtrees, then pick the most specific non-empty one
+    bs4 = lazy_import('bs4')
+    soup = bs4.BeautifulSoup(html, PARSER, parse_only=bs4.SoupStrainer(is_description_container))
+    for attr, value in DESCRIPTION_CONTAINERS:
+        for div in soup.find_all('div'):
+            if matches_container(div.attrs, attr, value) and div.get_text().strip():
+                return div
+    return None
+
+
+def container_text(container):
+    # Block elements become line breaks and inline markup stays on its line
+    for sup in container.find_all('sup'):
+        sup.replace_with(f"^{sup.get_text()}")
+    for br in container.find_all('br'):
+        br.replace_with("\n")
+    for tag in container.find_all(BLOCK_TAGS):
+        tag.append("\n")
+    lines = [re.sub(r'[ \t\xa0]+', ' ', line).strip() for line in container.get_text().split("\n")]
+    return "\n".join(line for line in lines if line)
+
+
+def parse_example(block):
+    fields = {}
+    parts = FIELD_PATTERN.split(block)
+    # split() alternates [before, name, value, name, value, ...]
+    for name, value in zip(parts[1::2], parts[2::2]):
+        fields[name.lower()] = value.strip()
+    return {
+        'input': fields.get('input', ''),
+        'output': fields.get('output', ''),
+        'explanation': fields.get('explanation')
+    }
+
+
+def split_sections(text):
+    statement, examples, constraints, follow_up = [], [], [], []
+    section = statement
+    for line in text.split("\n"):
+        if EXAMPLE_HEADER.match(line):
+            section = []
+            examples.append(section)
+        elif CONSTRAINTS_HEADER.match(line):
+            section = constraints
+        elif FOLLOW_UP_HEADER.match(line):
+            section = follow_up
+            section.append(line)
+        else:
+            section.append(line)
+    return {
+        'statement': "\n".join(statement).strip(),
+        'examples': [parse_example(" ".join(lines)) for lines in examples],
+        'constraints': constraints,
+        'follow_up': " ".join(follow_up).strip() or None
+    }
+
+
+def parts_from(container):
+    text = container_text(container)
+    if not text:
+        return None
+    parts = split_sections(text)
+    parts['text'] = text
+    return parts
+
+
+def description_parts(html):
+    # For HTML that is already just the description (GraphQL content, the in-page subtree)
+    if not html:
+        return None
+    return parts_from(lazy_import('bs4').BeautifulSoup(html, PARSER))
+
+
+def extract_description(page_source):
+    # Full page in, structured description out, without building the rest of the DOM
+    container = find_container(page_source)
+    if container is None:
+        return None
+    return parts_from(container)
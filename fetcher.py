@@ -0,0 +1,141 @@
+from extractor import description_parts
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import os
+import threading
+import requests
+
+DEFAULT_BASE_URL = "https://leetcode.com"
+DIFFICULTY_LEVELS = {1: 'EASY', 2: 'MEDIUM', 3: 'HARD'}
+
+QUESTION_QUERY = """
+query questionData($titleSlug: String!) {
+  question(titleSlug: $titleSlug) {
+    questionId
+    title
+    titleSlug
+    content
+    difficulty
+    isPaidOnly
+    exampleTestcases
+    codeSnippets {
+      lang
+      langSlug
+      code
+    }
+  }
+}
+"""
+
+
+class LeetCodeFetcher:
+    def __init__(self, base_url=None, pool_size=8, timeout=15, retries=3, rate=None):
+        self.base_url = (base_url or os.environ.get('LEETCODE_BASE_URL', DEFAULT_BASE_URL)).rstrip('/')
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.headers.update({
+            'User-Agent': "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+            'Referer': f"{self.base_url}/problemset/all/",
+            'Accept': 'application/json'
+        })
+        # Keep-alive connections are reused across every problem fetched by this process.
+        # 429 is not retried here: it goes back to the rate scheduler, which backs off every caller.
+        # urllib3 would otherwise retry any 429 carrying Retry-After, sleeping inside the request
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.5,
+            status_forcelist=[500, 502, 503, 504],
+            allowed_methods=['GET', 'POST'],
+            respect_retry_after_header=False
+        )
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.requests_made = 0
+        self.rate = rate
+
+    def request(self, method, path, **kwargs):
+        if self.rate and not self.rate.acquire('api'):
+            raise Exception("Request cancelled")
+        self.requests_made += 1
+        try:
+            response = self.session.request(method, f"{self.base_url}{path}", timeout=self.timeout, **kwargs)
+        except requests.exceptions.RequestException:
+            if self.rate:
+                self.rate.failed('api', 'request_error')
+            raise
+        if self.rate:
+            self.rate.record_status('api', response.status_code, response.headers.get('Retry-After'))
+        response.raise_for_status()
+        return response.json()
+
+    def get_json(self, path, **kwargs):
+        return self.request('GET', path, **kwargs)
+
+    def post_json(self, path, payload, **kwargs):
+        return self.request('POST', path, json=payload, **kwargs)
+
+    def problem_url(self, slug):
+        return f"{self.base_url}/problems/{slug}/"
+
+    def fetch_problem_list(self):
+        # One JSON request covers the whole problemset, not just the first rendered page
+        data = self.get_json("/api/problems/all/")
+        problems = []
+        for pair in data.get('stat_status_pairs', []):
+            stat = pair.get('stat', {})
+            slug = stat.get('question__title_slug')
+            if not slug:
+                continue
+            problems.append({
+                'slug': slug,
+                'title': stat.get('question__title', slug),
+                'difficulty': DIFFICULTY_LEVELS.get(pair.get('difficulty', {}).get('level'), 'MEDIUM'),
+                'paid_only': bool(pair.get('paid_only'))
+            })
+        return problems
+
+    def fetch_problem(self, slug, lang='python3'):
+        data = self.post_json("/graphql/", {
+            'operationName': 'questionData',
+            'variables': {'titleSlug': slug},
+            'query': QUESTION_QUERY
+        }, headers={'Referer': self.problem_url(slug)})
+
+        question = (data.get('data') or {}).get('question')
+        if not question:
+            raise Exception(f"Problem {slug} not found")
+
+        content = question.get('content') or ''
+        parts = description_parts(content)
+        snippets = question.get('codeSnippets') or []
+        starter_code = next((s['code'] for s in snippets if s.get('langSlug') == lang), None)
+
+        return {
+            'slug': question.get('titleSlug', slug),
+            'title': question.get('title'),
+            'url': self.problem_url(slug),
+            'difficulty': (question.get('difficulty') or 'MEDIUM').upper(),
+            'paid_only': bool(question.get('isPaidOnly')),
+            'description': parts['text'] if parts else '',
+            'description_parts': parts,
+            'content_html': content,
+            'starter_code': starter_code,
+            'example_testcases': question.get('exampleTestcases')
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_fetcher = None
+_fetcher_lock = threading.Lock()
+
+
+def get_fetcher():
+    global _fetcher
+    if _fetcher is None:
+        with _fetcher_lock:
+            if _fetcher is None:
+                _fetcher = LeetCodeFetcher()
+    return _fetcher
@@ -0,0 +1,423 @@
+from concurrent.futures import Future
+from lazy import lazy_import
+import ast
+import math
+import queue
+import re
+import threading
+import time
+
+# The budget counts generated tokens only, so long descriptions no longer eat into the code
+GENERATION_PARAMS = {
+    'max_new_tokens': 256,
+    'temperature': 0.7,
+    'top_p': 0.95,
+    'num_return_sequences': 1
+}
+
+
+def build_prompt(problem_title, description):
+    return f"""
+            # Python solution for LeetCode problem: {problem_title}
+            # {description}
+            
+            def solution"""
+
+
+def extract_solution(generated_text):
+    # From the first line opening a class or function, so a "def" inside the comments is skipped
+    match = re.search(r'^[ \t]*(?:class|def)\s', generated_text, flags=re.MULTILINE)
+    solution = generated_text[match.start():] if match else generated_text
+    return solution.strip()
+
+
+def leading_indent(line):
+    return len(line) - len(line.lstrip(' \t'))
+
+
+def header_indent(prompt):
+    lines = [line for line in prompt.split('\n') if line.strip()]
+    return leading_indent(lines[-1]) if lines else 0
+
+
+def function_header(prompt):
+    # (indent of the header line, whether the prompt already ends on the full signature)
+    signature_ended = prompt.endswith('\n') and prompt.rstrip().endswith(':')
+    return header_indent(prompt), signature_ended
+
+
+def function_end(text, header):
+    # Offset in the generated text where the function body is closed by a dedent, or None
+    indent, signature_ended = header
+    body_started = False
+    offset = 0
+    for index, line in enumerate(text.split('\n')):
+        # Unless the prompt ended on the signature, the first line finishes the header itself
+        if (index > 0 or signature_ended) and line.strip():
+            if leading_indent(line) > indent:
+                body_started = True
+            elif body_started and (leading_indent(line) < indent or not signature_ended):
+                # A method's header sits inside its class, so further methods at the same
+                # indent (helpers) belong to the solution; only leaving the class ends it
+                return offset
+        offset += len(line) + 1
+    return None
+
+
+def truncate_at_function_end(text, header):
+    end = function_end(text, header)
+    return text if end is None else text[:end]
+
+
+class FunctionEndCriteria:
+    # Implements transformers' StoppingCriteria call protocol without subclassing it, so this
+    # module imports without transformers
+    def __init__(self, tokenizer, headers, cancel=None):
+        self.tokenizer = tokenizer
+        self.headers = headers
+        self.cancel = cancel
+        self.cancelled = False
+        self.started_at = time.perf_counter()
+        self.first_token_at = None
+        self.prompt_length = None
+        self.generated_tokens = 0
+        self.stopped_early = False
+
+    def __call__(self, input_ids, scores, **kwargs):
+        # Called once per generated token; the first call marks time-to-first-token
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            self.prompt_length = input_ids.shape[1] - 1
+        self.generated_tokens = input_ids.shape[1] - self.prompt_length
+        if self.cancel and self.cancel():
+            # Checked every step, so a cancelled run stops generating within one token
+            self.cancelled = True
+            return True
+
+        eos = self.tokenizer.eos_token_id
+        generated = input_ids[:, self.prompt_length:]
+        texts = self.tokenizer.batch_decode(generated, skip_special_tokens=True)
+        for row, text in enumerate(texts):
+            if eos is not None and (generated[row] == eos).any():
+                continue
+            if function_end(text, self.headers[row % len(self.headers)]) is None:
+                return False
+        self.stopped_early = True
+        return True
+
+    def ttft(self):
+        if self.first_token_at is None:
+            return None
+        return self.first_token_at - self.started_at
+
+
+def transformers_for(generator):
+    # A stand-in generator (the benchmark's stub) brings its own streamer and criteria list,
+    # so runs with it never import transformers
+    return getattr(generator, 'transformers', None) or lazy_import('transformers')
+
+
+def generation_options(params):
+    options = dict(GENERATION_PARAMS)
+    options.update(params)
+    return options
+
+
+def generate_streaming(generator, prompt, cancel=None, inputs=None, **params):
+    tokenizer = generator.tokenizer
+    options = generation_options(params)
+    options.pop('num_return_sequences', None)
+    header = function_header(prompt)
+
+    transformers = transformers_for(generator)
+    if inputs is None:
+        inputs = tokenizer(prompt, return_tensors='pt')
+    streamer = transformers.TextIteratorStreamer(tokenizer, skip_prompt=True, skip_special_tokens=True)
+    criteria = FunctionEndCriteria(tokenizer, [header], cancel=cancel)
+
+    def run():
+        try:
+            generator.model.generate(
+                **inputs,
+                streamer=streamer,
+                stopping_criteria=transformers.StoppingCriteriaList([criteria]),
+                pad_token_id=tokenizer.eos_token_id,
+                **options
+            )
+        except Exception as e:
+            print(f"Error during generation: {str(e)}")
+            # Unblock the consumer below
+            streamer.end()
+
+    thread = threading.Thread(target=run, name="generate-stream")
+    thread.daemon = True
+    thread.start()
+
+    chunks = []
+    for chunk in streamer:
+        chunks.append(chunk)
+    thread.join()
+    elapsed = time.perf_counter() - criteria.started_at
+
+    continuation = truncate_at_function_end(''.join(chunks), header)
+    new_tokens = criteria.generated_tokens
+    stats = {
+        'prompt_tokens': int(inputs['input_ids'].shape[1]),
+        'new_tokens': new_tokens,
+        'max_new_tokens': options.get('max_new_tokens'),
+        'ttft': round(criteria.ttft(), 3) if criteria.ttft() is not None else None,
+        'seconds': round(elapsed, 3),
+        'tokens_per_sec': round(new_tokens / elapsed, 1) if elapsed > 0 else None,
+        'stopped_early': criteria.stopped_early,
+        'cancelled': criteria.cancelled
+    }
+    return prompt + continuation, stats
+
+
+def generate_candidates(generator, prompt, n, cancel=None, inputs=None, **params):
+    # One generate() call: the prompt is encoded once and expanded to n sampled rows
+    tokenizer = generator.tokenizer
+    options = generation_options(params)
+    options['num_return_sequences'] = n
+    options.setdefault('do_sample', True)
+    header = function_header(prompt)
+    transformers = transformers_for(generator)
+
+    if inputs is None:
+        inputs = tokenizer(prompt, return_tensors='pt')
+    prompt_length = int(inputs['input_ids'].shape[1])
+    criteria = FunctionEndCriteria(tokenizer, [header], cancel=cancel)
+    start = time.perf_counter()
+    output = generator.model.generate(
+        **inputs,
+        stopping_criteria=transformers.StoppingCriteriaList([criteria]),
+        pad_token_id=tokenizer.eos_token_id,
+        output_scores=True,
+        return_dict_in_generate=True,
+        **options
+    )
+    elapsed = time.perf_counter() - start
+    scores = generator.model.compute_transition_scores(output.sequences, output.scores, normalize_logits=True)
+
+    candidates = []
+    for row in range(output.sequences.shape[0]):
+        text = tokenizer.decode(output.sequences[row, prompt_length:], skip_special_tokens=True)
+        continuation = truncate_at_function_end(text, header)
+        # Score only the tokens that ended up in the solution, not what came after the function
+        used = max(1, min(len(tokenizer(continuation)['input_ids']), scores.shape[1]))
+        logprobs = [value for value in scores[row, :used].tolist() if math.isfinite(value)]
+        candidates.append({
+            'solution': extract_solution(prompt + continuation),
+            'mean_logprob': sum(logprobs) / len(logprobs) if logprobs else float('-inf'),
+            'tokens': used
+        })
+
+    # Every row runs until the last one stops, so that is what the call cost
+    new_tokens = (int(output.sequences.shape[1]) - prompt_length) * len(candidates)
+    stats = {
+        'prompt_tokens': prompt_length,
+        'candidates': len(candidates),
+        'new_tokens': new_tokens,
+        'ttft': round(criteria.ttft(), 3) if criteria.ttft() is not None else None,
+        'seconds': round(elapsed, 3),
+        'tokens_per_sec': round(new_tokens / elapsed, 1) if elapsed > 0 else None,
+        'stopped_early': criteria.stopped_early,
+        'cancelled': criteria.cancelled
+    }
+    return candidates, stats
+
+
+def defined_functions(code):
+    try:
+        tree = ast.parse(code)
+    except (SyntaxError, ValueError):
+        return None
+    return {node.name for node in ast.walk(tree) if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef))}
+
+
+def rank_candidates(candidates, entry=None):
+    # Drop candidates that don't parse or define nothing callable, de-duplicate, best score first
+    expected = {'solution'} | ({entry} if entry else set())
+    ranked = []
+    seen = set()
+    for candidate in candidates:
+        code = candidate['solution']
+        functions = defined_functions(code)
+        if not functions or not functions & expected or code in seen:
+            continue
+        seen.add(code)
+        ranked.append(candidate)
+    ranked.sort(key=lambda c: c['mean_logprob'], reverse=True)
+    return ranked
+
+
+def prepare_tokenizer(generator):
+    # Decoder-only models must be left-padded so every prompt ends right where generation starts
+    tokenizer = generator.tokenizer
+    if tokenizer.pad_token is None:
+        tokenizer.pad_token = tokenizer.eos_token
+    tokenizer.padding_side = 'left'
+    return tokenizer
+
+
+def bucket_by_length(lengths, max_batch_size):
+    # Sort by prompt length so each batch pads to a similar size, then chunk
+    order = sorted(range(len(lengths)), key=lambda i: lengths[i])
+    return [order[i:i + max_batch_size] for i in range(0, len(order), max_batch_size)]
+
+
+def generate_batch(generator, prompts, max_batch_size=4, cancel=None, lengths=None, **params):
+    solutions, batch_stats, _ = generate_rows(
+        generator, prompts, max_batch_size=max_batch_size, cancel=cancel, lengths=lengths, **params
+    )
+    return solutions, batch_stats
+
+
+def generate_rows(generator, prompts, max_batch_size=4, cancel=None, lengths=None, **params):
+    # generate_batch plus stats per prompt: its own tokens and the timing of the batch it was in
+    if not prompts:
+        return [], [], []
+    tokenizer = prepare_tokenizer(generator)
+    options = generation_options(params)
+    transformers = transformers_for(generator)
+
+    if lengths is None:
+        lengths = [len(tokenizer(prompt)['input_ids']) for prompt in prompts]
+    solutions = [None] * len(prompts)
+    batch_stats = []
+    row_stats = [None] * len(prompts)
+
+    for indexes in bucket_by_length(lengths, max_batch_size):
+        batch_prompts = [prompts[i] for i in indexes]
+        headers = [function_header(prompt) for prompt in batch_prompts]
+        if cancel and cancel():
+            break
+        criteria = FunctionEndCriteria(tokenizer, headers, cancel=cancel)
+        start = time.perf_counter()
+        responses = generator(
+            batch_prompts,
+            batch_size=len(batch_prompts),
+            pad_token_id=tokenizer.eos_token_id,
+            stopping_criteria=transformers.StoppingCriteriaList([criteria]),
+            **options
+        )
+        elapsed = time.perf_counter() - start
+
+        new_tokens = 0
+        row_tokens = {}
+        for i, header, response in zip(indexes, headers, responses):
+            text = response[0]['generated_text']
+            row_tokens[i] = max(0, len(tokenizer(text)['input_ids']) - lengths[i])
+            new_tokens += row_tokens[i]
+            continuation = truncate_at_function_end(text[len(prompts[i]):], header)
+            solutions[i] = extract_solution(prompts[i] + continuation)
+
+        if criteria.cancelled:
+            # Cut off mid-function; nothing from this batch is a usable solution
+            for i in indexes:
+                solutions[i] = None
+
+        batch = {
+            'size': len(indexes),
+            'prompt_tokens': sum(lengths[i] for i in indexes),
+            'new_tokens': new_tokens,
+            'ttft': round(criteria.ttft(), 3) if criteria.ttft() is not None else None,
+            'seconds': round(elapsed, 3),
+            'tokens_per_sec': round(new_tokens / elapsed, 1) if elapsed > 0 else None,
+            'stopped_early': criteria.stopped_early,
+            'cancelled': criteria.cancelled
+        }
+        batch_stats.append(batch)
+        for i in indexes:
+            row_stats[i] = dict(batch, prompt_tokens=lengths[i], new_tokens=row_tokens[i], batch_size=len(indexes))
+            del row_stats[i]['size']
+
+    return solutions, batch_stats, row_stats
+
+
+class BatchGenerator:
+    def __init__(self, generator, max_batch_size=4, max_wait=0.05, history=50, **params):
+        self.generator = generator
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.params = params
+        self.requests = queue.Queue()
+        self.history = history
+        self.batches = []
+        self.lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self.run, name="batch-generator")
+        self.thread.daemon = True
+        self.thread.start()
+
+    def submit(self, prompt):
+        future = Future()
+        if self.closed:
+            future.set_exception(Exception("Batch generator is closed"))
+            return future
+        self.requests.put((prompt, future))
+        return future
+
+    def generate(self, prompt, timeout=None):
+        # Returns the solution and its stats (its own tokens, the timing of its batch)
+        return self.submit(prompt).result(timeout=timeout)
+
+    def collect(self):
+        # Block for the first request, then wait at most max_wait for the batch to fill
+        batch = [self.requests.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.requests.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return [entry for entry in batch if entry is not None]
+
+    def run(self):
+        while not self.closed:
+            batch = self.collect()
+            batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                solutions, stats, rows = generate_rows(
+                    self.generator,
+                    [item for item, _ in batch],
+                    max_batch_size=self.max_batch_size,
+                    **self.params
+                )
+                for (_, future), solution, row in zip(batch, solutions, rows):
+                    future.set_result((solution, row))
+                self.record(stats)
+            except Exception as e:
+                print(f"Error generating batch: {str(e)}")
+                for _, future in batch:
+                    future.set_exception(e)
+
+    def record(self, stats):
+        with self.lock:
+            self.batches.extend(stats)
+            del self.batches[:-self.history]
+
+    def stats(self):
+        with self.lock:
+            batches = list(self.batches)
+        total_tokens = sum(b['new_tokens'] for b in batches)
+        total_time = sum(b['seconds'] for b in batches)
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait': self.max_wait,
+            'pending': self.requests.qsize(),
+            'batches': len(batches),
+            'avg_batch_size': round(sum(b['size'] for b in batches) / len(batches), 2) if batches else None,
+            'tokens_per_sec': round(total_tokens / total_time, 1) if total_time > 0 else None,
+            'last': batches[-1] if batches else None
+        }
+
+    def close(self):
+        self.closed = True
+        # Wake the worker so it notices the flag
+        self.requests.put(None)
@@ -0,0 +1,216 @@
+from collections import OrderedDict
+import heapq
+import itertools
+import threading
+import time
+import uuid
+
+QUEUED = 'queued'
+RUNNING = 'running'
+CANCELLING = 'cancelling'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+FINISHED = (SUCCEEDED, FAILED, CANCELLED)
+
+
+class QueueFull(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, options, priority=0):
+        self.id = uuid.uuid4().hex[:12]
+        self.options = options
+        self.priority = priority
+        self.state = QUEUED
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.cancel_requested_at = None
+        self.bot = None
+        self.run_id = None
+        self.message = None
+        self.solved = 0
+        self.solved_problems = []
+
+    def attach(self, bot, run_id):
+        self.bot = bot
+        self.run_id = run_id
+        if self.cancel_requested_at:
+            # Cancelled between leaving the queue and getting its bot
+            bot.cancel()
+
+    def to_dict(self, position=None):
+        bot = self.bot
+        if bot is not None and self.state in (RUNNING, CANCELLING):
+            status = bot.get_status()
+            solved = status.get('solved_total', 0)
+            message = status.get('status')
+        else:
+            solved = self.solved
+            message = self.message
+        return {
+            'id': self.id,
+            'state': self.state,
+            'priority': self.priority,
+            'position': position,
+            'options': self.options,
+            'run': self.run_id,
+            'solved': solved,
+            'status': message,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'cancel_requested_at': self.cancel_requested_at,
+            # How long the run took to wind down after the cancel request
+            'cancel_seconds': round(self.finished_at - self.cancel_requested_at, 3)
+            if self.finished_at and self.cancel_requested_at else None
+        }
+
+
+class JobQueue:
+    # Jobs run one at a time, highest priority first and in submission order within a
+    # priority. run_job(job) drives the job's bot to completion on the queue's own thread.
+    def __init__(self, run_job, max_depth=20, history=100, is_busy=None, poll_interval=0.1):
+        self.run_job = run_job
+        self.max_depth = max_depth
+        self.history = history
+        # A run started through /start-bot holds the browser; queued jobs wait for it
+        self.is_busy = is_busy or (lambda: False)
+        self.poll_interval = poll_interval
+        self.condition = threading.Condition()
+        self.heap = []
+        self.order = itertools.count()
+        self.jobs = OrderedDict()
+        self.current = None
+        self.completed = 0
+        self.thread = None
+
+    def submit(self, options, priority=0):
+        with self.condition:
+            queued = sum(1 for job in self.jobs.values() if job.state == QUEUED)
+            if queued >= self.max_depth:
+                raise QueueFull(f"Job queue is full ({self.max_depth} queued)")
+            job = Job(options, priority)
+            self.jobs[job.id] = job
+            heapq.heappush(self.heap, (-priority, next(self.order), job))
+            self.trim()
+            self.ensure_thread()
+            self.condition.notify_all()
+            return job
+
+    def ensure_thread(self):
+        if self.thread is None or not self.thread.is_alive():
+            self.thread = threading.Thread(target=self.run, name="job-queue")
+            self.thread.daemon = True
+            self.thread.start()
+
+    def trim(self):
+        # Finished jobs are kept for their results up to the history limit
+        finished = [job_id for job_id, job in self.jobs.items() if job.state in FINISHED]
+        for job_id in finished[:max(0, len(finished) - self.history)]:
+            del self.jobs[job_id]
+
+    def get(self, job_id):
+        with self.condition:
+            return self.jobs.get(job_id)
+
+    def position(self, job):
+        if job.state != QUEUED:
+            return None
+        ahead = sorted(entry for entry in self.heap if entry[2].state == QUEUED)
+        for index, entry in enumerate(ahead):
+            if entry[2] is job:
+                return index
+        return None
+
+    def describe(self, job):
+        with self.condition:
+            return job.to_dict(self.position(job))
+
+    def list(self):
+        with self.condition:
+            return [job.to_dict(self.position(job)) for job in reversed(self.jobs.values())]
+
+    def cancel(self, job_id):
+        with self.condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state in FINISHED:
+                return job
+            job.cancel_requested_at = time.time()
+            if job.state == QUEUED:
+                # Left in the heap and skipped when it comes up
+                job.state = CANCELLED
+                job.finished_at = job.cancel_requested_at
+                self.condition.notify_all()
+                return job
+            if job.state == CANCELLING:
+                return job
+            job.state = CANCELLING
+            bot = job.bot
+        if bot is not None:
+            bot.cancel()
+        return job
+
+    def wait(self, job, timeout=None):
+        with self.condition:
+            return self.condition.wait_for(lambda: job.state in FINISHED, timeout)
+
+    def next_job(self):
+        with self.condition:
+            while True:
+                while self.heap and self.heap[0][2].state != QUEUED:
+                    heapq.heappop(self.heap)
+                if self.heap and not self.is_busy():
+                    job = heapq.heappop(self.heap)[2]
+                    job.state = RUNNING
+                    job.started_at = time.time()
+                    self.current = job
+                    return job
+                self.condition.wait(self.poll_interval)
+
+    def run(self):
+        while True:
+            job = self.next_job()
+            try:
+                self.run_job(job)
+            except Exception as e:
+                print(f"Error running job {job.id}: {str(e)}")
+                job.message = str(e)
+            self.finish(job)
+
+    def finish(self, job):
+        bot = job.bot
+        if bot is not None:
+            status = bot.get_status()
+            job.solved = status.get('solved_total', 0)
+            job.solved_problems = bot.get_solved_problems()
+            job.message = job.message or status.get('status')
+        with self.condition:
+            if job.cancel_requested_at:
+                job.state = CANCELLED
+            elif job.solved >= job.options['problem_count']:
+                job.state = SUCCEEDED
+            else:
+                job.state = FAILED
+            job.finished_at = time.time()
+            # The finished job no longer needs its bot, only the results copied above
+            job.bot = None
+            self.current = None
+            self.completed += 1
+            self.trim()
+            self.condition.notify_all()
+
+    def stats(self):
+        with self.condition:
+            states = {}
+            for job in self.jobs.values():
+                states[job.state] = states.get(job.state, 0) + 1
+            return {
+                'max_depth': self.max_depth,
+                'queued': states.get(QUEUED, 0),
+                'running': self.current.id if self.current else None,
+                'completed': self.completed,
+                'states': states
+            }
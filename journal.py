@@ -0,0 +1,171 @@
+import json
+import os
+import threading
+import time
+import uuid
+
+
+class RunJournal:
+    # Append-only JSON lines: one 'run' record when a run starts, one 'attempt' record per
+    # problem and an 'end' record when it finishes or is stopped. Each line is flushed to the
+    # OS as it is written; fsync is batched so a busy run doesn't pay for one per attempt.
+    def __init__(self, path="journal.jsonl", sync_every=20, sync_interval=1.0):
+        self.path = path
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.lock = threading.Lock()
+        self.file = open(path, 'a', encoding='utf-8')
+        if self.file.tell() and not self.ends_with_newline():
+            # Start after a line torn by a crash instead of appending onto it
+            self.file.write("\n")
+            self.file.flush()
+        self.pending = 0
+        self.records = 0
+        self.syncs = 0
+        self.last_sync = time.time()
+        self.closed = False
+        self.wakeup = threading.Event()
+        # Syncs whatever is left after a quiet interval, so nothing waits long for the disk
+        self.syncer = threading.Thread(target=self.sync_loop, name="journal-sync", daemon=True)
+        self.syncer.start()
+
+    def ends_with_newline(self):
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def append(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock:
+            if self.closed:
+                return
+            self.file.write(line + "\n")
+            self.file.flush()
+            self.records += 1
+            self.pending += 1
+            if self.pending >= self.sync_every:
+                self._sync()
+
+    def _sync(self):
+        if not self.pending:
+            return
+        os.fsync(self.file.fileno())
+        self.pending = 0
+        self.syncs += 1
+        self.last_sync = time.time()
+
+    def sync(self):
+        with self.lock:
+            if not self.closed:
+                self._sync()
+
+    def sync_loop(self):
+        while not self.wakeup.wait(self.sync_interval):
+            try:
+                self.sync()
+            except Exception as e:
+                print(f"Error syncing run journal: {str(e)}")
+
+    def close(self):
+        self.wakeup.set()
+        with self.lock:
+            if self.closed:
+                return
+            self._sync()
+            self.file.close()
+            self.closed = True
+
+    def begin(self, problem_count, difficulty=None, workers=1, pipelined=False, best_of=1, resumes=None):
+        run_id = uuid.uuid4().hex[:12]
+        self.append({
+            'type': 'run',
+            'run': run_id,
+            'at': time.time(),
+            'problem_count': problem_count,
+            'difficulty': difficulty,
+            'workers': workers,
+            'pipelined': bool(pipelined),
+            'best_of': best_of,
+            'resumes': resumes
+        })
+        return run_id
+
+    def record_attempt(self, run_id, problem, trace, solution=None):
+        self.append({
+            'type': 'attempt',
+            'run': run_id,
+            'at': time.time(),
+            'slug': trace.get('problem'),
+            'title': problem.get('title'),
+            'url': problem.get('url'),
+            'difficulty': problem.get('difficulty'),
+            'outcome': trace.get('outcome'),
+            'verdict': trace.get('verdict'),
+            'submissions': trace.get('submissions'),
+            'solution': solution or problem.get('solution'),
+            'runtime_ms': problem.get('runtime_ms'),
+            'memory_mb': problem.get('memory_mb'),
+            'total_seconds': trace.get('total_seconds'),
+            'phases': trace.get('phases')
+        })
+
+    def end(self, run_id, status, solved):
+        self.append({'type': 'end', 'run': run_id, 'at': time.time(), 'status': status, 'solved': solved})
+        # Run boundaries are rare and worth having on disk straight away
+        self.sync()
+
+    def read(self):
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, encoding='utf-8') as f:
+            for line in f:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    # A crash mid-write can leave a torn last line
+                    continue
+
+    def attempts(self, run_id):
+        return [r for r in self.read() if r.get('type') == 'attempt' and r.get('run') == run_id]
+
+    def attempted_slugs(self):
+        return {r['slug'] for r in self.read() if r.get('type') == 'attempt' and r.get('slug')}
+
+    def interrupted_run(self):
+        # The latest run, if it stopped or crashed before solving its count
+        run = None
+        solved = 0
+        ended = None
+        for record in self.read():
+            if record.get('type') == 'run':
+                run, solved, ended = record, 0, None
+            elif not run or record.get('run') != run['run']:
+                continue
+            elif record.get('type') == 'attempt' and record.get('outcome') == 'accepted':
+                solved += 1
+            elif record.get('type') == 'end':
+                ended = record
+        if not run or solved >= run['problem_count'] or (ended and ended.get('status') == 'finished'):
+            return None
+        return {
+            'run': run['run'],
+            'started_at': run['at'],
+            'problem_count': run['problem_count'],
+            'solved': solved,
+            'remaining': run['problem_count'] - solved,
+            'difficulty': run.get('difficulty'),
+            'workers': run.get('workers', 1),
+            'pipelined': run.get('pipelined', False),
+            'best_of': run.get('best_of', 1),
+            'status': ended['status'] if ended else 'crashed'
+        }
+
+    def stats(self):
+        with self.lock:
+            return {
+                'path': self.path,
+                'records': self.records,
+                'pending_sync': self.pending,
+                'syncs': self.syncs,
+                'last_sync': self.last_sync
+            }
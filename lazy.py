@@ -0,0 +1,31 @@
+import importlib
+import sys
+import threading
+import time
+
+# Heavy dependencies (transformers, selenium, bs4, ...) are imported on first use rather than
+# when the server boots; the first import of each is timed and logged here
+IMPORT_TIMES = {}
+_lock = threading.Lock()
+
+
+def lazy_import(name):
+    cached = name in sys.modules
+    start = time.perf_counter()
+    module = importlib.import_module(name)
+    if not cached:
+        seconds = time.perf_counter() - start
+        with _lock:
+            if name not in IMPORT_TIMES:
+                IMPORT_TIMES[name] = round(seconds, 3)
+                print(f"Imported {name} in {seconds:.2f}s")
+    return module
+
+
+def is_imported(name):
+    return name in sys.modules
+
+
+def import_times():
+    with _lock:
+        return dict(IMPORT_TIMES)
@@ -0,0 +1,178 @@
+import json
+import os
+import threading
+
+# URL patterns per resource type; the bot never looks at any of these
+RESOURCE_PATTERNS = {
+    'image': ['*.png', '*.png?*', '*.jpg', '*.jpg?*', '*.jpeg', '*.jpeg?*', '*.gif', '*.gif?*',
+              '*.webp', '*.webp?*', '*.svg', '*.svg?*', '*.ico', '*.ico?*', '*.avif', '*.avif?*'],
+    'font': ['*.woff', '*.woff?*', '*.woff2', '*.woff2?*', '*.ttf', '*.ttf?*', '*.otf', '*.otf?*', '*.eot', '*.eot?*'],
+    'media': ['*.mp4', '*.mp4?*', '*.webm', '*.webm?*', '*.mp3', '*.mp3?*', '*.m3u8', '*.m3u8?*']
+}
+DEFAULT_TYPES = ['image', 'font', 'media']
+
+# Analytics, ads, session recording and chat widgets
+DEFAULT_BLOCKED_DOMAINS = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'doubleclick.net',
+    'googlesyndication.com',
+    'facebook.net',
+    'hotjar.com',
+    'segment.io',
+    'segment.com',
+    'mixpanel.com',
+    'amplitude.com',
+    'intercom.io',
+    'sentry.io',
+    'clarity.ms',
+    'bat.bing.com'
+]
+
+# The site and its asset CDNs serve the editor and the submit flow, so they can never be
+# blocked by domain; scripts, stylesheets and XHR are never blocked by type either
+ALLOWED_DOMAINS = ['leetcode.com', 'leetcode.cn']
+
+# Typical transfer sizes, used until this session has seen real responses of that type
+ESTIMATED_BYTES = {
+    'Image': 25 * 1024,
+    'Font': 40 * 1024,
+    'Media': 250 * 1024,
+    'Script': 60 * 1024,
+    'Stylesheet': 15 * 1024,
+    'XHR': 5 * 1024,
+    'Fetch': 5 * 1024,
+    'Ping': 512,
+    'Other': 5 * 1024
+}
+
+
+def domain_patterns(domain):
+    return [f"*://{domain}/*", f"*://*.{domain}/*"]
+
+
+def is_allowed_domain(domain):
+    domain = domain.lower().strip('.')
+    return any(domain == allowed or domain.endswith('.' + allowed) or allowed.endswith('.' + domain)
+               for allowed in ALLOWED_DOMAINS)
+
+
+class LeanProfile:
+    def __init__(self, resource_types=None, blocked_domains=None, history=50):
+        self.resource_types = [t for t in (resource_types or DEFAULT_TYPES) if t in RESOURCE_PATTERNS]
+        domains = DEFAULT_BLOCKED_DOMAINS if blocked_domains is None else blocked_domains
+        # A misconfigured domain list must not take the editor or the judge down with it
+        self.refused = [d for d in domains if is_allowed_domain(d)]
+        self.blocked_domains = [d for d in domains if d and not is_allowed_domain(d)]
+        self.history = history
+        self.lock = threading.Lock()
+        self.pages = []
+        self.totals = {'pages': 0, 'requests': 0, 'bytes': 0, 'blocked': 0, 'bytes_saved': 0}
+        self.observed = {}
+
+    def patterns(self):
+        patterns = []
+        for resource_type in self.resource_types:
+            patterns.extend(RESOURCE_PATTERNS[resource_type])
+        for domain in self.blocked_domains:
+            patterns.extend(domain_patterns(domain))
+        return patterns
+
+    def apply(self, driver):
+        # Blocked at the network layer, so the requests are never sent
+        driver.execute_cdp_cmd('Network.enable', {})
+        driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': self.patterns()})
+
+    def configure_options(self, chrome_options):
+        # Performance logs carry the network events used to count what was saved
+        chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+        return chrome_options
+
+    def network_events(self, driver):
+        try:
+            entries = driver.get_log('performance')
+        except Exception:
+            return []
+        events = []
+        for entry in entries:
+            try:
+                message = json.loads(entry['message'])['message']
+            except (KeyError, TypeError, ValueError):
+                continue
+            if message.get('method', '').startswith('Network.'):
+                events.append(message)
+        return events
+
+    def estimate(self, resource_type):
+        seen = self.observed.get(resource_type)
+        if seen and seen['count']:
+            return seen['bytes'] / seen['count']
+        return ESTIMATED_BYTES.get(resource_type, ESTIMATED_BYTES['Other'])
+
+    def collect(self, driver, page):
+        # Drains the session's network log; call once after each navigation
+        types = {}
+        loaded = {'requests': 0, 'bytes': 0}
+        blocked = {}
+        for event in self.network_events(driver):
+            params = event.get('params', {})
+            method = event['method']
+            if method == 'Network.requestWillBeSent':
+                types[params.get('requestId')] = params.get('type', 'Other')
+            elif method == 'Network.loadingFinished':
+                resource_type = types.get(params.get('requestId'), 'Other')
+                size = params.get('encodedDataLength') or 0
+                loaded['requests'] += 1
+                loaded['bytes'] += size
+                with self.lock:
+                    seen = self.observed.setdefault(resource_type, {'count': 0, 'bytes': 0})
+                    seen['count'] += 1
+                    seen['bytes'] += size
+            elif method == 'Network.loadingFailed' and params.get('blockedReason'):
+                resource_type = params.get('type') or types.get(params.get('requestId'), 'Other')
+                blocked[resource_type] = blocked.get(resource_type, 0) + 1
+
+        with self.lock:
+            saved = int(sum(self.estimate(t) * count for t, count in blocked.items()))
+            record = {
+                'page': page,
+                'requests': loaded['requests'],
+                'bytes': loaded['bytes'],
+                'blocked': sum(blocked.values()),
+                'blocked_by_type': blocked,
+                'bytes_saved_estimate': saved
+            }
+            self.pages.append(record)
+            del self.pages[:-self.history]
+            self.totals['pages'] += 1
+            self.totals['requests'] += record['requests']
+            self.totals['bytes'] += record['bytes']
+            self.totals['blocked'] += record['blocked']
+            self.totals['bytes_saved'] += saved
+        return record
+
+    def stats(self):
+        with self.lock:
+            pages = self.totals['pages']
+            return {
+                'resource_types': self.resource_types,
+                'blocked_domains': len(self.blocked_domains),
+                'refused_domains': self.refused,
+                'pages': pages,
+                'requests_per_page': round(self.totals['requests'] / pages, 1) if pages else None,
+                'blocked_per_page': round(self.totals['blocked'] / pages, 1) if pages else None,
+                'kb_per_page': round(self.totals['bytes'] / pages / 1024, 1) if pages else None,
+                'kb_saved_per_page': round(self.totals['bytes_saved'] / pages / 1024, 1) if pages else None,
+                'last': self.pages[-1] if self.pages else None
+            }
+
+
+def lean_from_env():
+    if os.environ.get('LEAN_MODE', '0') != '1':
+        return None
+    types = os.environ.get('LEAN_BLOCK_TYPES')
+    domains = os.environ.get('LEAN_BLOCK_DOMAINS')
+    return LeanProfile(
+        resource_types=[t.strip() for t in types.split(',') if t.strip()] if types else None,
+        blocked_domains=DEFAULT_BLOCKED_DOMAINS + [d.strip() for d in domains.split(',') if d.strip()] if domains else None
+    )
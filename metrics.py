@@ -0,0 +1,183 @@
+import json
+import math
+import os
+import threading
+import time
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120)
+
+
+def escape_label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def format_labels(labelnames, values, extra=None):
+    pairs = list(zip(labelnames, values))
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{escape_label(value)}"' for name, value in pairs) + '}'
+
+
+def format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            items = sorted(self.values.items())
+        if not items and not self.labelnames:
+            items = [((), 0)]
+        for key, value in items:
+            lines.append(f"{self.name}{format_labels(self.labelnames, key)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        self.lock = threading.Lock()
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(labels.get(name, '') for name in self.labelnames)
+        with self.lock:
+            series = self.series.setdefault(key, {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0})
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            items = sorted((key, dict(series, counts=list(series['counts']))) for key, series in self.series.items())
+        for key, series in items:
+            for bound, count in zip(self.buckets, series['counts']):
+                labels = format_labels(self.labelnames, key, ('le', format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {count}")
+            labels = format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {format_value(series['sum'])}")
+            lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                key: {'count': series['count'], 'sum': series['sum']}
+                for key, series in self.series.items()
+            }
+
+
+class TraceLog:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def write(self, record):
+        line = json.dumps(record, default=str)
+        with self.lock:
+            with open(self.path, 'a') as f:
+                f.write(line + "\n")
+
+
+class Span:
+    def __init__(self, bot_metrics, phase, trace=None):
+        self.metrics = bot_metrics
+        self.phase = phase
+        self.trace = trace
+        self.failed = False
+        self.start = None
+        self.elapsed = None
+
+    def fail(self):
+        self.failed = True
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        elapsed = self.elapsed = time.perf_counter() - self.start
+        self.metrics.phase_seconds.observe(elapsed, phase=self.phase)
+        if exc_type is not None or self.failed:
+            self.metrics.phase_failures.inc(phase=self.phase)
+        if self.trace is not None:
+            phases = self.trace.setdefault('phases', {})
+            phases[self.phase] = round(phases.get(self.phase, 0) + elapsed, 4)
+            if exc_type is not None or self.failed:
+                self.trace.setdefault('failed_phases', []).append(self.phase)
+        return False
+
+
+class BotMetrics:
+    def __init__(self, trace_path=None):
+        self.phase_seconds = Histogram(
+            'leetcode_bot_phase_seconds', 'Time spent in each phase of a solve iteration.', ['phase']
+        )
+        self.phase_failures = Counter(
+            'leetcode_bot_phase_failures_total', 'Phases that raised or returned no result.', ['phase']
+        )
+        self.attempts = Counter('leetcode_bot_attempts_total', 'Problems the bot tried to solve.')
+        self.accepts = Counter('leetcode_bot_accepted_total', 'Submissions the judge accepted.')
+        self.retries = Counter('leetcode_bot_retries_total', 'Loop iterations retried after a failure.', ['reason'])
+        self.submissions = Counter('leetcode_bot_submissions_total', 'Solutions submitted to the judge.')
+        self.generated_tokens = Counter('leetcode_bot_generated_tokens_total', 'Tokens produced by the model.')
+        self.throttles = Counter(
+            'leetcode_bot_throttles_total', 'Throttling signals and failures that triggered a backoff.', ['action', 'reason']
+        )
+        self.throttled_seconds = Counter('leetcode_bot_throttled_seconds_total', 'Time spent waiting out backoffs.')
+        self.page_ready_seconds = Histogram(
+            'leetcode_bot_page_ready_seconds', 'Time from opening a problem until its editor is ready in Python.', ['mode']
+        )
+        self.collectors = [
+            self.phase_seconds, self.phase_failures, self.attempts, self.accepts, self.retries,
+            self.submissions, self.generated_tokens, self.throttles, self.throttled_seconds,
+            self.page_ready_seconds
+        ]
+        self.trace_log = TraceLog(trace_path) if trace_path else None
+
+    def register(self, collector):
+        self.collectors.append(collector)
+        return collector
+
+    def span(self, phase, trace=None):
+        return Span(self, phase, trace)
+
+    def write_trace(self, trace):
+        if not self.trace_log or trace is None:
+            return
+        try:
+            self.trace_log.write(trace)
+        except Exception as e:
+            print(f"Error writing trace: {str(e)}")
+
+    def render(self):
+        lines = []
+        for collector in self.collectors:
+            lines.extend(collector.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = BotMetrics(trace_path=os.environ.get('TRACE_LOG'))
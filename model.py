@@ -1,67 +1,214 @@
-from selenium import webdriver
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException
-from selenium.webdriver.common.keys import Keys
-import chromedriver_autoinstaller
-from transformers import pipeline
+from catalog import ProblemClaims
+from collections import deque
+from events import EventLog, problem_summary
+from lazy import lazy_import
+from extractor import DESCRIPTION_HTML, css_selectors, description_parts, extract_description
+from driver_pool import create_driver
+from fetcher import DEFAULT_BASE_URL
+from metrics import metrics
+from rate_limit import RateScheduler, RetryDelay
+from model_registry import get_generator, registry
+from prompt_compiler import PromptCompiler
+from generation import (
+    GENERATION_PARAMS,
+    extract_solution,
+    generate_batch,
+    generate_candidates,
+    generate_streaming,
+    rank_candidates
+)
+from solution_cache import ACCEPTED
+from solve_pipeline import SolvePipeline
+from tab_session import ROUTE_DONE, TabSession, url_path
+from utils import slug_from_url
+from validation import entry_point
+from verdict import TIMED_OUT, install_observer, wait_for_verdict
+from waits import (
+    Cancelled,
+    WaitEngine,
+    ACTIVE_MODEL,
+    PROBLEM_ROWS_READY,
+    DESCRIPTION_READY,
+    EDITOR_READY,
+    PYTHON_SELECTED,
+    SUBMIT_READY
+)
 import time
 import random
 import threading
-import json
-import re
-import sys
+import os
 import traceback
-from bs4 import BeautifulSoup
-import requests
+
+# Solved problems kept in memory for the page; the run journal holds the full history
+SOLVED_HISTORY = int(os.environ.get('SOLVED_HISTORY', 50))
+
+
+def generation_params(best_of, prompts):
+    # Everything that changes the generated code; the solution cache keys entries by it
+    params = dict(GENERATION_PARAMS)
+    params['model'] = registry.model_name
+    # A quantized or ONNX export can write different code than the float model
+    params['backend'] = registry.backend.name
+    # Best-of-N samples and ranks several candidates where a single run decodes one
+    params['best_of'] = best_of
+    params['prompt'] = prompts.settings()
+    return params
+
 
 class LeetCodeBot:
-    def __init__(self):
+    def __init__(self, driver_pool=None, wait_timeouts=None, catalog=None, fetcher=None, batcher=None, solution_cache=None, validator=None, claims=None, events=None, generator=None, rate=None, tabs=0, prompts=None):
+        # Status, current problem and solved items are pushed to /bot-events as they change
+        self.events = events or EventLog()
+        # Workers sharing a scheduler's log leave run start/stop events to the scheduler
+        self.owns_events = events is None
         self.driver = None
+        self.driver_pool = driver_pool
+        # 0 reloads the whole page per problem; 1 keeps the editor app loaded and routes in-app,
+        # more also preload the next problem in spare tabs
+        self.tabs = tabs
+        self.session = None
+        # Picked ahead of time so it can be preloaded; handed out by the next selection
+        self.next_problem = None
+        # Slug of the problem open in the active tab, to pick its editor model
+        self.open_slug = None
+        # Lean sessions block images, fonts, media and trackers; None for a full profile
+        self.lean = getattr(driver_pool, 'lean', None)
+        self.catalog = catalog
+        self.fetcher = fetcher
+        # Pages are loaded from the same site the fetcher talks to, so a local fake site can stand in
+        self.base_url = fetcher.base_url if fetcher else os.environ.get('LEETCODE_BASE_URL', DEFAULT_BASE_URL).rstrip('/')
+        self.batcher = batcher
+        self.solution_cache = solution_cache
+        self.validator = validator
+        self.claims = claims or ProblemClaims()
         self.problem_count = 1
+        self.difficulty = None
         self.running = False
         self.lock = threading.Lock()
         self.status = "Initialized"
-        self.solved_problems = []
+        self.solved_problems = deque(maxlen=SOLVED_HISTORY)
+        self.solved_total = 0
         self.current_problem = None
         self.is_loading = False
+        self.waits = WaitEngine(timeouts=wait_timeouts, cancel=self.is_stopped)
+        # Navigations, submissions and API calls are paced by token buckets shared across workers
+        self.rate = rate or RateScheduler()
+        self.pipelined = False
+        self.pipeline = None
+        self.max_batch_size = 4
+        self.max_batch_wait = 0.5
+        self.batch_stats = []
+        self.generation_stats = []
+        # Candidates sampled per problem; 1 keeps the single streamed sample
+        self.best_of = 1
+        self.yield_lock = threading.Lock()
+        self.yield_stats = {'submissions': 0, 'accepts': 0, 'generated_tokens': 0, 'candidates': 0, 'viable': 0}
+        # Per-problem phase timings, keyed by URL so pipeline stages add to the same trace
+        self.traces = {}
+        # Every attempt is appended to the journal; only the bot that started the run closes it
+        self.journal = None
+        self.run_id = None
+        self.owns_run = False
+        # Shared, process-wide pipeline; fetched by prepare() when the run starts
+        self.generator = generator
+        # Compacts descriptions into prompts and caches their tokenization
+        self.prompts = prompts or PromptCompiler()
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        if value != getattr(self, '_status', None):
+            self._status = value
+            self.events.emit('status', {'status': value})
+
+    @property
+    def running(self):
+        return self._running
+
+    @running.setter
+    def running(self, value):
+        if value != getattr(self, '_running', None):
+            self._running = value
+            if self.owns_events:
+                self.events.emit('running', {'is_running': value})
+
+    @property
+    def current_problem(self):
+        return self._current_problem
+
+    @current_problem.setter
+    def current_problem(self, problem):
+        self._current_problem = problem
+        if problem:
+            self.events.emit('problem', problem_summary(problem))
+
+    def record_solved(self, problem):
+        summary = problem_summary(problem)
+        self.solved_problems.append(summary)
+        self.solved_total += 1
+        self.events.emit('solved', summary)
+
+    def new_trace(self):
+        return {'started_at': time.time(), 'phases': {}}
+
+    def trace_for(self, problem, trace=None):
+        trace = self.traces.setdefault(problem['url'], trace or self.new_trace())
+        trace.update({
+            'problem': problem.get('slug') or slug_from_url(problem['url']),
+            'title': problem.get('title'),
+            'difficulty': problem.get('difficulty')
+        })
+        return trace
+
+    def finish_trace(self, problem, outcome, solution=None):
+        trace = self.traces.pop(problem['url'], None)
+        if trace is None:
+            return
+        trace['outcome'] = outcome
+        trace['total_seconds'] = round(time.time() - trace['started_at'], 3)
+        metrics.write_trace(trace)
+        if self.journal:
+            try:
+                self.journal.record_attempt(self.run_id, problem, trace, solution=solution)
+            except Exception as e:
+                print(f"Error writing run journal: {str(e)}")
+
+    def end_run(self, solved_count):
+        if not self.journal or not self.owns_run:
+            return
         try:
-            self.generator = pipeline("text-generation", model="Salesforce/codegen-350M-mono")
+            self.journal.end(self.run_id, 'finished' if solved_count >= self.problem_count else 'stopped', solved_count)
         except Exception as e:
-            print(f"Warning: Could not initialize CodeGen: {str(e)}")
-            self.generator = None
-        self.setup_driver()
+            print(f"Error writing run journal: {str(e)}")
+
+    def prepare(self):
+        # Model and browser are loaded on the run's own thread, so /start-bot returns immediately
+        if self.generator is None:
+            self.status = "Loading model..."
+            self.is_loading = True
+            try:
+                self.generator = get_generator()
+            finally:
+                self.is_loading = False
+        if self.driver is None:
+            self.status = "Starting browser..."
+            return self.setup_driver()
+        return True
 
     def setup_driver(self):
         try:
-            if self.driver:
-                try:
-                    self.driver.quit()
-                except:
-                    pass
+            self.release_driver()
 
-            chromedriver_autoinstaller.install()
-            
-            chrome_options = Options()
-            chrome_options.add_argument("--no-sandbox")
-            chrome_options.add_argument("--disable-dev-shm-usage")
-            chrome_options.add_argument("--disable-gpu")
-            chrome_options.add_argument("--window-size=1920,1080")
-            chrome_options.add_argument("--start-maximized")
-            chrome_options.add_argument("--headless=new")
-            chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-            chrome_options.add_argument("--disable-extensions")
-            chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
-            
-            self.driver = webdriver.Chrome(options=chrome_options)
-            self.driver.set_page_load_timeout(30)
-            self.driver.implicitly_wait(10)
-            self.driver.set_window_size(1920, 1080)
-            
-            print("✅ WebDriver started successfully")
+            if self.driver_pool:
+                self.driver = self.driver_pool.lease()
+            else:
+                self.driver = create_driver()
+                print("✅ WebDriver started successfully")
+            if self.tabs:
+                self.session = TabSession(self.driver, self.tabs, lean=self.lean)
             return True
         except Exception as e:
             error_msg = f"Error setting up driver: {str(e)}\n{traceback.format_exc()}"
@@ -69,30 +216,91 @@ class LeetCodeBot:
             self.status = f"Error: {str(e)}"
             return False
 
-    def wait_for_element(self, by, selector, timeout=10, condition="presence"):
+    def release_driver(self):
+        driver = self.driver
+        self.driver = None
+        self.session = None
+        if not driver:
+            return
         try:
-            wait = WebDriverWait(self.driver, timeout)
+            if self.driver_pool:
+                self.driver_pool.release(driver)
+            else:
+                driver.quit()
+        except:
+            pass
+
+    def is_stopped(self):
+        return not self.running
+
+    def check_loaded(self, loaded, action='navigation'):
+        # A page that never became ready is checked for throttling or error pages, and counts
+        # as a success only once it is ready
+        if loaded:
+            self.rate.succeeded(action)
+            return
+        reason = self.rate.check_page(self.driver, action)
+        if reason:
+            raise Exception(f"Throttled by the site ({reason})")
+
+    def record_page_weight(self, page):
+        if not self.lean or not self.driver:
+            return
+        try:
+            self.lean.collect(self.driver, page)
+        except Exception as e:
+            print(f"Error collecting network stats: {str(e)}")
+
+    def wait_for_element(self, by, selector, timeout=None, condition="presence", phase=None):
+        try:
+            EC = lazy_import('selenium.webdriver.support.expected_conditions')
             if condition == "clickable":
-                return wait.until(EC.element_to_be_clickable((by, selector)))
+                expected = EC.element_to_be_clickable((by, selector))
             elif condition == "visible":
-                return wait.until(EC.visibility_of_element_located((by, selector)))
+                expected = EC.visibility_of_element_located((by, selector))
             else:
-                return wait.until(EC.presence_of_element_located((by, selector)))
+                expected = EC.presence_of_element_located((by, selector))
+            return self.waits.until(self.driver, phase or selector, expected, timeout=timeout)
+        except Cancelled:
+            raise
         except Exception as e:
             print(f"Error waiting for element {selector}: {str(e)}")
             return None
 
+    def wait_for_page(self, phase, script, *args, timeout=None):
+        # Returns as soon as the readiness script holds instead of sleeping a fixed time
+        try:
+            return self.waits.until_js(self.driver, phase, script, *args, timeout=timeout)
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"Error waiting for {phase}: {str(e)}")
+            return None
+
     def get_random_problem(self):
         try:
             self.status = "Finding a random problem..."
             self.is_loading = True
+
+            if self.next_problem:
+                problem, self.next_problem = self.next_problem, None
+                return problem
+
+            # A local catalog lookup avoids loading the problemset page at all
+            if self.catalog:
+                problem = self.pick_from_catalog()
+                if problem:
+                    return problem
             
             if not self.driver:
                 raise Exception("WebDriver not initialized")
 
             # Go to problems page
-            self.driver.get("https://leetcode.com/problemset/all/")
-            time.sleep(3)
+            if not self.rate.acquire('navigation', self.is_stopped):
+                return None
+            self.driver.get(f"{self.base_url}/problemset/all/")
+            self.check_loaded(self.wait_for_page('problem_list', PROBLEM_ROWS_READY))
+            self.record_page_weight('problemset')
 
             # Get all problem links using JavaScript
             problems = self.driver.execute_script("""
@@ -112,7 +320,7 @@ class LeetCodeBot:
                             if (href && title && difficulty) {
                                 problems.push({
                                     title: title,
-                                    url: 'https://leetcode.com' + href,
+                                    url: arguments[0] + href,
                                     difficulty: difficulty
                                 });
                             }
@@ -123,7 +331,7 @@ class LeetCodeBot:
                 }
                 
                 return problems;
-            """)
+            """, self.base_url)
             
             if not problems:
                 # Try alternative selector
@@ -144,7 +352,7 @@ class LeetCodeBot:
                             if (href && title) {
                                 problems.push({
                                     title: title,
-                                    url: 'https://leetcode.com' + href,
+                                    url: arguments[0] + href,
                                     difficulty: difficulty
                                 });
                             }
@@ -154,7 +362,7 @@ class LeetCodeBot:
                     }
                     
                     return problems;
-                """)
+                """, self.base_url)
 
             if not problems:
                 raise Exception("No problems found")
@@ -163,8 +371,27 @@ class LeetCodeBot:
             free_problems = [p for p in problems if not p['url'].endswith('?envType=study-plan-v2&envId=premium-algo-100')]
             if not free_problems:
                 raise Exception("No free problems found")
-            
-            return random.choice(free_problems)
+
+            for p in free_problems:
+                p['slug'] = slug_from_url(p['url'])
+
+            if self.catalog:
+                # Seed the catalog with what we scraped and let it apply the filters
+                self.catalog.add_problems(free_problems)
+                problem = self.catalog.pick(self.difficulty)
+                if problem:
+                    return problem
+
+            if self.difficulty:
+                free_problems = [p for p in free_problems if p['difficulty'] == self.difficulty] or free_problems
+
+            # Skip problems another worker has already taken
+            random.shuffle(free_problems)
+            for p in free_problems:
+                if self.claims.claim(p['slug']):
+                    return p
+
+            raise Exception("No unclaimed problems found")
 
         except Exception as e:
             error_msg = f"Error getting random problem: {str(e)}\n{traceback.format_exc()}"
@@ -174,337 +401,676 @@ class LeetCodeBot:
         finally:
             self.is_loading = False
 
-    def get_problem_description(self):
+    def pick_from_catalog(self):
+        try:
+            self.catalog.refresh_if_stale()
+            return self.catalog.pick(self.difficulty)
+        except Exception as e:
+            print(f"Error picking problem from catalog: {str(e)}")
+            return None
+
+    def fetch_problem_details(self, problem):
+        # Description and starter code as structured data over plain HTTP, no page parsing
+        if problem.get('description'):
+            return problem['description']
+        if not self.fetcher:
+            return None
+        try:
+            slug = problem.get('slug') or slug_from_url(problem['url'])
+            details = self.fetcher.fetch_problem(slug)
+            problem['slug'] = slug
+            problem['description'] = details['description']
+            problem['starter_code'] = details['starter_code']
+            problem['example_testcases'] = details['example_testcases']
+            problem['description_parts'] = details['description_parts']
+            return problem['description']
+        except Exception as e:
+            print(f"Error fetching problem details: {str(e)}")
+            return None
+
+    def get_problem_description(self, problem=None):
         try:
             # Wait for the content to load
-            time.sleep(3)
-            
-            # Try multiple approaches to get the problem description
-            description = self.driver.execute_script("""
-                // Try different selectors for problem description
-                const selectors = [
-                    'div[data-track-load="description_content"]',
-                    'div[class*="description"]',
-                    'div[role="tabpanel"]',
-                    'div[data-cy="question-title"]',
-                    'div._1l1MA' // Common LeetCode class for description
-                ];
-                
-                for (const selector of selectors) {
-                    const element = document.querySelector(selector);
-                    if (element && element.textContent.trim()) {
-                        return element.textContent.trim();
+            self.wait_for_page('description', DESCRIPTION_READY)
+
+            # Only the description subtree crosses the wire, not the whole page
+            parts = description_parts(self.driver.execute_script(DESCRIPTION_HTML, css_selectors()))
+            if not parts:
+                # Fallback: parse just the candidate containers out of the page source
+                parts = extract_description(self.driver.page_source)
+            if not parts:
+                return None
+
+            if problem is not None:
+                problem['description_parts'] = parts
+            return parts['text']
+
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"Error getting problem description: {str(e)}")
+            return None
+
+    def open_problem(self, problem, trace=None):
+        start = time.perf_counter()
+        with metrics.span('navigation', trace) as span:
+            self.open_slug = problem.get('slug') or slug_from_url(problem['url'])
+            mode = self.navigate(problem["url"])
+            loaded = self.wait_for_page('editor', EDITOR_READY, self.open_slug)
+            if not loaded:
+                span.fail()
+            self.check_loaded(loaded)
+            self.record_page_weight('problem')
+
+        with metrics.span('language', trace) as span:
+            # A remembered language (or an in-app route) leaves nothing to select
+            if not self.python_selected():
+                self.select_python()
+                if not self.wait_for_page('language', PYTHON_SELECTED, self.open_slug):
+                    span.fail()
+        if self.session:
+            self.session.remember_language()
+
+        seconds = time.perf_counter() - start
+        metrics.page_ready_seconds.observe(seconds, mode=mode)
+        if trace is not None:
+            trace['page_ready'] = round(seconds, 4)
+            trace['navigation_mode'] = mode
+        if self.session:
+            self.session.record(mode, seconds)
+
+    def navigate(self, url):
+        # Returns how the problem was reached: 'preloaded', 'client' (in-app route) or 'full'
+        session = self.session
+        if session and session.switch_to_preloaded(url):
+            # Its navigation token was taken when the preload started
+            return 'preloaded'
+        if not self.rate.acquire('navigation', self.is_stopped):
+            raise Cancelled('navigation')
+        if session and session.route(url):
+            if self.wait_for_page('route', ROUTE_DONE, url_path(url), slug_from_url(url)) is True:
+                return 'client'
+            print(f"In-app route to {url} failed, loading the page instead")
+        self.driver.get(url)
+        return 'full'
+
+    def python_selected(self):
+        try:
+            return bool(self.driver.execute_script(PYTHON_SELECTED, self.open_slug))
+        except Exception:
+            return False
+
+    def upcoming_problem(self):
+        if self.pipeline:
+            return self.pipeline.peek('submit')
+        if self.catalog and not self.next_problem and self.solved_total < self.problem_count:
+            self.next_problem = self.pick_from_catalog()
+        return self.next_problem
+
+    def preload_next(self):
+        # Called once a solution is submitted, so the next page loads while the verdict is pending
+        if not self.session or self.session.tabs < 2 or self.is_stopped():
+            return
+        problem = self.upcoming_problem()
+        if problem and self.rate.try_acquire('navigation'):
+            self.session.preload(problem['url'])
+
+    def release_next_problem(self):
+        problem, self.next_problem = self.next_problem, None
+        if problem and self.catalog and problem.get('slug'):
+            self.catalog.release(problem['slug'])
+
+    def select_python(self):
+        # Select Python3 using JavaScript
+        self.driver.execute_script("""
+            // Try multiple approaches to select Python
+            const attempts = [
+                // Try language selector button
+                () => {
+                    const buttons = Array.from(document.querySelectorAll('button'));
+                    const langButton = buttons.find(b => 
+                        b.textContent.includes('Python') || 
+                        b.getAttribute('data-cy') === 'lang-select' ||
+                        b.className.includes('language')
+                    );
+                    if (langButton) {
+                        langButton.click();
+                        return true;
                     }
+                    return false;
+                },
+                // Try direct language selection
+                () => {
+                    const pythonOption = Array.from(document.querySelectorAll('div')).find(
+                        div => div.textContent.includes('Python3')
+                    );
+                    if (pythonOption) {
+                        pythonOption.click();
+                        return true;
+                    }
+                    return false;
                 }
+            ];
+
+            // Try each attempt
+            for (const attempt of attempts) {
+                if (attempt()) break;
+            }
+        """)
+
+    def set_editor_content(self, solution):
+        # Set editor content using JavaScript
+        return self.driver.execute_script(ACTIVE_MODEL + """
+            // Try multiple approaches to set editor content
+            const setEditorContent = (content) => {
+                // Try Monaco Editor
+                try {
+                    const editor = activeModel(arguments[1]);
+                    if (editor) {
+                        editor.setValue(content);
+                        return true;
+                    }
+                } catch (e) {}
                 
-                // If no selector works, try to find any div with substantial content
-                const contentDivs = Array.from(document.querySelectorAll('div')).filter(
-                    div => div.textContent.length > 100 && 
-                           div.textContent.includes('Example') &&
-                           !div.querySelector('textarea, input')
-                );
+                // Try CodeMirror
+                try {
+                    const cm = document.querySelector('.CodeMirror');
+                    if (cm && cm.CodeMirror) {
+                        cm.CodeMirror.setValue(content);
+                        return true;
+                    }
+                } catch (e) {}
                 
-                return contentDivs.length > 0 ? contentDivs[0].textContent.trim() : null;
-            """)
-            
-            if not description:
-                # Fallback to BeautifulSoup if JavaScript approach fails
-                page_source = self.driver.page_source
-                soup = BeautifulSoup(page_source, 'html.parser')
+                // Try ace editor
+                try {
+                    const ace = window.ace.edit(document.querySelector('#ace-editor'));
+                    if (ace) {
+                        ace.setValue(content);
+                        return true;
+                    }
+                } catch (e) {}
                 
-                possible_containers = [
-                    soup.find('div', {'data-track-load': 'description_content'}),
-                    soup.find('div', {'class': lambda x: x and 'description' in x.lower()}),
-                    soup.find('div', {'role': 'tabpanel'}),
-                    soup.find('div', {'data-cy': 'question-title'}),
-                    soup.find('div', {'class': '_1l1MA'})
-                ]
+                // Try contenteditable div
+                try {
+                    const editor = document.querySelector('[contenteditable="true"]');
+                    if (editor) {
+                        editor.textContent = content;
+                        return true;
+                    }
+                } catch (e) {}
                 
-                for container in possible_containers:
-                    if container and container.get_text().strip():
-                        description = container.get_text().strip()
-                        break
+                // Try textarea
+                try {
+                    const textarea = document.querySelector('textarea[class*="editor"]');
+                    if (textarea) {
+                        textarea.value = content;
+                        const event = new Event('input', { bubbles: true });
+                        textarea.dispatchEvent(event);
+                        return true;
+                    }
+                } catch (e) {}
+                
+                return false;
+            };
             
-            return description
+            return setEditorContent(arguments[0]);
+        """, solution, self.open_slug)
 
-        except Exception as e:
-            print(f"Error getting problem description: {str(e)}")
-            return None
+    def submit_solution(self):
+        # Watch from here on: verdicts already on the page belong to an earlier submission
+        install_observer(self.driver)
 
-    def solve_problem(self, problem):
-        try:
-            self.status = f"Solving: {problem['title']}"
-            self.driver.get(problem["url"])
-            time.sleep(5)
-
-            # Select Python3 using JavaScript
-            self.driver.execute_script("""
-                // Try multiple approaches to select Python
-                const attempts = [
-                    // Try language selector button
-                    () => {
-                        const buttons = Array.from(document.querySelectorAll('button'));
-                        const langButton = buttons.find(b => 
-                            b.textContent.includes('Python') || 
-                            b.getAttribute('data-cy') === 'lang-select' ||
-                            b.className.includes('language')
-                        );
-                        if (langButton) {
-                            langButton.click();
-                            return true;
-                        }
-                        return false;
-                    },
-                    // Try direct language selection
-                    () => {
-                        const pythonOption = Array.from(document.querySelectorAll('div')).find(
-                            div => div.textContent.includes('Python3')
-                        );
-                        if (pythonOption) {
-                            pythonOption.click();
-                            return true;
-                        }
-                        return false;
+        # Submit solution using JavaScript
+        self.driver.execute_script("""
+            // Try multiple approaches to find and click submit button
+            const attempts = [
+                // Try data-cy attribute
+                () => {
+                    const button = document.querySelector('[data-cy="submit-code-btn"]');
+                    if (button) {
+                        button.click();
+                        return true;
                     }
-                ];
-
-                // Try each attempt
-                for (const attempt of attempts) {
-                    if (attempt()) break;
-                }
-            """)
-            time.sleep(2)
-
-            description = self.get_problem_description()
-            if not description:
-                raise Exception("Could not get problem description")
-
-            solution = self.generate_solution(problem['title'], description)
-            if not solution:
-                raise Exception("Could not generate solution")
-
-            # Set editor content using JavaScript
-            self.driver.execute_script("""
-                // Try multiple approaches to set editor content
-                const setEditorContent = (content) => {
-                    // Try Monaco Editor
-                    try {
-                        const editor = monaco.editor.getModels()[0];
-                        if (editor) {
-                            editor.setValue(content);
-                            return true;
-                        }
-                    } catch (e) {}
-                    
-                    // Try CodeMirror
-                    try {
-                        const cm = document.querySelector('.CodeMirror');
-                        if (cm && cm.CodeMirror) {
-                            cm.CodeMirror.setValue(content);
-                            return true;
-                        }
-                    } catch (e) {}
-                    
-                    // Try ace editor
-                    try {
-                        const ace = window.ace.edit(document.querySelector('#ace-editor'));
-                        if (ace) {
-                            ace.setValue(content);
-                            return true;
-                        }
-                    } catch (e) {}
-                    
-                    // Try contenteditable div
-                    try {
-                        const editor = document.querySelector('[contenteditable="true"]');
-                        if (editor) {
-                            editor.textContent = content;
-                            return true;
-                        }
-                    } catch (e) {}
-                    
-                    // Try textarea
-                    try {
-                        const textarea = document.querySelector('textarea[class*="editor"]');
-                        if (textarea) {
-                            textarea.value = content;
-                            const event = new Event('input', { bubbles: true });
-                            textarea.dispatchEvent(event);
-                            return true;
-                        }
-                    } catch (e) {}
-                    
                     return false;
-                };
-                
-                return setEditorContent(arguments[0]);
-            """, solution)
-            
-            time.sleep(2)
-
-            # Submit solution using JavaScript
-            self.driver.execute_script("""
-                // Try multiple approaches to find and click submit button
-                const attempts = [
-                    // Try data-cy attribute
-                    () => {
-                        const button = document.querySelector('[data-cy="submit-code-btn"]');
-                        if (button) {
-                            button.click();
-                            return true;
-                        }
-                        return false;
-                    },
-                    // Try button text content
-                    () => {
-                        const buttons = Array.from(document.querySelectorAll('button'));
-                        const submitButton = buttons.find(b => 
-                            b.textContent.includes('Submit') || 
-                            b.className.includes('submit')
-                        );
-                        if (submitButton) {
-                            submitButton.click();
-                            return true;
-                        }
-                        return false;
+                },
+                // Try button text content
+                () => {
+                    const buttons = Array.from(document.querySelectorAll('button'));
+                    const submitButton = buttons.find(b => 
+                        b.textContent.includes('Submit') || 
+                        b.className.includes('submit')
+                    );
+                    if (submitButton) {
+                        submitButton.click();
+                        return true;
                     }
-                ];
-
-                // Try each attempt
-                for (const attempt of attempts) {
-                    if (attempt()) break;
+                    return false;
                 }
-            """)
-            
-            time.sleep(5)
-
-            # Check result using JavaScript
-            result = self.driver.execute_script("""
-                // Try multiple approaches to find success message
-                const attempts = [
-                    // Try success class
-                    () => {
-                        const element = document.querySelector('.text-success, .success');
-                        return element ? element.textContent : null;
-                    },
-                    // Try data attributes
-                    () => {
-                        const element = document.querySelector('[data-state="success"]');
-                        return element ? element.textContent : null;
-                    },
-                    // Try text content
-                    () => {
-                        const elements = Array.from(document.querySelectorAll('div, span'));
-                        const successElement = elements.find(el => 
-                            (el.textContent.includes('Accepted') || el.textContent.includes('Success')) &&
-                            (el.className.includes('success') || el.className.includes('text-success'))
-                        );
-                        return successElement ? successElement.textContent : null;
-                    }
-                ];
+            ];
 
-                // Try each attempt
-                for (const attempt of attempts) {
-                    const result = attempt();
-                    if (result) return result;
-                }
-                
-                return null;
-            """)
+            // Try each attempt
+            for (const attempt of attempts) {
+                if (attempt()) break;
+            }
+        """)
 
-            if result and "Accepted" in result:
-                problem["solution"] = solution
-                self.solved_problems.append(problem)
-                return True
+    def get_result(self):
+        # Resolves the moment a verdict element appears, or with 'Timed Out' at the deadline
+        verdict = wait_for_verdict(self.driver, timeout=self.waits.timeout_for('verdict'), cancel=self.is_stopped)
+        self.waits.record('verdict', verdict['seconds'], verdict['status'] != TIMED_OUT)
+        return verdict
+
+    def solve_problem(self, problem, solution=None):
+        trace = self.trace_for(problem)
+        outcome = 'error'
+        submitted = None
+        metrics.attempts.inc()
+        try:
+            self.status = f"Solving: {problem['title']}"
+            self.open_problem(problem, trace)
+
+            # The pipelined loop hands in a solution (or ranked candidates) generated ahead of time
+            candidates = solution if isinstance(solution, list) else [solution] if solution else None
+            if candidates is None:
+                with metrics.span('description', trace) as span:
+                    description = self.fetch_problem_details(problem) or self.get_problem_description(problem)
+                    if not description:
+                        span.fail()
+                        raise Exception("Could not get problem description")
+                problem['description'] = description
+
+                solution, skip = self.lookup_solution(problem)
+                if skip:
+                    outcome = 'skipped'
+                    self.status = f"Skipping {problem['title']}: cached solution was rejected"
+                    return False
+
+                if solution:
+                    candidates = [solution]
+                else:
+                    with metrics.span('generation', trace) as span:
+                        candidates = self.generate_candidates(problem)
+                        if not candidates:
+                            span.fail()
+                            raise Exception("Could not generate solution")
+                    self.cache_solution(problem, candidates[0])
+
+                    candidates = self.filter_validated(problem, candidates)
+                    if not candidates:
+                        outcome = 'failed_validation'
+                        self.status = f"Generated solution for {problem['title']} failed the examples, skipping submit"
+                        return False
+
+            # Rejected candidates are replaced in the editor and resubmitted without reloading the page
+            for index, candidate in enumerate(candidates):
+                if index:
+                    self.status = f"Submitting candidate {index + 1}/{len(candidates)} for {problem['title']}"
+                submitted = candidate
+                verdict = self.submit_candidate(candidate, trace)
+                trace['verdict'] = verdict['status']
+                trace['submissions'] = index + 1
+
+                if verdict['status'] == TIMED_OUT:
+                    # No verdict before the deadline says nothing about the solution itself
+                    outcome = 'timed_out'
+                    self.status = f"No verdict for {problem['title']} within {self.waits.timeout_for('verdict')}s"
+                    return False
+
+                self.record_submission(verdict['accepted'])
+                if self.validator:
+                    self.validator.record_submit(verdict['submit_seconds'])
+                self.cache_solution(problem, candidate, verdict=verdict['status'])
+
+                if verdict['accepted']:
+                    outcome = 'accepted'
+                    metrics.accepts.inc()
+                    problem["solution"] = candidate
+                    problem["runtime_ms"] = verdict['runtime_ms']
+                    problem["memory_mb"] = verdict['memory_mb']
+                    self.record_solved(problem)
+                    return True
+                outcome = 'rejected'
 
             return False
 
+        except Cancelled:
+            outcome = 'cancelled'
+            return False
         except Exception as e:
             error_msg = f"Error solving problem: {str(e)}\n{traceback.format_exc()}"
             print(error_msg)
             self.status = f"Error: {str(e)}"
             return False
+        finally:
+            self.finish_trace(problem, outcome, solution=submitted)
 
-    def generate_solution(self, problem_title, description):
+    def submit_candidate(self, solution, trace=None):
+        with metrics.span('editor_fill', trace) as span:
+            if not self.set_editor_content(solution):
+                span.fail()
+            self.wait_for_page('submit_ready', SUBMIT_READY)
+        if not self.rate.acquire('submission', self.is_stopped):
+            raise Cancelled('submission')
+        submit_start = time.perf_counter()
+        with metrics.span('submit', trace):
+            self.submit_solution()
+        self.preload_next()
+        with metrics.span('verdict', trace) as span:
+            verdict = self.get_result()
+            if verdict['status'] == TIMED_OUT:
+                span.fail()
+        self.check_loaded(verdict['status'] != TIMED_OUT, action='submission')
+        verdict['submit_seconds'] = time.perf_counter() - submit_start
+        return verdict
+
+    def record_submission(self, accepted):
+        metrics.submissions.inc()
+        with self.yield_lock:
+            self.yield_stats['submissions'] += 1
+            if accepted:
+                self.yield_stats['accepts'] += 1
+
+    def record_generated(self, tokens, candidates=1, viable=1):
+        metrics.generated_tokens.inc(tokens)
+        with self.yield_lock:
+            self.yield_stats['generated_tokens'] += tokens
+            self.yield_stats['candidates'] += candidates
+            self.yield_stats['viable'] += viable
+
+    def submission_yield(self):
+        with self.yield_lock:
+            stats = dict(self.yield_stats)
+        stats['best_of'] = self.best_of
+        stats['accepts_per_submission'] = round(stats['accepts'] / stats['submissions'], 3) if stats['submissions'] else None
+        stats['accepts_per_1k_tokens'] = round(stats['accepts'] / stats['generated_tokens'] * 1000, 3) if stats['generated_tokens'] else None
+        return stats
+
+    def generation_params(self):
+        return generation_params(self.best_of, self.prompts)
+
+    def lookup_solution(self, problem):
+        # Returns (solution, skip): Accepted and unverified solutions are reused, rejected ones never are
+        if not self.solution_cache or not problem.get('description'):
+            return None, False
+        slug = problem.get('slug') or slug_from_url(problem['url'])
+        entry = self.solution_cache.lookup(slug, problem['description'], self.generation_params())
+        if not entry:
+            return None, False
+        if entry['verdict'] and entry['verdict'] != ACCEPTED:
+            return None, self.solution_cache.rejected_policy == 'skip'
+        return entry['solution'], False
+
+    def cache_solution(self, problem, solution, verdict=None):
+        if not self.solution_cache or not solution or not problem.get('description'):
+            return
         try:
+            slug = problem.get('slug') or slug_from_url(problem['url'])
+            self.solution_cache.store(
+                slug,
+                problem['description'],
+                solution,
+                params=self.generation_params(),
+                verdict=verdict
+            )
+        except Exception as e:
+            print(f"Error caching solution: {str(e)}")
+
+    def passes_validation(self, problem, solution):
+        # Run the candidate against the description's examples before spending a submission on it
+        if not self.validator or not problem.get('description'):
+            return True
+        try:
+            result = self.validator.validate(solution, problem['description'], problem.get('starter_code'))
+        except Exception as e:
+            print(f"Error validating solution: {str(e)}")
+            return True
+        if result['status'] == 'failed':
+            print(f"Local validation failed for {problem['title']}: {result['passed']}/{result['total']} examples")
+            self.cache_solution(problem, solution, verdict='Failed validation')
+            return False
+        return True
+
+    def compile_prompt(self, problem):
+        compiled = self.prompts.compile(problem, getattr(self.generator, 'tokenizer', None))
+        trace = self.traces.get(problem['url'])
+        if trace is not None:
+            trace['prompt_tokens'] = compiled['tokens']
+            trace['raw_prompt_tokens'] = compiled['raw_tokens']
+        return compiled
+
+    def generate_solution(self, problem, cancel=None):
+        try:
+            compiled = self.compile_prompt(problem)
+            # A shared batcher lets concurrent callers ride along in one forward pass
+            if self.batcher:
+                solution, stats = self.batcher.generate(compiled['prompt'])
+                stats['raw_prompt_tokens'] = compiled['raw_tokens']
+                self.generation_stats.append(stats)
+                del self.generation_stats[:-20]
+                self.record_generated(stats['new_tokens'])
+                return solution
+
             if not self.generator:
                 raise Exception("CodeGen not initialized")
 
-            prompt = f"""
-            # Python solution for LeetCode problem: {problem_title}
-            # {description}
-            
-            def solution"""
-            
-            response = self.generator(
-                prompt,
-                max_length=500,
-                temperature=0.7,
-                top_p=0.95,
-                num_return_sequences=1,
-                pad_token_id=self.generator.tokenizer.eos_token_id
+            prompt = compiled['prompt']
+
+            # Stream tokens and stop as soon as the function body is complete
+            text, stats = generate_streaming(
+                self.generator, prompt, cancel=cancel or self.is_stopped, inputs=compiled['inputs']
             )
+            stats['raw_prompt_tokens'] = compiled['raw_tokens']
+            self.generation_stats.append(stats)
+            del self.generation_stats[:-20]
+            self.record_generated(stats['new_tokens'])
+            if stats['cancelled']:
+                raise Cancelled('generation')
             
-            solution = response[0]['generated_text']
-            solution = re.sub(r'^.*?def', 'def', solution, flags=re.DOTALL)
-            return solution.strip()
+            return extract_solution(text)
+        except Cancelled:
+            raise
         except Exception as e:
             print(f"Error generating solution: {str(e)}")
             return None
 
+    def generate_candidates(self, problem, cancel=None):
+        # Best-of-N: sample N solutions in one call, keep the ones that parse and define the
+        # entry point, ranked by mean token log-probability
+        if self.best_of <= 1:
+            solution = self.generate_solution(problem, cancel)
+            return [solution] if solution else []
+        try:
+            if not self.generator:
+                raise Exception("CodeGen not initialized")
+            compiled = self.compile_prompt(problem)
+            prompt = compiled['prompt']
+            candidates, stats = generate_candidates(
+                self.generator, prompt, self.best_of, cancel=cancel or self.is_stopped, inputs=compiled['inputs']
+            )
+            stats['raw_prompt_tokens'] = compiled['raw_tokens']
+            if stats['cancelled']:
+                raise Cancelled('generation')
+            ranked = rank_candidates(candidates, entry_point(problem.get('starter_code')))
+            stats['viable'] = len(ranked)
+            self.generation_stats.append(stats)
+            del self.generation_stats[:-20]
+            self.record_generated(stats['new_tokens'], candidates=len(candidates), viable=len(ranked))
+            return [candidate['solution'] for candidate in ranked]
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"Error generating candidates: {str(e)}")
+            return []
+
+    def filter_validated(self, problem, candidates):
+        if len(candidates) == 1:
+            return candidates if self.passes_validation(problem, candidates[0]) else []
+        if not self.validator or not problem.get('description'):
+            return candidates
+        try:
+            results = self.validator.validate_many(candidates, problem['description'], problem.get('starter_code'))
+        except Exception as e:
+            print(f"Error validating candidates: {str(e)}")
+            return candidates
+        # Order is kept, so the best-ranked passing candidate is still submitted first
+        passing = [c for c, result in zip(candidates, results) if result['status'] != 'failed']
+        if not passing:
+            self.cache_solution(problem, candidates[0], verdict='Failed validation')
+        return passing
+
+    def generate_solutions(self, problems, cancel=None):
+        # Batch several problems through the model; results keep input order. cancel defaults to
+        # the bot stopping; the pipeline passes its own, which also covers reaching the target
+        try:
+            if not self.generator:
+                raise Exception("CodeGen not initialized")
+
+            compiled = [self.compile_prompt(problem) for problem in problems]
+            solutions, stats = generate_batch(
+                self.generator,
+                [c['prompt'] for c in compiled],
+                max_batch_size=self.max_batch_size,
+                cancel=cancel or self.is_stopped,
+                lengths=[c['tokens'] for c in compiled]
+            )
+            self.batch_stats.extend(stats)
+            del self.batch_stats[:-20]
+            self.record_generated(
+                sum(batch['new_tokens'] for batch in stats),
+                candidates=len(problems),
+                viable=sum(1 for solution in solutions if solution)
+            )
+            if any(batch['cancelled'] for batch in stats):
+                raise Cancelled('generation')
+            return solutions
+        except Cancelled:
+            raise
+        except Exception as e:
+            print(f"Error generating solutions: {str(e)}")
+            return [None] * len(problems)
+
     def start_solving(self):
+        if not self.prepare():
+            self.end_run(0)
+            self.running = False
+            return
+
+        if self.pipelined and self.catalog:
+            return self.start_pipeline()
+
         solved_count = 0
-        
+        # Local to this loop: an empty selection or an error here is not the site throttling
+        retry = RetryDelay()
+
         while self.running and solved_count < self.problem_count:
             try:
-                problem = self.get_random_problem()
+                trace = self.new_trace()
+                with metrics.span('selection', trace) as span:
+                    problem = self.get_random_problem()
+                    if not problem:
+                        span.fail()
                 if not problem:
+                    if self.is_stopped():
+                        break
+                    metrics.retries.inc(reason='no_problem')
                     self.status = "Failed to find a problem, retrying..."
-                    time.sleep(5)
+                    retry.wait(self.is_stopped)
                     continue
 
                 self.current_problem = problem
+                self.trace_for(problem, trace)
                 
-                if self.solve_problem(problem):
+                solved = self.solve_problem(problem)
+                retry.reset()
+                if solved:
                     solved_count += 1
                     self.status = f"Solved {solved_count}/{self.problem_count} problems"
                 else:
+                    metrics.retries.inc(reason='unsolved')
                     self.status = "Failed to solve problem, trying next one..."
 
-                time.sleep(random.randint(3, 5))
-
             except Exception as e:
                 error_msg = f"Error in solving loop: {str(e)}\n{traceback.format_exc()}"
                 print(error_msg)
                 self.status = f"Error: {str(e)}"
-                time.sleep(5)
+                metrics.retries.inc(reason='error')
+                # Backs off exponentially while failures continue instead of a flat delay
+                retry.wait(self.is_stopped)
 
         self.status = f"Finished solving {solved_count} problems"
+        self.release_next_problem()
+        self.end_run(solved_count)
+        self.running = False
+        # Hand the browser back as soon as the run ends so the next bot can lease it
+        self.release_driver()
+
+    def start_pipeline(self):
+        # Overlap prefetching, generation and browser submission with bounded queues
+        self.pipeline = SolvePipeline(self)
+        solved_count = 0
+        try:
+            solved_count = self.pipeline.run()
+        except Exception as e:
+            error_msg = f"Error in solving pipeline: {str(e)}\n{traceback.format_exc()}"
+            print(error_msg)
+            self.status = f"Error: {str(e)}"
+
+        if not self.status.startswith("Error"):
+            self.status = f"Finished solving {solved_count} problems"
+        self.end_run(solved_count)
         self.running = False
+        self.release_driver()
 
     def get_status(self):
         return {
             'status': self.status,
             'is_loading': self.is_loading,
             'is_running': self.running,
-            'solved_problems': self.solved_problems
+            'solved_problems': list(self.solved_problems),
+            'solved_total': self.solved_total,
+            'waits': self.waits.summary(),
+            'pipeline': self.pipeline.stats() if self.pipeline else None,
+            'batches': self.batch_stats[-5:],
+            'generation': self.generation_stats[-5:],
+            'cache': self.solution_cache.stats() if self.solution_cache else None,
+            'validation': self.validator.stats() if self.validator else None,
+            'yield': self.submission_yield(),
+            'prompts': self.prompts.stats(),
+            'session': self.session.stats() if self.session else None
         }
 
     def get_current_problem(self):
         return self.current_problem
 
     def get_solved_problems(self):
-        return self.solved_problems
+        return list(self.solved_problems)
+
+    def cancel(self):
+        # Cooperative: waits, pacing, generation and the verdict check all watch running, so the
+        # run winds down on its own thread and hands its browser back itself
+        self.running = False
+        if self.pipeline:
+            self.pipeline.cancel()
 
     def stop(self):
         with self.lock:
-            self.running = False
-        if self.driver:
-            try:
-                self.driver.quit()
-            except:
-                pass
-            self.driver = None
+            self.cancel()
+            self.release_driver()
 
     def set_problem_count(self, count):
-        self.problem_count = count
\ No newline at end of file
+        self.problem_count = count
+
+    def set_pipelined(self, pipelined):
+        self.pipelined = bool(pipelined)
+
+    def set_best_of(self, best_of):
+        # The shared batcher decodes one sample per prompt, so batched workers generate one each
+        self.best_of = 1 if self.batcher else max(1, int(best_of or 1))
+
+    def set_journal(self, journal, run_id, owner=True):
+        self.journal = journal
+        self.run_id = run_id
+        self.owns_run = owner
+
+    def set_difficulty(self, difficulty):
+        self.difficulty = difficulty.upper() if difficulty else None
\ No newline at end of file
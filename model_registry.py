@@ -0,0 +1,111 @@
+from backends import backend_from_env
+from utils import get_rss_bytes, to_mb
+import gc
+import os
+import threading
+import time
+import traceback
+
+DEFAULT_MODEL = "Salesforce/codegen-350M-mono"
+
+
+class ModelRegistry:
+    def __init__(self, model_name=None, backend=None):
+        self.model_name = model_name or os.environ.get("CODEGEN_MODEL", DEFAULT_MODEL)
+        self.backend = backend or backend_from_env()
+        self.lock = threading.Lock()
+        self.generator = None
+        self.load_time = None
+        self.loaded_at = None
+        self.rss_before = None
+        self.rss_after = None
+        self.load_error = None
+        self.loads = 0
+        self.leases = 0
+        self.warm_thread = None
+
+    def get(self):
+        # Fast path: the pipeline is shared by every bot once loaded
+        generator = self.generator
+        if generator is not None:
+            self.leases += 1
+            return generator
+
+        with self.lock:
+            if self.generator is None:
+                self._load()
+            if self.generator is not None:
+                self.leases += 1
+            return self.generator
+
+    def _load(self):
+        try:
+            print(f"Loading {self.model_name} ({self.backend.name} backend)...")
+            self.rss_before = get_rss_bytes()
+            start = time.perf_counter()
+            self.generator = self.backend.load(self.model_name)
+            self.load_time = time.perf_counter() - start
+            self.loaded_at = time.time()
+            self.rss_after = get_rss_bytes()
+            self.load_error = None
+            self.loads += 1
+            print(f"✅ {self.model_name} loaded in {self.load_time:.2f}s")
+        except Exception as e:
+            error_msg = f"Warning: Could not initialize CodeGen: {str(e)}\n{traceback.format_exc()}"
+            print(error_msg)
+            self.generator = None
+            self.load_error = str(e)
+
+    def is_loaded(self):
+        return self.generator is not None
+
+    def warm(self, background=True):
+        if self.generator is not None:
+            return self.warm_thread
+        if not background:
+            self.get()
+            return None
+        if self.warm_thread and self.warm_thread.is_alive():
+            return self.warm_thread
+
+        self.warm_thread = threading.Thread(target=self.get, name="model-warmup")
+        self.warm_thread.daemon = True
+        self.warm_thread.start()
+        return self.warm_thread
+
+    def unload(self):
+        with self.lock:
+            if self.generator is None:
+                return False
+            self.generator = None
+            self.load_time = None
+            self.loaded_at = None
+        gc.collect()
+        self.rss_after = get_rss_bytes()
+        print(f"🧹 {self.model_name} unloaded")
+        return True
+
+    def stats(self):
+        rss_delta = None
+        if self.rss_before is not None and self.rss_after is not None:
+            rss_delta = self.rss_after - self.rss_before
+        return {
+            'model': self.model_name,
+            **self.backend.describe(),
+            'loaded': self.is_loaded(),
+            'loading': self.lock.locked() and self.generator is None,
+            'load_time': round(self.load_time, 3) if self.load_time is not None else None,
+            'loaded_at': self.loaded_at,
+            'loads': self.loads,
+            'leases': self.leases,
+            'rss_mb': to_mb(get_rss_bytes()),
+            'model_rss_mb': to_mb(rss_delta),
+            'error': self.load_error
+        }
+
+
+registry = ModelRegistry()
+
+
+def get_generator():
+    return registry.get()
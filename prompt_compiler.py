@@ -0,0 +1,164 @@
+from collections import OrderedDict
+from extractor import split_sections
+from generation import build_prompt
+import hashlib
+import json
+import os
+import re
+import threading
+
+WHITESPACE = re.compile(r'\s+')
+
+
+def normalize(text):
+    return WHITESPACE.sub(' ', (text or '').replace('\xa0', ' ')).strip()
+
+
+def signature_header(starter_code):
+    # "class Solution:" and the first method signature from the starter, without its stub body
+    lines = []
+    for line in (starter_code or '').split('\n'):
+        stripped = line.strip()
+        if not stripped or stripped.startswith('#'):
+            continue
+        lines.append(line.rstrip())
+        if stripped.startswith('def ') and stripped.endswith(':'):
+            return '\n'.join(lines) + '\n'
+    return None
+
+
+class PromptCompiler:
+    # Turns a problem into a compact prompt: whitespace collapsed, the statement first, then
+    # as many examples and constraints as fit the token budget, ending on the starter's
+    # signature. Compiled prompts, with their encoded ids, are cached by a hash of the problem
+    # text, so a retry or another candidate round doesn't compact or tokenize again.
+    def __init__(self, budget=384, max_examples=2, max_constraints=5, cache_size=256, compact=True):
+        self.budget = budget
+        self.max_examples = max_examples
+        self.max_constraints = max_constraints
+        self.cache_size = cache_size
+        self.compact = compact
+        self.lock = threading.Lock()
+        self.cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.compiled = 0
+        self.raw_tokens = 0
+        self.tokens = 0
+        self.last = None
+
+    def count(self, tokenizer, text):
+        if tokenizer is None:
+            # Before the model is loaded; close enough to compare prompts with each other
+            return len(text.split())
+        return len(tokenizer(text)['input_ids'])
+
+    def cache_key(self, problem, tokenizer):
+        text = json.dumps([problem['title'], problem.get('description'), problem.get('starter_code')])
+        return id(tokenizer), hashlib.sha1(text.encode('utf-8')).hexdigest()
+
+    def truncate(self, tokenizer, text, budget):
+        # Returns the text cut to the budget and its token count
+        words = text.split()
+        tokens = self.count(tokenizer, text)
+        if tokens <= budget:
+            return text, tokens
+        while words and tokens > budget:
+            words = words[:min(len(words) - 1, int(len(words) * budget / tokens))]
+            text = ' '.join(words) + ' ...'
+            tokens = self.count(tokenizer, text)
+        return text, tokens
+
+    def description_lines(self, tokenizer, problem):
+        description = problem.get('description') or ''
+        parts = problem.get('description_parts') or split_sections(description)
+        statement = normalize(parts.get('statement')) or normalize(description)
+        statement, used = self.truncate(tokenizer, statement, self.budget)
+        lines = [statement]
+
+        for example in parts.get('examples', [])[:self.max_examples]:
+            line = f"Example: Input: {normalize(example.get('input'))} Output: {normalize(example.get('output'))}"
+            cost = self.count(tokenizer, line)
+            if used + cost > self.budget:
+                break
+            lines.append(line)
+            used += cost
+
+        constraints = [normalize(c) for c in parts.get('constraints', [])]
+        constraints = [c for c in constraints if c][:self.max_constraints]
+        while constraints:
+            line = "Constraints: " + "; ".join(constraints)
+            if used + self.count(tokenizer, line) <= self.budget:
+                lines.append(line)
+                break
+            constraints.pop()
+        return lines
+
+    def compile(self, problem, tokenizer=None):
+        key = self.cache_key(problem, tokenizer)
+        with self.lock:
+            compiled = self.cache.get(key)
+            if compiled is not None:
+                self.cache.move_to_end(key)
+                self.hits += 1
+                return compiled
+            self.misses += 1
+
+        raw = build_prompt(problem['title'], problem.get('description') or '')
+        if self.compact:
+            header = signature_header(problem.get('starter_code')) or "def solution"
+            lines = [f"Python solution for LeetCode problem: {normalize(problem['title'])}"]
+            lines.extend(self.description_lines(tokenizer, problem))
+            prompt = ''.join(f"# {line}\n" for line in lines) + header
+        else:
+            prompt = raw
+
+        # Encoded once here; generation takes these ids instead of tokenizing the prompt again
+        inputs = tokenizer(prompt, return_tensors='pt') if tokenizer is not None else None
+        compiled = {
+            'prompt': prompt,
+            'inputs': inputs,
+            'raw_tokens': self.count(tokenizer, raw),
+            'tokens': int(inputs['input_ids'].shape[1]) if inputs is not None else self.count(None, prompt)
+        }
+        with self.lock:
+            self.cache[key] = compiled
+            while len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+            self.compiled += 1
+            self.raw_tokens += compiled['raw_tokens']
+            self.tokens += compiled['tokens']
+            self.last = {'raw_tokens': compiled['raw_tokens'], 'tokens': compiled['tokens']}
+        return compiled
+
+    def settings(self):
+        # Everything that changes the prompt text, and so the code generated from it
+        return {
+            'compact': self.compact,
+            'budget': self.budget,
+            'max_examples': self.max_examples,
+            'max_constraints': self.max_constraints
+        }
+
+    def stats(self):
+        with self.lock:
+            return {
+                'compact': self.compact,
+                'budget': self.budget,
+                'prompts': self.compiled,
+                'avg_raw_tokens': round(self.raw_tokens / self.compiled, 1) if self.compiled else None,
+                'avg_tokens': round(self.tokens / self.compiled, 1) if self.compiled else None,
+                'saved_ratio': round(1 - self.tokens / self.raw_tokens, 3) if self.raw_tokens else None,
+                'last': self.last,
+                'cache': {'size': len(self.cache), 'capacity': self.cache_size, 'hits': self.hits, 'misses': self.misses}
+            }
+
+
+def compiler_from_env():
+    return PromptCompiler(
+        budget=int(os.environ.get('PROMPT_BUDGET', 384)),
+        max_examples=int(os.environ.get('PROMPT_MAX_EXAMPLES', 2)),
+        max_constraints=int(os.environ.get('PROMPT_MAX_CONSTRAINTS', 5)),
+        cache_size=int(os.environ.get('PROMPT_CACHE_SIZE', 256)),
+        compact=os.environ.get('PROMPT_COMPACT', '1') == '1'
+    )
@@ -0,0 +1,275 @@
+from collections import deque
+from metrics import metrics
+import os
+import random
+import threading
+import time
+
+# Requests per minute and burst size per action type; one scheduler is shared by every
+# worker in the process, since the site limits the account and the IP, not the browser
+DEFAULT_LIMITS = {
+    'navigation': (20, 2),
+    'submission': (12, 1),
+    'api': (60, 5)
+}
+
+# Page text that means the site is throttling or blocking us rather than serving the page
+THROTTLE_CHECK = """
+    const title = (document.title || '').toLowerCase();
+    const body = document.body ? document.body.innerText.slice(0, 2000).toLowerCase() : '';
+    const signals = [
+        ['too many requests', 'too_many_requests'],
+        ['rate limit', 'rate_limited'],
+        ['attempted to run code too soon', 'submit_too_soon'],
+        ['you are submitting too fast', 'submit_too_soon'],
+        ['just a moment', 'challenge'],
+        ['checking your browser', 'challenge'],
+        ['access denied', 'access_denied'],
+        ['error 1015', 'rate_limited'],
+        ['502 bad gateway', 'server_error'],
+        ['503 service', 'server_error'],
+        ['504 gateway', 'server_error']
+    ];
+    for (const [text, reason] of signals) {
+        if (title.includes(text) || body.includes(text)) return reason;
+    }
+    return null;
+"""
+THROTTLE_STATUS = {429: 'too_many_requests', 502: 'server_error', 503: 'server_error', 504: 'server_error'}
+
+
+class TokenBucket:
+    def __init__(self, per_minute, burst):
+        # A rate of 0 (or less) means the action is not limited at all
+        self.unlimited = per_minute <= 0
+        self.limit = per_minute / 60.0
+        self.rate = self.limit
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+
+    def refill(self, now):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, now):
+        # Takes a token now and returns how long the caller has to wait before using it
+        if self.unlimited:
+            return 0.0
+        self.refill(now)
+        self.tokens -= 1
+        return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def try_take(self, now):
+        if self.unlimited:
+            return True
+        self.refill(now)
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+    def slow_down(self):
+        self.rate = max(self.limit / 4, self.rate / 2)
+
+    def speed_up(self):
+        self.rate = min(self.limit, self.rate + self.limit / 10)
+
+
+def sleep(seconds, cancel=None):
+    # Sliced so a stopped run gives the thread back quickly
+    deadline = time.monotonic() + seconds
+    while True:
+        if cancel and cancel():
+            return False
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return True
+        time.sleep(min(0.1, remaining))
+
+
+class RetryDelay:
+    # Exponential delay between one caller's own retries (nothing to pick, an error in the
+    # loop). Unlike RateScheduler.failed it says nothing about the site and holds no one else up
+    def __init__(self, base=1.0, maximum=30.0):
+        self.base = base
+        self.maximum = maximum
+        self.failures = 0
+
+    def wait(self, cancel=None):
+        delay = min(self.maximum, self.base * 2 ** self.failures)
+        self.failures += 1
+        return sleep(random.uniform(delay / 2, delay), cancel)
+
+    def reset(self):
+        self.failures = 0
+
+
+class RateScheduler:
+    def __init__(self, limits=None, backoff_base=2.0, backoff_max=120.0, recover_after=3, window=60):
+        limits = {**DEFAULT_LIMITS, **(limits or {})}
+        self.buckets = {action: TokenBucket(*limit) for action, limit in limits.items()}
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.recover_after = recover_after
+        self.window = window
+        self.lock = threading.Lock()
+        self.level = 0
+        self.streak = 0
+        self.blocked_until = 0.0
+        self.throttled_seconds = 0.0
+        self.throttle_events = 0
+        self.last_reason = None
+        self.started = time.monotonic()
+        self.actions = {}
+
+    def action_stats(self, action):
+        return self.actions.setdefault(action, {
+            'requests': 0, 'failures': 0, 'waited_seconds': 0.0, 'recent': deque(maxlen=500)
+        })
+
+    def sleep(self, seconds, cancel=None):
+        return sleep(seconds, cancel)
+
+    def wait_backoff(self, cancel=None):
+        with self.lock:
+            remaining = self.blocked_until - time.monotonic()
+        if remaining <= 0:
+            return True
+        start = time.monotonic()
+        finished = self.sleep(remaining, cancel)
+        waited = time.monotonic() - start
+        with self.lock:
+            self.throttled_seconds += waited
+        metrics.throttled_seconds.inc(waited)
+        return finished
+
+    def acquire(self, action, cancel=None):
+        # Waits out any backoff, then for a token from the action's bucket
+        if not self.wait_backoff(cancel):
+            return False
+        with self.lock:
+            bucket = self.buckets.get(action)
+            delay = bucket.reserve(time.monotonic()) if bucket else 0.0
+            stats = self.action_stats(action)
+            stats['waited_seconds'] += delay
+        if delay and not self.sleep(delay, cancel):
+            return False
+        with self.lock:
+            stats['requests'] += 1
+            stats['recent'].append(time.monotonic())
+        return True
+
+    def try_acquire(self, action):
+        # Takes a token only if one is free right now; for optional work such as preloading
+        now = time.monotonic()
+        with self.lock:
+            bucket = self.buckets.get(action)
+            if self.blocked_until > now or (bucket and not bucket.try_take(now)):
+                return False
+            stats = self.action_stats(action)
+            stats['requests'] += 1
+            stats['recent'].append(now)
+        return True
+
+    def succeeded(self, action):
+        with self.lock:
+            self.streak += 1
+            bucket = self.buckets.get(action)
+            if bucket:
+                bucket.speed_up()
+            if self.level and self.streak >= self.recover_after:
+                self.level -= 1
+                self.streak = 0
+
+    def failed(self, action, reason, retry_after=None):
+        # Exponential backoff with jitter; the bucket for the action also halves its rate
+        metrics.throttles.inc(action=action, reason=reason)
+        with self.lock:
+            self.streak = 0
+            self.level += 1
+            self.throttle_events += 1
+            self.last_reason = reason
+            self.action_stats(action)['failures'] += 1
+            bucket = self.buckets.get(action)
+            if bucket:
+                bucket.slow_down()
+            delay = min(self.backoff_max, self.backoff_base * 2 ** (self.level - 1))
+            delay = random.uniform(delay / 2, delay)
+            if retry_after:
+                delay = max(delay, min(self.backoff_max, retry_after))
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            return delay
+
+    def record_status(self, action, status, retry_after=None):
+        reason = THROTTLE_STATUS.get(status)
+        if reason:
+            self.failed(action, reason, retry_after=parse_retry_after(retry_after))
+        else:
+            self.succeeded(action)
+
+    def check_page(self, driver, action):
+        # Returns the throttle reason found on the current page, recording it as a failure; a page
+        # without one is not a success either, since it may simply not have loaded
+        try:
+            reason = driver.execute_script(THROTTLE_CHECK)
+        except Exception:
+            reason = None
+        if reason:
+            self.failed(action, reason)
+        return reason
+
+    def stats(self):
+        now = time.monotonic()
+        with self.lock:
+            actions = {}
+            for action in sorted(set(self.buckets) | set(self.actions)):
+                bucket = self.buckets.get(action)
+                stats = self.action_stats(action)
+                span = min(self.window, now - self.started)
+                recent = sum(1 for at in stats['recent'] if now - at <= self.window)
+                actions[action] = {
+                    'limit_per_minute': round(bucket.limit * 60, 2) if bucket and not bucket.unlimited else None,
+                    'current_per_minute': round(bucket.rate * 60, 2) if bucket and not bucket.unlimited else None,
+                    'burst': bucket.burst if bucket else None,
+                    'requests': stats['requests'],
+                    'failures': stats['failures'],
+                    'achieved_per_minute': round(recent / span * 60, 2) if span > 0 else None,
+                    'waited_seconds': round(stats['waited_seconds'], 2)
+                }
+            return {
+                'backoff_level': self.level,
+                'backoff_remaining': round(max(0.0, self.blocked_until - now), 2),
+                'throttle_events': self.throttle_events,
+                'throttled_seconds': round(self.throttled_seconds, 2),
+                'last_reason': self.last_reason,
+                'actions': actions
+            }
+
+
+def parse_retry_after(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        # HTTP-date values are rare here; the exponential delay covers them
+        return None
+
+
+def parse_limits(value):
+    # "navigation=20:2,submission=12:1" -> requests per minute and burst per action
+    limits = {}
+    for item in (value or '').split(','):
+        if '=' not in item:
+            continue
+        action, limit = item.split('=', 1)
+        per_minute, _, burst = limit.partition(':')
+        limits[action.strip()] = (float(per_minute), int(burst or 1))
+    return limits
+
+
+def rate_from_env():
+    return RateScheduler(
+        limits=parse_limits(os.environ.get('RATE_LIMITS')),
+        backoff_base=float(os.environ.get('BACKOFF_BASE', 2.0)),
+        backoff_max=float(os.environ.get('BACKOFF_MAX', 120.0))
+    )
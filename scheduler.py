@@ -0,0 +1,216 @@
+from catalog import ProblemClaims
+from events import EventLog
+from generation import BatchGenerator
+from model_registry import get_generator
+import threading
+import time
+import traceback
+
+
+def spread(total, workers):
+    # Split the problem count as evenly as possible, dropping workers with nothing to do
+    base, extra = divmod(total, workers)
+    return [base + (1 if i < extra else 0) for i in range(workers) if base or i < extra]
+
+
+class BotScheduler:
+    def __init__(self, workers, bot_factory, generator=None):
+        self.workers = workers
+        self.bot_factory = bot_factory
+        # The shared model by default; the benchmark passes its stub so no model is loaded
+        self.generator = generator
+        self.bots = []
+        self.threads = []
+        self.claims = ProblemClaims()
+        self.batcher = None
+        self.lock = threading.Lock()
+        # Workers publish into the scheduler's log so one stream covers the whole run
+        self.events = EventLog()
+        self.running = False
+        self.problem_count = 1
+        self.difficulty = None
+        self.pipelined = False
+        self.best_of = 1
+        self.journal = None
+        self.run_id = None
+        self.status = "Initialized"
+        self.started_at = None
+        self.finished_at = None
+
+    @property
+    def status(self):
+        return self._status
+
+    @status.setter
+    def status(self, value):
+        if value != getattr(self, '_status', None):
+            self._status = value
+            self.events.emit('status', {'status': value})
+
+    @property
+    def running(self):
+        return self._running
+
+    @running.setter
+    def running(self, value):
+        if value != getattr(self, '_running', None):
+            self._running = value
+            self.events.emit('running', {'is_running': value})
+
+    def set_problem_count(self, count):
+        self.problem_count = count
+
+    def set_difficulty(self, difficulty):
+        self.difficulty = difficulty
+
+    def set_pipelined(self, pipelined):
+        self.pipelined = bool(pipelined)
+
+    def set_best_of(self, best_of):
+        # Workers generate through the shared batcher, which decodes one sample per prompt
+        self.best_of = 1
+
+    def set_journal(self, journal, run_id, owner=True):
+        self.journal = journal
+        self.run_id = run_id
+
+    def create_bot(self, index, count):
+        try:
+            bot = self.bot_factory(claims=self.claims, batcher=self.batcher, events=self.events)
+        except Exception as e:
+            print(f"Error starting worker {index}: {str(e)}")
+            return
+        bot.set_problem_count(count)
+        bot.set_difficulty(self.difficulty)
+        bot.set_pipelined(self.pipelined)
+        bot.set_best_of(self.best_of)
+        if self.journal:
+            # Workers journal their attempts under the scheduler's run; the scheduler ends it
+            bot.set_journal(self.journal, self.run_id, owner=False)
+        bot.running = self.running
+        with self.lock:
+            self.bots.append(bot)
+        if bot.running:
+            bot.start_solving()
+        else:
+            # Stopped while this worker was starting up; hand its browser straight back
+            bot.stop()
+
+    def start_solving(self):
+        self.started_at = time.time()
+        try:
+            generator = self.generator or get_generator()
+            if generator:
+                # Concurrent workers share one model; batching lets their prompts share forward passes
+                self.batcher = BatchGenerator(generator, max_batch_size=self.workers)
+
+            counts = spread(self.problem_count, self.workers)
+            self.status = f"Running {len(counts)} workers"
+            for index, count in enumerate(counts):
+                thread = threading.Thread(target=self.create_bot, args=(index, count), name=f"bot-worker-{index}")
+                thread.daemon = True
+                thread.start()
+                self.threads.append(thread)
+
+            for thread in self.threads:
+                thread.join()
+
+            solved = self.count_solved()
+            if self.running:
+                self.status = f"Finished solving {solved} problems with {len(counts)} workers"
+        except Exception as e:
+            error_msg = f"Error in scheduler: {str(e)}\n{traceback.format_exc()}"
+            print(error_msg)
+            self.status = f"Error: {str(e)}"
+        finally:
+            if self.journal:
+                solved = self.count_solved()
+                try:
+                    self.journal.end(self.run_id, 'finished' if solved >= self.problem_count else 'stopped', solved)
+                except Exception as e:
+                    print(f"Error writing run journal: {str(e)}")
+            self.running = False
+            self.finished_at = time.time()
+            if self.batcher:
+                self.batcher.close()
+
+    def get_status(self):
+        with self.lock:
+            bots = list(self.bots)
+
+        workers = []
+        for index, bot in enumerate(bots):
+            workers.append({
+                'worker': index,
+                'status': bot.status,
+                'is_running': bot.running,
+                'problem_count': bot.problem_count,
+                'solved': bot.solved_total,
+                'current_problem': bot.get_current_problem(),
+                'session': bot.session.stats() if bot.session else None
+            })
+
+        solved_total = sum(worker['solved'] for worker in workers)
+        elapsed = (self.finished_at or time.time()) - self.started_at if self.started_at else 0
+        status = {
+            'status': self.status,
+            'is_loading': any(bot.is_loading for bot in bots),
+            'is_running': self.running,
+            'solved_problems': self.get_solved_problems(),
+            'solved_total': solved_total,
+            'workers': workers,
+            'aggregate': {
+                'workers': len(workers),
+                'active': sum(1 for worker in workers if worker['is_running']),
+                'problem_count': self.problem_count,
+                'solved': solved_total,
+                'solved_per_minute': round(solved_total / elapsed * 60, 2) if elapsed > 0 else None
+            },
+            'batches': [self.batcher.stats()] if self.batcher else []
+        }
+        submissions = sum(bot.submission_yield()['submissions'] for bot in bots)
+        accepts = sum(bot.submission_yield()['accepts'] for bot in bots)
+        status['aggregate']['accepts_per_submission'] = round(accepts / submissions, 3) if submissions else None
+        # Cache, validation and prompt stats come from components the workers share
+        if bots:
+            shared = bots[0].get_status()
+            for key in ('cache', 'validation', 'prompts'):
+                status[key] = shared.get(key)
+        return status
+
+    def get_current_problem(self):
+        with self.lock:
+            bots = list(self.bots)
+        for bot in bots:
+            if bot.running and bot.get_current_problem():
+                return bot.get_current_problem()
+        return None
+
+    def count_solved(self):
+        with self.lock:
+            return sum(bot.solved_total for bot in self.bots)
+
+    def get_solved_problems(self):
+        with self.lock:
+            bots = list(self.bots)
+        solved = []
+        for bot in bots:
+            solved.extend(bot.get_solved_problems())
+        return solved
+
+    def cancel(self):
+        self.running = False
+        with self.lock:
+            bots = list(self.bots)
+        for bot in bots:
+            bot.cancel()
+
+    def stop(self):
+        self.running = False
+        with self.lock:
+            bots = list(self.bots)
+        for bot in bots:
+            try:
+                bot.stop()
+            except Exception as e:
+                print(f"Error stopping worker: {str(e)}")
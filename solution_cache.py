@@ -0,0 +1,164 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+ACCEPTED = 'Accepted'
+
+
+def normalize_description(description):
+    return re.sub(r'\s+', ' ', description or '').strip().lower()
+
+
+def hash_text(text):
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_params(params):
+    return hash_text(json.dumps(params or {}, sort_keys=True, default=str))
+
+
+class SolutionCache:
+    def __init__(self, path="solutions.db", max_entries=5000, rejected_policy='regenerate'):
+        self.path = path
+        self.max_entries = max_entries
+        # 'regenerate' ignores known-rejected solutions, 'skip' avoids the problem entirely
+        self.rejected_policy = rejected_policy
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS solutions (
+                key TEXT PRIMARY KEY,
+                slug TEXT NOT NULL,
+                description_hash TEXT NOT NULL,
+                params_hash TEXT NOT NULL,
+                solution TEXT NOT NULL,
+                verdict TEXT,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                hits INTEGER NOT NULL DEFAULT 0
+            );
+            CREATE INDEX IF NOT EXISTS solutions_last_used ON solutions (last_used);
+        """)
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+        self.accepted_hits = 0
+        self.rejected_hits = 0
+        self.evictions = 0
+
+    def make_key(self, slug, description, params=None):
+        description_hash = hash_text(normalize_description(description))
+        params_hash = hash_params(params)
+        key = hash_text(f"{slug}\0{description_hash}\0{params_hash}")
+        return key, description_hash, params_hash
+
+    def lookup(self, slug, description, params=None):
+        key, _, _ = self.make_key(slug, description, params)
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT solution, verdict, hits FROM solutions WHERE key = ?", (key,)
+            ).fetchone()
+            if not row:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            solution, verdict, hits = row
+            if verdict == ACCEPTED:
+                self.accepted_hits += 1
+            elif verdict:
+                self.rejected_hits += 1
+            self.conn.execute(
+                "UPDATE solutions SET last_used = ?, hits = ? WHERE key = ?", (time.time(), hits + 1, key)
+            )
+            self.conn.commit()
+            return {'key': key, 'solution': solution, 'verdict': verdict}
+
+    def store(self, slug, description, solution, params=None, verdict=None):
+        key, description_hash, params_hash = self.make_key(slug, description, params)
+        now = time.time()
+        with self.lock:
+            self.conn.execute("""
+                INSERT INTO solutions (key, slug, description_hash, params_hash, solution, verdict, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                    solution = excluded.solution,
+                    verdict = CASE
+                        WHEN excluded.solution = solutions.solution THEN COALESCE(excluded.verdict, solutions.verdict)
+                        ELSE excluded.verdict
+                    END,
+                    last_used = excluded.last_used
+            """, (key, slug, description_hash, params_hash, solution, verdict, now, now))
+            self._evict()
+            self.conn.commit()
+        return key
+
+    def record_verdict(self, slug, description, solution, verdict, params=None):
+        # Re-storing keeps the solution that actually produced this verdict
+        return self.store(slug, description, solution, params=params, verdict=verdict)
+
+    def _evict(self):
+        if not self.max_entries:
+            return
+        count = self.conn.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+        overflow = count - self.max_entries
+        if overflow > 0:
+            # Least recently used entries go first
+            self.conn.execute("""
+                DELETE FROM solutions WHERE key IN (
+                    SELECT key FROM solutions ORDER BY last_used ASC LIMIT ?
+                )
+            """, (overflow,))
+            self.evictions += overflow
+
+    def warm_from_file(self, path, params=None):
+        # Accepts a JSON list or JSON lines of {slug, description, solution, verdict}
+        with open(path) as f:
+            text = f.read().strip()
+        if not text:
+            return 0
+        if text.startswith('['):
+            entries = json.loads(text)
+        else:
+            entries = [json.loads(line) for line in text.splitlines() if line.strip()]
+
+        loaded = 0
+        for entry in entries:
+            try:
+                self.store(
+                    entry['slug'],
+                    entry['description'],
+                    entry['solution'],
+                    params=entry.get('params', params),
+                    verdict=entry.get('verdict')
+                )
+                loaded += 1
+            except KeyError as e:
+                print(f"Skipping cache entry without {str(e)}")
+        print(f"✅ Warmed solution cache with {loaded} entries from {path}")
+        return loaded
+
+    def size(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'size': self.size(),
+            'max_entries': self.max_entries,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else None,
+            'accepted_hits': self.accepted_hits,
+            'rejected_hits': self.rejected_hits,
+            'evictions': self.evictions
+        }
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
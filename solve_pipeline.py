@@ -0,0 +1,277 @@
+from metrics import metrics
+from rate_limit import RetryDelay, sleep
+from waits import Cancelled
+import queue
+import threading
+import time
+import traceback
+
+
+class StageCancelled(Exception):
+    pass
+
+
+class SolvePipeline:
+    def __init__(self, bot, prefetch_depth=3, generation_depth=2, poll_interval=0.2):
+        self.bot = bot
+        self.poll_interval = poll_interval
+        self.cancelled = threading.Event()
+        # Set while a problem-list scrape is queued for the submission stage
+        self.scrape_pending = threading.Event()
+        # Between empty selections; local, since an empty catalog is not the site throttling
+        self.retry = RetryDelay()
+        # Bounded queues give backpressure: a full queue blocks the stage that feeds it
+        self.queues = {
+            'prefetch': queue.Queue(maxsize=prefetch_depth),
+            'submit': queue.Queue(maxsize=generation_depth)
+        }
+        self.active = {'prefetch': None, 'generate': None, 'submit': None}
+        self.threads = []
+        self.solved_count = 0
+        self.attempted = 0
+
+    def is_cancelled(self):
+        return self.cancelled.is_set() or not self.bot.running
+
+    def cancel(self):
+        self.cancelled.set()
+
+    def put(self, name, item):
+        while True:
+            if self.is_cancelled():
+                raise StageCancelled()
+            try:
+                self.queues[name].put(item, timeout=self.poll_interval)
+                return
+            except queue.Full:
+                continue
+
+    def get(self, name):
+        while True:
+            if self.is_cancelled():
+                raise StageCancelled()
+            try:
+                return self.queues[name].get(timeout=self.poll_interval)
+            except queue.Empty:
+                continue
+
+    def peek(self, name):
+        # The next queued problem, without taking it off the queue
+        q = self.queues[name]
+        with q.mutex:
+            item = q.queue[0] if q.queue else None
+        return item[0] if isinstance(item, tuple) else item
+
+    def run_stage(self, name, step):
+        try:
+            while not self.is_cancelled():
+                step()
+        except (StageCancelled, Cancelled):
+            pass
+        except Exception as e:
+            error_msg = f"Error in {name} stage: {str(e)}\n{traceback.format_exc()}"
+            print(error_msg)
+            self.bot.status = f"Error: {str(e)}"
+            self.cancel()
+        finally:
+            self.active[name] = None
+
+    def prefetch_step(self):
+        # Problem selection and descriptions come from the catalog and HTTP fetcher, never the browser
+        if self.scrape_pending.is_set():
+            # Waiting on the submission stage's scrape to refill the catalog
+            if not sleep(self.poll_interval, self.is_cancelled):
+                raise StageCancelled()
+            return
+        trace = self.bot.new_trace()
+        with metrics.span('selection', trace) as span:
+            problem = self.bot.pick_from_catalog()
+            if not problem:
+                span.fail()
+        if not problem:
+            metrics.retries.inc(reason='no_problem')
+            # Nothing to pick from the catalog; the submission stage owns the browser, so it
+            # scrapes the problem list (seeding the catalog) and solves what it finds inline
+            self.scrape_pending.set()
+            self.put('submit', (None, None))
+            if not self.retry.wait(self.is_cancelled):
+                raise StageCancelled()
+            return
+        self.retry.reset()
+        self.active['prefetch'] = problem['title']
+        trace = self.bot.trace_for(problem, trace)
+        try:
+            with metrics.span('description', trace) as span:
+                if not self.bot.fetch_problem_details(problem):
+                    span.fail()
+            self.put('prefetch', problem)
+        except StageCancelled:
+            self.release(problem)
+            raise
+        self.active['prefetch'] = None
+
+    def collect_batch(self):
+        # Take whatever is already prefetched, waiting at most max_batch_wait for more
+        batch = [self.get('prefetch')]
+        deadline = time.monotonic() + self.bot.max_batch_wait
+        while len(batch) < self.bot.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self.queues['prefetch'].get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def generate_step(self):
+        batch = self.collect_batch()
+        self.active['generate'] = ", ".join(problem['title'] for problem in batch)
+        try:
+            generated = {}
+            ready = []
+            for problem in list(batch):
+                if not problem.get('description'):
+                    continue
+                solution, skip = self.bot.lookup_solution(problem)
+                if skip:
+                    batch.remove(problem)
+                    self.bot.finish_trace(problem, 'skipped')
+                elif solution:
+                    generated[id(problem)] = solution
+                else:
+                    ready.append(problem)
+
+            if self.bot.best_of > 1:
+                # Candidates are sampled per problem; ranked lists go to the submission stage as-is
+                for problem in ready:
+                    with metrics.span('generation', self.bot.trace_for(problem)):
+                        candidates = self.bot.generate_candidates(problem, self.is_cancelled)
+                    if not candidates:
+                        continue
+                    self.bot.cache_solution(problem, candidates[0])
+                    candidates = self.bot.filter_validated(problem, candidates)
+                    if candidates:
+                        generated[id(problem)] = candidates
+                    else:
+                        batch.remove(problem)
+                        self.bot.finish_trace(problem, 'failed_validation')
+                ready = []
+
+            solutions = []
+            if ready:
+                with metrics.span('generation') as span:
+                    solutions = self.bot.generate_solutions(ready, self.is_cancelled)
+                for problem in ready:
+                    # Batch members share one forward pass, so each trace gets the whole batch time
+                    trace = self.bot.trace_for(problem)
+                    trace['phases']['generation'] = round(span.elapsed, 4)
+                    trace['batch_size'] = len(ready)
+            for problem, solution in zip(ready, solutions):
+                self.bot.cache_solution(problem, solution)
+                # Candidates that fail the examples never reach the browser
+                if solution and self.bot.passes_validation(problem, solution):
+                    generated[id(problem)] = solution
+                elif solution:
+                    batch.remove(problem)
+                    self.bot.finish_trace(problem, 'failed_validation')
+
+            for index, problem in enumerate(batch):
+                # Without a solution the submission stage falls back to scraping and generating inline
+                try:
+                    self.put('submit', (problem, generated.get(id(problem))))
+                except StageCancelled:
+                    for unsent in batch[index:]:
+                        self.release(unsent)
+                    raise
+        except StageCancelled:
+            raise
+        except Exception:
+            for problem in batch:
+                self.release(problem)
+            raise
+        self.active['generate'] = None
+
+    def scrape_problem(self):
+        trace = self.bot.new_trace()
+        try:
+            with metrics.span('selection', trace) as span:
+                problem = self.bot.get_random_problem()
+                if not problem:
+                    span.fail()
+        finally:
+            self.scrape_pending.clear()
+        if problem:
+            self.bot.trace_for(problem, trace)
+        return problem
+
+    def submit_step(self):
+        problem, solution = self.get('submit')
+        if problem is None:
+            problem = self.scrape_problem()
+            if not problem:
+                return
+        self.active['submit'] = problem['title']
+        self.bot.current_problem = problem
+        self.attempted += 1
+
+        if self.bot.solve_problem(problem, solution=solution):
+            self.solved_count += 1
+            self.bot.status = f"Solved {self.solved_count}/{self.bot.problem_count} problems"
+        else:
+            metrics.retries.inc(reason='unsolved')
+            self.bot.status = "Failed to solve problem, trying next one..."
+        self.active['submit'] = None
+
+        if self.solved_count >= self.bot.problem_count:
+            self.cancel()
+
+    def run(self):
+        stages = [
+            ('prefetch', self.prefetch_step),
+            ('generate', self.generate_step),
+            ('submit', self.submit_step)
+        ]
+        for name, step in stages:
+            thread = threading.Thread(target=self.run_stage, args=(name, step), name=f"pipeline-{name}")
+            thread.daemon = True
+            thread.start()
+            self.threads.append(thread)
+
+        for thread in self.threads:
+            thread.join()
+
+        self.release_unused()
+        return self.solved_count
+
+    def release_unused(self):
+        # Problems still queued were claimed but never attempted; hand them back to the catalog
+        for name in ('prefetch', 'submit'):
+            while True:
+                try:
+                    item = self.queues[name].get_nowait()
+                except queue.Empty:
+                    break
+                self.release(item[0] if isinstance(item, tuple) else item)
+        self.scrape_pending.clear()
+
+    def release(self, problem):
+        if problem is None:
+            return
+        self.bot.traces.pop(problem['url'], None)
+        if self.bot.catalog and problem.get('slug'):
+            self.bot.catalog.release(problem['slug'])
+
+    def queue_depths(self):
+        return {
+            name: {'depth': q.qsize(), 'capacity': q.maxsize}
+            for name, q in self.queues.items()
+        }
+
+    def stats(self):
+        return {
+            'queues': self.queue_depths(),
+            'active': dict(self.active),
+            'attempted': self.attempted,
+            'solved': self.solved_count
+        }
@@ -0,0 +1,174 @@
+from urllib.parse import urlparse
+from waits import ACTIVE_MODEL
+import threading
+
+# LeetCode keeps the editor language in localStorage, so setting it once per session opens
+# every later problem in Python3 without going through the language menu
+REMEMBER_LANGUAGE = """
+    try {
+        localStorage.setItem('global_lang', JSON.stringify('python3'));
+        return true;
+    } catch (e) {
+        return false;
+    }
+"""
+
+# What the page shows for the current problem: its description text and the editor model with
+# its version, so ROUTE_DONE can tell the new problem from the one routed away from
+ROUTE_STATE = ACTIVE_MODEL + """
+    const routeState = (slug) => {
+        const description = document.querySelector(
+            'div[data-track-load="description_content"], div[data-cy="question-title"]');
+        const state = {description: description ? description.textContent : null, model: null, version: null};
+        try {
+            state.model = activeModel(slug);
+            state.version = state.model.getVersionId ? state.model.getVersionId() : state.model.getValue();
+        } catch (e) {}
+        return state;
+    };
+"""
+
+# Moves to another problem through the page's own Next.js router, keeping the editor app
+# loaded; returns false when the page has no router, so the caller falls back to a full load
+ROUTE_TO = ROUTE_STATE + """
+    const router = window.next && window.next.router;
+    if (!router || typeof router.push !== 'function') return false;
+    window.__botRouteFrom = routeState(null);
+    window.__botRoute = 'pending';
+    Promise.resolve(router.push(arguments[0])).then(
+        (ok) => { window.__botRoute = ok === false ? 'error' : 'done'; },
+        () => { window.__botRoute = 'error'; }
+    );
+    return true;
+"""
+
+# The router settles before the page has re-rendered, and until then the old description and
+# editor model still satisfy the readiness checks; wait until both have changed
+ROUTE_DONE = ROUTE_STATE + """
+    if (window.__botRoute === 'error') return 'error';
+    if (window.__botRoute !== 'done' || !location.pathname.startsWith(arguments[0])) return false;
+    const from = window.__botRouteFrom || {};
+    const now = routeState(arguments[1]);
+    if (from.description !== null && (!now.description || now.description === from.description)) return false;
+    if (from.model && (!now.model || (now.model === from.model && now.version === from.version))) return false;
+    return true;
+"""
+
+# Starts loading a page in the current tab without waiting for it, unlike driver.get
+START_LOAD = "window.location.assign(arguments[0]); return true;"
+
+
+def url_path(url):
+    return urlparse(url).path
+
+
+class TabSession:
+    # One Chrome session with the editor app kept loaded: problems are opened through the
+    # in-app router, and with more than one tab the next problem loads in a spare tab while
+    # the active one waits for its verdict
+    def __init__(self, driver, tabs=1, history=200, lean=None):
+        self.driver = driver
+        self.tabs = max(1, tabs)
+        # CDP settings such as blocked URLs apply to one tab, so each new tab gets the profile too
+        self.lean = lean
+        self.history = history
+        self.lock = threading.Lock()
+        self.active = driver.current_window_handle
+        self.spare = []
+        # URL -> handle of the spare tab it is loading in
+        self.preloaded = {}
+        self.language_remembered = False
+        self.preloads = 0
+        self.wasted = 0
+        self.records = {}
+
+    def remember_language(self):
+        # localStorage is per origin, so this waits until a problem page is open
+        if self.language_remembered:
+            return
+        try:
+            self.language_remembered = bool(self.driver.execute_script(REMEMBER_LANGUAGE))
+        except Exception as e:
+            print(f"Error remembering the editor language: {str(e)}")
+
+    def route(self, url):
+        try:
+            return bool(self.driver.execute_script(ROUTE_TO, url_path(url)))
+        except Exception as e:
+            print(f"Error routing to {url}: {str(e)}")
+            return False
+
+    def switch_to_preloaded(self, url):
+        handle = self.preloaded.pop(url, None)
+        if handle is None:
+            return False
+        self.driver.switch_to.window(handle)
+        # The tab we leave keeps the old problem and takes the next preload
+        self.spare.remove(handle)
+        self.spare.append(self.active)
+        self.active = handle
+        return True
+
+    def spare_tab(self):
+        if len(self.spare) + 1 < self.tabs:
+            self.driver.switch_to.new_window('tab')
+            handle = self.driver.current_window_handle
+            self.spare.append(handle)
+            if self.lean:
+                self.lean.apply(self.driver)
+            return handle
+        # Reuse the spare tab whose preload is oldest, dropping that preload
+        handle = self.spare[0]
+        for url, loading in list(self.preloaded.items()):
+            if loading == handle:
+                del self.preloaded[url]
+                self.wasted += 1
+        self.spare.remove(handle)
+        self.spare.append(handle)
+        self.driver.switch_to.window(handle)
+        return handle
+
+    def preload(self, url):
+        if self.tabs < 2 or url in self.preloaded:
+            return False
+        try:
+            handle = self.spare_tab()
+            self.driver.execute_script(START_LOAD, url)
+            self.preloaded[url] = handle
+            self.preloads += 1
+            return True
+        except Exception as e:
+            print(f"Error preloading {url}: {str(e)}")
+            return False
+        finally:
+            # Waits and the verdict check run against the active tab
+            try:
+                self.driver.switch_to.window(self.active)
+            except Exception as e:
+                print(f"Error switching back to the active tab: {str(e)}")
+
+    def record(self, mode, seconds):
+        with self.lock:
+            recent = self.records.setdefault(mode, [])
+            recent.append(seconds)
+            del recent[:-self.history]
+
+    def stats(self):
+        with self.lock:
+            page_ready = {
+                mode: {
+                    'count': len(values),
+                    'avg': round(sum(values) / len(values), 3),
+                    'max': round(max(values), 3)
+                }
+                for mode, values in self.records.items() if values
+            }
+            return {
+                'tabs': self.tabs,
+                'open_tabs': len(self.spare) + 1,
+                'language_remembered': self.language_remembered,
+                'preloads': self.preloads,
+                'preloads_pending': len(self.preloaded),
+                'preloads_wasted': self.wasted,
+                'page_ready': page_ready
+            }
@@ -0,0 +1,82 @@
+import pytest
+
+requests = pytest.importorskip('requests')
+
+from benchmark.fake_site import RECORDINGS, FakeLeetCode
+from fetcher import LeetCodeFetcher
+from rate_limit import RateScheduler
+
+
+@pytest.fixture
+def site():
+    site = FakeLeetCode(problems=0, recordings=RECORDINGS).start()
+    yield site
+    site.stop()
+
+
+def make_fetcher(site, **kwargs):
+    host, port = site.server.server_address
+    return LeetCodeFetcher(base_url=f"http://{host}:{port}", **kwargs)
+
+
+def test_problem_list_from_recorded_response(site):
+    fetcher = make_fetcher(site)
+    problems = fetcher.fetch_problem_list()
+    assert [(p['slug'], p['difficulty'], p['paid_only']) for p in problems] == [
+        ('two-sum', 'EASY', False),
+        ('add-two-numbers', 'MEDIUM', False),
+        ('binary-tree-upside-down', 'MEDIUM', True)
+    ]
+
+
+def test_problem_details_from_recorded_response(site):
+    fetcher = make_fetcher(site)
+    problem = fetcher.fetch_problem('two-sum')
+    assert problem['title'] == 'Two Sum'
+    assert problem['difficulty'] == 'EASY'
+    assert problem['starter_code'].startswith('class Solution:\n    def twoSum(self')
+    assert 'indices of the two numbers' in problem['description']
+    assert problem['description_parts']['examples'][0]['output'] == '[0,1]'
+    with pytest.raises(Exception, match='not found'):
+        fetcher.fetch_problem('no-such-problem')
+
+
+def test_connections_are_reused(site):
+    fetcher = make_fetcher(site)
+    for _ in range(5):
+        fetcher.fetch_problem('two-sum')
+    fetcher.fetch_problem_list()
+    assert site.stats()['graphql'] == 5
+    assert site.stats()['connection'] == 1
+
+
+def test_server_errors_are_retried_by_the_session(site):
+    rate = RateScheduler()
+    fetcher = make_fetcher(site, rate=rate)
+    site.fail_next('graphql', [503])
+    assert fetcher.fetch_problem('add-two-numbers')['title'] == 'Add Two Numbers'
+    assert site.stats()['graphql'] == 2
+    assert rate.stats()['throttle_events'] == 0
+
+
+def test_exhausted_retries_back_off_the_scheduler(site):
+    rate = RateScheduler()
+    fetcher = make_fetcher(site, rate=rate, retries=1)
+    site.fail_next('problem_list', [502, 502])
+    with pytest.raises(requests.exceptions.RetryError):
+        fetcher.fetch_problem_list()
+    assert site.stats()['problem_list'] == 2
+    assert rate.stats()['last_reason'] == 'request_error'
+
+
+def test_rate_limited_responses_go_to_the_scheduler(site):
+    rate = RateScheduler()
+    fetcher = make_fetcher(site, rate=rate)
+    site.fail_next('graphql', [429], retry_after=7)
+    with pytest.raises(requests.exceptions.HTTPError):
+        fetcher.fetch_problem('two-sum')
+    # 429 is not retried by the session; the scheduler backs off every caller instead
+    assert site.stats()['graphql'] == 1
+    stats = rate.stats()
+    assert stats['last_reason'] == 'too_many_requests'
+    assert stats['backoff_remaining'] > 6
@@ -0,0 +1,65 @@
+import os
+import re
+import sys
+
+
+def get_rss_bytes(pid=None):
+    # Resident set size of a process, read from /proc where available
+    pid = pid or os.getpid()
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    if pid != os.getpid():
+        return None
+
+    try:
+        import resource
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is reported in bytes on macOS and kilobytes elsewhere
+        return usage if sys.platform == "darwin" else usage * 1024
+    except Exception:
+        return None
+
+
+def to_mb(num_bytes):
+    if num_bytes is None:
+        return None
+    return round(num_bytes / (1024 * 1024), 1)
+
+
+def get_child_pids(pid):
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def get_process_tree_rss_bytes(pid):
+    # Sum RSS over a process and all its descendants (e.g. chromedriver -> chrome)
+    total = None
+    pending = [pid]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        rss = get_rss_bytes(current)
+        if rss is not None:
+            total = (total or 0) + rss
+        pending.extend(get_child_pids(current))
+    return total
+
+
+def slug_from_url(url):
+    match = re.search(r"/problems/([^/?#]+)", url or "")
+    return match.group(1) if match else None
@@ -0,0 +1,247 @@
+from concurrent.futures import ThreadPoolExecutor
+import ast
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+EXAMPLE_PATTERN = re.compile(
+    r'Input:?\s*(?P<input>.*?)\s*Output:?\s*(?P<output>.*?)\s*(?=Explanation:|Example\s*\d*:|Constraints:|Follow[- ]up|Note:|$)',
+    re.DOTALL
+)
+ASSIGNMENT_PATTERN = re.compile(r'(?:^|,)\s*([A-Za-z_]\w*)\s*=\s*')
+UNSUPPORTED_TYPES = ('ListNode', 'TreeNode', 'Node', 'NestedInteger', 'Interval')
+
+# Runs inside the sandboxed interpreter: exec the candidate, call the entry point on every case
+RUNNER = r'''
+import json, sys
+
+def normalize(value):
+    if isinstance(value, tuple):
+        value = list(value)
+    if isinstance(value, list):
+        return [normalize(v) for v in value]
+    return value
+
+def same(actual, expected):
+    actual = normalize(actual)
+    if isinstance(expected, float) or isinstance(actual, float):
+        try:
+            return abs(float(actual) - float(expected)) <= 1e-5
+        except (TypeError, ValueError):
+            return False
+    if isinstance(expected, list) and isinstance(actual, list):
+        if len(actual) == len(expected) and all(same(a, e) for a, e in zip(actual, expected)):
+            return True
+        # Many problems accept any order ("return the indices in any order"); the judge
+        # settles the ones where order matters
+        return canonical(actual) == canonical(expected)
+    return actual == expected
+
+def canonical(value):
+    if isinstance(value, list):
+        return sorted((canonical(v) for v in value), key=repr)
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+job = json.loads(sys.stdin.read())
+try:
+    import resource
+    resource.setrlimit(resource.RLIMIT_CPU, (job['cpu_seconds'], job['cpu_seconds']))
+    memory = job['memory_mb'] * 1024 * 1024
+    resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+except (ImportError, ValueError, OSError):
+    pass
+
+namespace = {'__name__': '__candidate__'}
+from typing import *
+namespace.update({k: v for k, v in globals().items() if k[:1].isupper()})
+try:
+    exec(job['code'], namespace)
+except Exception as e:
+    print(json.dumps({'error': f'{type(e).__name__}: {e}', 'passed': 0}))
+    sys.exit(0)
+
+entry = job.get('entry')
+target = None
+if 'Solution' in namespace and isinstance(namespace['Solution'], type):
+    instance = namespace['Solution']()
+    if entry and hasattr(instance, entry):
+        target = getattr(instance, entry)
+if target is None:
+    for name in (entry, 'solution'):
+        if name and callable(namespace.get(name)):
+            target = namespace[name]
+            break
+if target is None:
+    print(json.dumps({'error': 'entry point not found', 'passed': 0}))
+    sys.exit(0)
+
+passed = 0
+failures = []
+for case in job['cases']:
+    try:
+        actual = target(*case['args'])
+        if same(actual, case['expected']):
+            passed += 1
+        else:
+            failures.append({'expected': case['expected'], 'actual': repr(actual)[:200]})
+    except Exception as e:
+        failures.append({'expected': case['expected'], 'error': f'{type(e).__name__}: {e}'[:200]})
+print(json.dumps({'passed': passed, 'failures': failures}))
+'''
+
+
+def parse_literal(text):
+    text = text.strip().rstrip(',').strip()
+    if not text:
+        raise ValueError("empty value")
+    # LeetCode examples use JSON-style literals
+    text = re.sub(r'\btrue\b', 'True', text)
+    text = re.sub(r'\bfalse\b', 'False', text)
+    text = re.sub(r'\bnull\b', 'None', text)
+    return ast.literal_eval(text)
+
+
+def parse_arguments(text):
+    matches = list(ASSIGNMENT_PATTERN.finditer(text))
+    if not matches:
+        return [parse_literal(text)]
+    args = []
+    for index, match in enumerate(matches):
+        end = matches[index + 1].start() if index + 1 < len(matches) else len(text)
+        args.append(parse_literal(text[match.end():end]))
+    return args
+
+
+def parse_examples(description):
+    cases = []
+    for match in EXAMPLE_PATTERN.finditer(description or ''):
+        try:
+            output = match.group('output').strip().split('\n')[0]
+            cases.append({
+                'args': parse_arguments(match.group('input').strip()),
+                'expected': parse_literal(output)
+            })
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            continue
+    # Every value has to survive the trip through JSON to the sandbox
+    return [case for case in cases if is_json_safe(case)]
+
+
+def is_json_safe(value):
+    try:
+        return json.loads(json.dumps(value)) == value
+    except (TypeError, ValueError):
+        return False
+
+
+def entry_point(starter_code):
+    if not starter_code:
+        return None
+    match = re.search(r'def\s+(\w+)\s*\(\s*self', starter_code)
+    return match.group(1) if match else None
+
+
+class PreSubmitValidator:
+    def __init__(self, workers=2, timeout=5, cpu_seconds=3, memory_mb=256, submit_estimate=8.0):
+        self.timeout = timeout
+        self.cpu_seconds = cpu_seconds
+        self.memory_mb = memory_mb
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="validator")
+        self.lock = threading.Lock()
+        self.counts = {'passed': 0, 'failed': 0, 'skipped': 0}
+        self.validation_time = 0.0
+        # Average cost of a browser submission, refined with measured round trips
+        self.submit_estimate = submit_estimate
+        self.submit_samples = 0
+
+    def run_cases(self, code, entry, cases):
+        # The runner applies the CPU and memory limits to itself before touching the candidate
+        job = json.dumps({
+            'code': code,
+            'entry': entry,
+            'cases': cases,
+            'cpu_seconds': self.cpu_seconds,
+            'memory_mb': self.memory_mb
+        })
+        with tempfile.TemporaryDirectory() as workdir:
+            try:
+                completed = subprocess.run(
+                    [sys.executable, '-I', '-c', RUNNER],
+                    input=job,
+                    capture_output=True,
+                    text=True,
+                    timeout=self.timeout,
+                    cwd=workdir,
+                    env={}
+                )
+            except subprocess.TimeoutExpired:
+                return {'passed': 0, 'error': f'timed out after {self.timeout}s'}
+
+        try:
+            return json.loads(completed.stdout.strip().splitlines()[-1])
+        except (IndexError, ValueError):
+            if completed.returncode < 0:
+                return {'passed': 0, 'error': f'killed by signal {-completed.returncode} (resource limit)'}
+            error = completed.stderr.strip().splitlines()[-1:] or [f'exit code {completed.returncode}']
+            return {'passed': 0, 'error': error[0][:200]}
+
+    def validate(self, code, description, starter_code=None):
+        start = time.perf_counter()
+        cases = parse_examples(description)
+        if not cases or not starter_code or any(t in starter_code for t in UNSUPPORTED_TYPES):
+            # Nothing we can check locally (or, without the starter, no way to tell the argument
+            # types are plain values); let the judge decide
+            result = {'status': 'skipped', 'passed': 0, 'total': len(cases)}
+        else:
+            outcome = self.run_cases(code, entry_point(starter_code), cases)
+            passed = outcome.get('passed', 0)
+            result = {
+                'status': 'passed' if passed == len(cases) and not outcome.get('error') else 'failed',
+                'passed': passed,
+                'total': len(cases),
+                'error': outcome.get('error'),
+                'failures': outcome.get('failures', [])[:3]
+            }
+        result['seconds'] = round(time.perf_counter() - start, 3)
+        self.record(result)
+        return result
+
+    def submit(self, code, description, starter_code=None):
+        return self.executor.submit(self.validate, code, description, starter_code)
+
+    def validate_many(self, candidates, description, starter_code=None):
+        futures = [self.submit(code, description, starter_code) for code in candidates]
+        return [future.result() for future in futures]
+
+    def record(self, result):
+        with self.lock:
+            self.counts[result['status']] += 1
+            self.validation_time += result['seconds']
+
+    def record_submit(self, seconds):
+        with self.lock:
+            self.submit_samples += 1
+            self.submit_estimate += (seconds - self.submit_estimate) / self.submit_samples
+
+    def stats(self):
+        with self.lock:
+            checked = self.counts['passed'] + self.counts['failed']
+            return {
+                'passed': self.counts['passed'],
+                'failed': self.counts['failed'],
+                'skipped': self.counts['skipped'],
+                'pass_rate': round(self.counts['passed'] / checked, 3) if checked else None,
+                'validation_seconds': round(self.validation_time, 2),
+                # Each locally rejected candidate is a submission round trip we never made
+                'time_saved_seconds': round(self.counts['failed'] * self.submit_estimate - self.validation_time, 2),
+                'submit_estimate': round(self.submit_estimate, 2)
+            }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
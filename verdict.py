@@ -0,0 +1,185 @@
+from solution_cache import ACCEPTED
+from waits import Cancelled
+import time
+
+VERDICTS = [
+    'Accepted',
+    'Wrong Answer',
+    'Time Limit Exceeded',
+    'Memory Limit Exceeded',
+    'Output Limit Exceeded',
+    'Runtime Error',
+    'Compile Error'
+]
+TIMED_OUT = 'Timed Out'
+
+# Installed just before Submit is clicked. Only result elements added or changed after that
+# count, so an earlier verdict left on the page is never taken, while a resubmit whose verdict
+# re-renders into the same element still is. The first verdict is recorded in
+# window.__botVerdict and wakes whoever is waiting on it. With arguments[2] set (a page that
+# replaced the one submitted from) the result elements already there are read once too.
+VERDICT_OBSERVER = """
+    const verdicts = arguments[0];
+    const selector = arguments[1];
+    const previous = window.__botVerdict;
+    if (previous && previous.observer) previous.observer.disconnect();
+    const state = {result: null, waiters: [], observer: null, started: performance.now()};
+    window.__botVerdict = state;
+
+    const metric = (text, name, unit) => {
+        const match = text.match(new RegExp(name + '\\\\s*:?\\\\s*([\\\\d.]+)\\\\s*' + unit, 'i'));
+        return match ? parseFloat(match[1]) : null;
+    };
+
+    const read = (candidates) => {
+        for (const el of candidates) {
+            const text = el.textContent.trim();
+            // Verdict labels lead their element; this skips e.g. "Accepted 1.2M" in the stats
+            const status = verdicts.find(v => text.startsWith(v));
+            if (!status) continue;
+            // Runtime and memory sit in the surrounding result panel, a few levels up
+            let panel = el;
+            let details = text;
+            for (let i = 0; i < 4 && panel.parentElement; i++) {
+                panel = panel.parentElement;
+                details = panel.innerText || panel.textContent;
+                if (/Runtime/i.test(details) && /Memory/i.test(details)) break;
+            }
+            return {
+                status: status,
+                text: text.slice(0, 300),
+                runtime_ms: metric(details, 'Runtime', 'ms'),
+                memory_mb: metric(details, 'Memory', 'MB'),
+                waited_ms: Math.round(performance.now() - state.started)
+            };
+        }
+        return null;
+    };
+
+    const settle = (result) => {
+        state.result = result;
+        state.observer.disconnect();
+        state.waiters.splice(0).forEach(wake => wake(result));
+    };
+    // Only what a mutation brought in: added elements and the result elements inside them, and
+    // for changed or added text, the result element it sits in. The mutated parent's other
+    // children are never scanned, since an earlier verdict may be among them.
+    const added = (node) => {
+        if (node.nodeType !== Node.ELEMENT_NODE) return inside(node);
+        const own = node.matches(selector) ? [node] : [];
+        return own.concat(Array.from(node.querySelectorAll(selector)));
+    };
+    const inside = (node) => {
+        const owner = node.parentElement && node.parentElement.closest(selector);
+        return owner ? [owner] : [];
+    };
+    state.observer = new MutationObserver((records) => {
+        for (const record of records) {
+            const nodes = record.type === 'characterData'
+                ? inside(record.target)
+                : Array.from(record.addedNodes).flatMap(added);
+            const result = read(nodes);
+            if (result) {
+                settle(result);
+                return;
+            }
+        }
+    });
+    state.observer.observe(document.body, {childList: true, subtree: true, characterData: true});
+    if (arguments[2]) {
+        // Reinstalled on a replaced page, which may have rendered its verdict already
+        const result = read(Array.from(document.querySelectorAll(selector)));
+        if (result) settle(result);
+    }
+    return true;
+"""
+
+# Waits up to arguments[0] seconds on the installed observer; returns the moment it records a
+# verdict. Nothing is scanned here, so the wait can be sliced without re-reading the page.
+VERDICT_WAIT = """
+    const done = arguments[arguments.length - 1];
+    const state = window.__botVerdict;
+    if (!state) {
+        done({installed: false, result: null});
+        return;
+    }
+    if (state.result) {
+        done({installed: true, result: state.result});
+        return;
+    }
+    let wake = null;
+    const timer = setTimeout(() => {
+        state.waiters = state.waiters.filter(w => w !== wake);
+        done({installed: true, result: null});
+    }, arguments[0] * 1000);
+    wake = (result) => {
+        clearTimeout(timer);
+        done({installed: true, result: result});
+    };
+    state.waiters.push(wake);
+"""
+
+RESULT_SELECTOR = ', '.join([
+    '[data-e2e-locator="submission-result"]',
+    '.text-success',
+    '.success',
+    '[data-state="success"]',
+    '[class*="result"]',
+    '[class*="status"]'
+])
+
+
+def parse_number(value):
+    try:
+        return float(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def normalize_verdict(raw, elapsed):
+    if not raw:
+        return {
+            'status': TIMED_OUT,
+            'accepted': False,
+            'runtime_ms': None,
+            'memory_mb': None,
+            'text': None,
+            'seconds': round(elapsed, 3)
+        }
+    status = raw.get('status')
+    return {
+        'status': status,
+        'accepted': status == ACCEPTED,
+        'runtime_ms': parse_number(raw.get('runtime_ms')),
+        'memory_mb': parse_number(raw.get('memory_mb')),
+        'text': raw.get('text'),
+        'seconds': round(elapsed, 3)
+    }
+
+
+def install_observer(driver, read_current=False):
+    driver.execute_script(VERDICT_OBSERVER, VERDICTS, RESULT_SELECTOR, read_current)
+
+
+def wait_for_verdict(driver, timeout=30, cancel=None, step=0.1):
+    # Expects install_observer() to have run right before the submission
+    start = time.perf_counter()
+    # With a cancel check the wait on the observer is sliced so a cancelled run is noticed
+    # within a step; each slice still returns the moment the verdict is recorded
+    wait = step if cancel else timeout
+    # The driver's script timeout has to outlast each wait
+    driver.set_script_timeout(wait + 5)
+    raw = None
+    while not raw:
+        if cancel and cancel():
+            raise Cancelled('verdict')
+        remaining = timeout - (time.perf_counter() - start)
+        if remaining <= 0:
+            break
+        reply = driver.execute_async_script(VERDICT_WAIT, min(wait, remaining)) or {}
+        if not reply.get('installed'):
+            # The page was replaced under us; watch the new one, which holds nothing from
+            # before the submission, so a verdict it already shows is this one's
+            install_observer(driver, read_current=True)
+        raw = reply.get('result')
+    return normalize_verdict(raw, time.perf_counter() - start)
@@ -0,0 +1,160 @@
+from lazy import lazy_import
+import threading
+import time
+
+DEFAULT_TIMEOUTS = {
+    'problem_list': 15,
+    'description': 10,
+    'editor': 15,
+    'route': 10,
+    'language': 3,
+    'submit_ready': 5,
+    'verdict': 30
+}
+
+# Page-readiness checks, evaluated in the page until they return something truthy
+PROBLEM_ROWS_READY = """
+    return document.querySelectorAll('div[role="row"] a[href*="/problems/"]').length > 0;
+"""
+
+DESCRIPTION_READY = """
+    const selectors = [
+        'div[data-track-load="description_content"]',
+        'div[class*="description"]',
+        'div[role="tabpanel"]',
+        'div[data-cy="question-title"]',
+        'div._1l1MA'
+    ];
+    return selectors.some(selector => {
+        const element = document.querySelector(selector);
+        return element && element.textContent.trim().length > 0;
+    });
+"""
+
+# Defines activeModel(slug): the Monaco model whose URI names the problem's slug, else the one
+# the visible editor shows. After an in-app route getModels()[0] can still be the previous
+# problem's model, so it is only the last resort.
+ACTIVE_MODEL = """
+    const activeModel = (slug) => {
+        const models = monaco.editor.getModels();
+        if (slug) {
+            const named = new RegExp('[/=]' + slug + '([/.?#]|$)');
+            const model = models.find(m => named.test(String(m.uri)));
+            if (model) return model;
+        }
+        const editors = monaco.editor.getEditors ? monaco.editor.getEditors() : [];
+        for (const editor of editors) {
+            const model = editor.getModel();
+            if (model) return model;
+        }
+        return models[models.length - 1] || null;
+    };
+"""
+
+EDITOR_READY = ACTIVE_MODEL + """
+    try {
+        if (typeof monaco !== 'undefined' && activeModel(arguments[0])) return true;
+    } catch (e) {}
+    return !!document.querySelector('.CodeMirror, #ace-editor, [contenteditable="true"], textarea[class*="editor"]');
+"""
+
+PYTHON_SELECTED = ACTIVE_MODEL + """
+    try {
+        const model = activeModel(arguments[0]);
+        return model.getLanguageId() === 'python';
+    } catch (e) {
+        return false;
+    }
+"""
+
+SUBMIT_READY = """
+    const button = document.querySelector('[data-cy="submit-code-btn"]') ||
+        Array.from(document.querySelectorAll('button')).find(b => b.textContent.includes('Submit'));
+    return !!button && !button.disabled;
+"""
+
+
+class Cancelled(Exception):
+    # Raised out of a wait (or any other step) once the run has been cancelled
+    pass
+
+
+def js_condition(script, *args):
+    def condition(driver):
+        return driver.execute_script(script, *args)
+    return condition
+
+
+class WaitEngine:
+    def __init__(self, timeouts=None, poll_frequency=0.1, history=50, cancel=None):
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        # Checked on every poll, so a cancelled run leaves a wait within one poll interval
+        self.cancel = cancel
+        if timeouts:
+            self.timeouts.update(timeouts)
+        self.poll_frequency = poll_frequency
+        self.history = history
+        self.lock = threading.Lock()
+        self.records = {}
+
+    def timeout_for(self, phase, timeout=None):
+        if timeout is not None:
+            return timeout
+        return self.timeouts.get(phase, 10)
+
+    def until(self, driver, phase, condition, timeout=None):
+        timeout = self.timeout_for(phase, timeout)
+        start = time.perf_counter()
+        result = None
+        ui = lazy_import('selenium.webdriver.support.ui')
+        exceptions = lazy_import('selenium.common.exceptions')
+
+        def check(current):
+            if self.cancel and self.cancel():
+                raise Cancelled(phase)
+            return condition(current)
+
+        try:
+            wait = ui.WebDriverWait(driver, timeout, poll_frequency=self.poll_frequency)
+            result = wait.until(check)
+        except exceptions.TimeoutException:
+            print(f"Timed out after {timeout}s waiting for {phase}")
+        finally:
+            self.record(phase, time.perf_counter() - start, result is not None)
+        return result
+
+    def until_js(self, driver, phase, script, *args, timeout=None):
+        return self.until(driver, phase, js_condition(script, *args), timeout=timeout)
+
+    def record(self, phase, elapsed, ready):
+        with self.lock:
+            entry = self.records.setdefault(phase, {
+                'count': 0,
+                'timeouts': 0,
+                'total': 0.0,
+                'max': 0.0,
+                'last': None,
+                'recent': []
+            })
+            entry['count'] += 1
+            entry['total'] += elapsed
+            entry['max'] = max(entry['max'], elapsed)
+            entry['last'] = elapsed
+            if not ready:
+                entry['timeouts'] += 1
+            entry['recent'].append(elapsed)
+            del entry['recent'][:-self.history]
+
+    def summary(self):
+        with self.lock:
+            return {
+                phase: {
+                    'count': entry['count'],
+                    'timeouts': entry['timeouts'],
+                    'avg': round(entry['total'] / entry['count'], 3),
+                    'max': round(entry['max'], 3),
+                    'last': round(entry['last'], 3),
+                    'timeout': self.timeouts.get(phase)
+                }
+                for phase, entry in self.records.items()
+            }